@@ -2,25 +2,130 @@
 
 import os
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from anthropic import Anthropic, HUMAN_PROMPT, AI_PROMPT
+from anthropic import Anthropic
+from .metrics import registry
 
 # Load environment variables
 load_dotenv()
 
-# Initialize Anthropic client
-anthropic = Anthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
+MODEL = os.environ.get("GITWHISPER_MODEL", "claude-3-5-sonnet-20241022")
 
-def get_claude_response(prompt):
+COMMIT_MESSAGE_INSTRUCTIONS = """
+Analyze the Git diff provided by the user and create a concise, informative commit message.
+The message should summarize the main changes and their purpose.
+
+Provide ONLY the commit message in the following format, without any additional text, explanations, or labels:
+
+[A brief one-line summary of the changes]
+
+[A more detailed explanation of what was changed and why (2-3 sentences)]
+"""
+
+DIFF_CHUNK_INSTRUCTIONS = """
+The user message is one part of a larger Git diff. Summarize the changes it contains as a short bullet list
+(at most 5 bullets), focusing on what changed and why. Provide ONLY the bullet list.
+"""
+
+COMBINE_SUMMARIES_INSTRUCTIONS = """
+The user message contains bullet lists summarizing the parts of one large Git commit.
+Create a concise, informative commit message that summarizes the main changes and their purpose.
+
+Provide ONLY the commit message in the following format, without any additional text, explanations, or labels:
+
+[A brief one-line summary of the changes]
+
+[A more detailed explanation of what was changed and why (2-3 sentences)]
+"""
+
+FILE_REVIEW_INSTRUCTIONS = """
+You are reviewing one file of a code change. The user message gives the file path and its diff.
+Point out bugs, risky behaviour, missing error handling, and readability problems introduced by the change.
+Refer to specific lines where possible, and keep each finding to one or two sentences.
+
+Provide ONLY a bullet list of findings, most important first. If there is nothing worth changing, reply with exactly:
+No issues found.
+"""
+
+RELEASE_GROUP_INSTRUCTIONS = """
+The user message lists consecutive commits from one release, oldest first, each with its message and changed files.
+Summarize them as release-note entries for users of the project. Merge commits that belong to the same change,
+and leave out purely internal work (refactors, CI, formatting) unless it affects users.
+
+Provide ONLY a bullet list, one entry per line, each starting with its category in brackets, for example:
+- [Features] Added ...
+- [Fixes] Fixed ...
+Use only these categories: Features, Fixes, Improvements, Breaking Changes, Other.
+"""
+
+RELEASE_NOTES_INSTRUCTIONS = """
+The user message contains categorized bullet lists, each summarizing part of one release.
+Combine them into release notes in Markdown: one "## <Category>" section per category that has entries,
+in the order Breaking Changes, Features, Improvements, Fixes, Other. Remove duplicates and merge closely related entries.
+
+Provide ONLY the Markdown release notes, without a title or any introduction.
+"""
+
+MERGE_SUMMARY_INSTRUCTIONS = """
+The user message lists the commits a merge would bring into the current branch, each with its message and changed
+files, followed by any paths git could not merge automatically. Summarize for the developer about to merge:
+what the incoming changes do, which areas they touch, and what to look out for in each conflict.
+
+Provide ONLY the summary, as a few short paragraphs or bullets, without an introduction.
+"""
+
+_client = None
+
+def get_client():
+    """
+    Return the shared Anthropic client, creating it on first use.
+    ANTHROPIC_BASE_URL can point it at a local stand-in server.
+    """
+    global _client
+    if _client is None:
+        _client = Anthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
+    return _client
+
+def record_usage(usage):
+    """
+    Add the usage block of a Messages API response to the registry's llm.* counters.
+    """
+    registry.increment('llm.requests')
+    for key in ('input_tokens', 'output_tokens', 'cache_creation_input_tokens', 'cache_read_input_tokens'):
+        registry.increment(f'llm.{key}', getattr(usage, key, None) or 0)
+    # A request whose cacheable prefix was read from the prompt cache counts as a hit
+    if getattr(usage, 'cache_read_input_tokens', None):
+        registry.increment('cache.prompt.hit')
+    elif getattr(usage, 'cache_creation_input_tokens', None):
+        registry.increment('cache.prompt.miss')
+
+def get_claude_response(prompt, system=None, max_tokens=300):
     """
     Send a prompt to Claude and get the response.
+    Static instructions go in `system`, which is marked as a cacheable prefix so that
+    repeated calls only pay full price for the varying user content.
+    The response is streamed so time to first token can be measured.
     """
-    completion = anthropic.completions.create(
-        model="claude-2.1",
-        max_tokens_to_sample=300,
-        prompt=f"{HUMAN_PROMPT} {prompt}{AI_PROMPT}",
-    )
-    return completion.completion
+    request = {
+        'model': MODEL,
+        'max_tokens': max_tokens,
+        'messages': [{'role': 'user', 'content': prompt}],
+    }
+    if system:
+        request['system'] = [{'type': 'text', 'text': system.strip(), 'cache_control': {'type': 'ephemeral'}}]
+    start = time.perf_counter()
+    parts = []
+    with get_client().messages.stream(**request) as stream:
+        for text in stream.text_stream:
+            if not parts:
+                registry.observe('llm.time_to_first_token', time.perf_counter() - start)
+            parts.append(text)
+        message = stream.get_final_message()
+    registry.observe('llm.total', time.perf_counter() - start)
+    record_usage(message.usage)
+    return ''.join(parts)
 
 def clean_response(response):
     """
@@ -49,21 +154,67 @@ def generate_commit_message(diff):
     """
     Generate a commit message based on the provided diff.
     """
-    prompt = f"""
-    Analyze the following Git diff and create a concise, informative commit message. 
-    The message should summarize the main changes and their purpose.
+    response = get_claude_response(f"Here's the diff:\n\n{diff}", system=COMMIT_MESSAGE_INSTRUCTIONS)
+    cleaned_response = clean_response(response)
+    
+    return cleaned_response
 
-    Here's the diff:
+def split_into_chunks(file_diffs, max_chars=40000):
+    """
+    Group per-file diffs into chunks of at most max_chars characters (a single oversized file is cut).
+    """
+    chunks = []
+    current = []
+    size = 0
+    for file_diff in file_diffs:
+        file_diff = file_diff[:max_chars]
+        if current and size + len(file_diff) > max_chars:
+            chunks.append('\n'.join(current))
+            current, size = [], 0
+        current.append(file_diff)
+        size += len(file_diff)
+    if current:
+        chunks.append('\n'.join(current))
+    return chunks
 
-    {diff}
+def summarize_diff_chunk(diff_chunk):
+    """
+    Summarize one chunk of a large diff as a short bullet list.
+    """
+    return get_claude_response(diff_chunk, system=DIFF_CHUNK_INSTRUCTIONS).strip()
 
-    Provide ONLY the commit message in the following format, without any additional text, explanations, or labels:
+def generate_chunked_commit_message(file_diffs, max_chars=40000, max_workers=4):
+    """
+    Generate a commit message for a diff too large for one prompt.
+    Chunks are summarized concurrently, then the summaries are combined into one message.
+    """
+    chunks = split_into_chunks(file_diffs, max_chars)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        summaries = list(executor.map(summarize_diff_chunk, chunks))
 
-    [A brief one-line summary of the changes]
+    return clean_response(get_claude_response('\n\n'.join(summaries), system=COMBINE_SUMMARIES_INSTRUCTIONS))
 
-    [A more detailed explanation of what was changed and why (2-3 sentences)]
+def review_file_diff(path, diff):
     """
-    response = get_claude_response(prompt)
-    cleaned_response = clean_response(response)
-    
-    return cleaned_response
\ No newline at end of file
+    Review the diff of a single file and return a bullet list of findings.
+    """
+    return get_claude_response(f"File: {path}\n\n{diff}", system=FILE_REVIEW_INSTRUCTIONS, max_tokens=1024).strip()
+
+def summarize_commit_group(commits_text):
+    """
+    Summarize a batch of commit descriptions as categorized release-note bullets.
+    """
+    return get_claude_response(commits_text, system=RELEASE_GROUP_INSTRUCTIONS, max_tokens=1024).strip()
+
+def combine_release_notes(group_summaries):
+    """
+    Reduce the categorized bullets of every commit group into release-note sections.
+    """
+    return get_claude_response('\n\n'.join(group_summaries), system=RELEASE_NOTES_INSTRUCTIONS,
+                               max_tokens=2048).strip()
+
+def summarize_incoming_changes(preview_text):
+    """
+    Summarize the commits and conflicts of a previewed merge.
+    """
+    return get_claude_response(preview_text, system=MERGE_SUMMARY_INSTRUCTIONS, max_tokens=1024).strip()
@@ -0,0 +1,192 @@
+# gitwhisper/analytics.py
+
+import math
+import subprocess
+import time
+from array import array
+from itertools import combinations
+from typing import Dict, List, Optional, Tuple
+
+from .commit_cache import iter_log_numstat
+from .metrics import run_git
+
+# Hotspot weight of a change halves every this many days
+HALF_LIFE_DAYS = 90
+# Commits touching more files than this (mass renames, reformatting) don't count towards co-change
+MAX_COCHANGE_FILES = 20
+# Co-change pairs tracked at once; the rarest half is dropped when the table fills
+MAX_PAIRS = 200_000
+# Distinct authors remembered per file; counts above this are reported as this value
+MAX_FILE_AUTHORS = 32
+
+class HistoryAnalytics:
+    """Churn, ownership and coupling statistics from one pass over the history.
+
+    Per-file statistics are kept in parallel `array` columns indexed by a
+    file id, so memory grows with the number of distinct paths rather than
+    the number of commits. Renames are followed, so a file's history is
+    reported under its newest name. Co-change pairs use a bounded table
+    (see MAX_PAIRS), so their counts are lower bounds for rare pairs.
+    """
+
+    def __init__(self, half_life_days: float = HALF_LIFE_DAYS):
+        self.half_life = half_life_days * 86400
+        self.paths: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self.renamed_to: Dict[str, str] = {}
+        self.commits = array('l')
+        self.added = array('q')
+        self.removed = array('q')
+        self.hotspot = array('d')
+        self.last_changed = array('q')
+        self.file_authors: List[set] = []
+        self.author_ids: Dict[str, int] = {}
+        self.author_commits = array('l')
+        self.pairs: Dict[Tuple[int, int], int] = {}
+        self.pairs_pruned = 0
+        self.commit_count = 0
+        self.now: Optional[int] = None
+
+    def _file_id(self, path: str) -> int:
+        # Follow renames seen in newer commits to the file's current name
+        while path in self.renamed_to:
+            path = self.renamed_to[path]
+        file_id = self.ids.get(path)
+        if file_id is None:
+            file_id = self.ids[path] = len(self.paths)
+            self.paths.append(path)
+            for column in (self.commits, self.added, self.removed, self.last_changed):
+                column.append(0)
+            self.hotspot.append(0.0)
+            self.file_authors.append(set())
+        return file_id
+
+    def add_commit(self, commit: dict):
+        """Account for one commit; commits must arrive newest first, as `git log` emits them."""
+        if self.now is None:
+            self.now = commit['committed_date']
+        self.commit_count += 1
+        author = commit['author_email'] or commit['author_name']
+        author_id = self.author_ids.get(author)
+        if author_id is None:
+            author_id = self.author_ids[author] = len(self.author_commits)
+            self.author_commits.append(0)
+        self.author_commits[author_id] += 1
+
+        age = max(self.now - commit['committed_date'], 0)
+        weight = math.pow(0.5, age / self.half_life)
+        touched = []
+        for path, old_path, added, removed in commit['files']:
+            file_id = self._file_id(path)
+            if old_path != path and old_path not in self.ids:
+                self.renamed_to[old_path] = self.paths[file_id]
+            self.commits[file_id] += 1
+            self.added[file_id] += added or 0
+            self.removed[file_id] += removed or 0
+            self.hotspot[file_id] += weight
+            if not self.last_changed[file_id]:
+                self.last_changed[file_id] = commit['committed_date']
+            authors = self.file_authors[file_id]
+            if len(authors) < MAX_FILE_AUTHORS:
+                authors.add(author_id)
+            touched.append(file_id)
+
+        if 1 < len(touched) <= MAX_COCHANGE_FILES:
+            for pair in combinations(sorted(set(touched)), 2):
+                self.pairs[pair] = self.pairs.get(pair, 0) + 1
+            if len(self.pairs) > MAX_PAIRS:
+                self._prune_pairs()
+
+    def _prune_pairs(self):
+        threshold = sorted(self.pairs.values())[len(self.pairs) // 2]
+        self.pairs = {pair: count for pair, count in self.pairs.items() if count > threshold}
+        self.pairs_pruned += 1
+
+    def churn(self, file_id: int) -> int:
+        return self.added[file_id] + self.removed[file_id]
+
+    def _file_row(self, file_id: int) -> dict:
+        return {
+            'path': self.paths[file_id],
+            'commits': self.commits[file_id],
+            'added': self.added[file_id],
+            'removed': self.removed[file_id],
+            'churn': self.churn(file_id),
+            'authors': len(self.file_authors[file_id]),
+            'hotspot': round(self.hotspot[file_id], 3),
+            'last_changed': self.last_changed[file_id],
+        }
+
+    def _existing_ids(self, existing: Optional[set]) -> List[int]:
+        return [i for i in range(len(self.paths)) if existing is None or self.paths[i] in existing]
+
+    def top_files(self, count: int = 20, by: str = 'churn', existing: Optional[set] = None) -> List[dict]:
+        """Files ranked by 'churn', 'commits' or 'hotspot', optionally limited to paths in `existing`."""
+        key = {'churn': self.churn, 'commits': self.commits.__getitem__, 'hotspot': self.hotspot.__getitem__}[by]
+        ranked = sorted(self._existing_ids(existing), key=key, reverse=True)
+        return [self._file_row(i) for i in ranked[:count]]
+
+    def hotspots(self, count: int = 20, existing: Optional[set] = None) -> List[dict]:
+        """Files changed both often and recently: every commit counts, halving in weight each half-life."""
+        return self.top_files(count, 'hotspot', existing)
+
+    def directory_churn(self, depth: int = 1, existing: Optional[set] = None) -> List[dict]:
+        """Churn and commit counts summed per directory, cut at `depth` path components."""
+        totals: Dict[str, list] = {}
+        for i in self._existing_ids(existing):
+            parts = self.paths[i].split('/')[:-1][:depth]
+            directory = '/'.join(parts) if parts else '.'
+            entry = totals.setdefault(directory, [0, 0, 0])
+            entry[0] += self.churn(i)
+            entry[1] += self.commits[i]
+            entry[2] += 1
+        rows = [{'directory': d, 'churn': c, 'file_commits': n, 'files': f} for d, (c, n, f) in totals.items()]
+        return sorted(rows, key=lambda row: row['churn'], reverse=True)
+
+    def top_authors(self, count: int = 10) -> List[Tuple[str, int]]:
+        names = sorted(self.author_ids, key=lambda name: self.author_commits[self.author_ids[name]], reverse=True)
+        return [(name, self.author_commits[self.author_ids[name]]) for name in names[:count]]
+
+    def co_changes(self, count: int = 20, existing: Optional[set] = None) -> List[Tuple[str, str, int]]:
+        """Pairs of files most often changed in the same commit."""
+        pairs = sorted(self.pairs.items(), key=lambda item: item[1], reverse=True)
+        result = []
+        for (a, b), together in pairs:
+            if existing is None or (self.paths[a] in existing and self.paths[b] in existing):
+                result.append((self.paths[a], self.paths[b], together))
+                if len(result) == count:
+                    break
+        return result
+
+def analyze_history(repo_path: str = '.', rev: str = 'HEAD', max_count: Optional[int] = None,
+                    half_life_days: float = HALF_LIFE_DAYS) -> HistoryAnalytics:
+    """Stream `git log --numstat -z` for `rev` once (merges excluded) into a HistoryAnalytics."""
+    extra_args = ['--no-merges'] + ([f'--max-count={max_count}'] if max_count else [])
+    analytics = HistoryAnalytics(half_life_days)
+    for commit in iter_log_numstat(repo_path, [rev], extra_args):
+        analytics.add_commit(commit)
+    if analytics.now is None:
+        analytics.now = int(time.time())
+    return analytics
+
+def files_at(repo_path: str = '.', rev: str = 'HEAD') -> set:
+    """Paths present in `rev`, used to leave deleted files out of the rankings."""
+    output = run_git(['git', 'ls-tree', '-r', '-z', '--name-only', rev], cwd=repo_path,
+                     stdin=subprocess.DEVNULL, capture_output=True, check=True).stdout
+    return {path.decode('utf-8', 'replace') for path in output.split(b'\0') if path}
+
+def format_summary(analytics: HistoryAnalytics, existing: Optional[set] = None, count: int = 10) -> str:
+    """Plain-text digest for prompts: busiest directories, hotspots and files that change together."""
+    lines = [f"History analysed: {analytics.commit_count} commits, {len(analytics.author_ids)} authors"]
+    lines.append("Most changed directories (lines changed, files):")
+    lines.extend(f"  {row['directory']}: {row['churn']} lines, {row['files']} files"
+                 for row in analytics.directory_churn(1, existing)[:count])
+    lines.append("Hotspots (changed often and recently):")
+    lines.extend(f"  {row['path']}: {row['commits']} commits, last changed "
+                 f"{time.strftime('%Y-%m-%d', time.gmtime(row['last_changed']))}"
+                 for row in analytics.hotspots(count, existing))
+    pairs = analytics.co_changes(5, existing)
+    if pairs:
+        lines.append("Files usually changed together:")
+        lines.extend(f"  {a} + {b}: {together} commits" for a, b, together in pairs)
+    return '\n'.join(lines)
@@ -0,0 +1,127 @@
+# gitwhisper/benchmarks/file_tree.py
+
+"""
+Compare the Files tree model against a QStandardItemModel with one item per path.
+
+For each size, synthetic repository paths are generated and folded into a
+path tree, then each model is built from that tree in a fresh subprocess.
+Reported are the build time, the time for a tree view to show the model,
+and the growth in resident memory once the model is built and the path tree
+dropped. Memory the allocator keeps after freeing the path tree counts
+against both models alike.
+
+Usage: python -m gitwhisper.benchmarks.file_tree [--sizes 10000 100000 1000000]
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QStandardItem, QStandardItemModel
+from PyQt6.QtWidgets import QApplication, QTreeView
+from gitwhisper.git_utils import build_path_tree
+from gitwhisper.ui.file_model import FileSystemModel, PathStore
+
+PACKAGE_PARENT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DIRECTORY_NAMES = ['src', 'lib', 'tests', 'docs', 'core', 'utils', 'api', 'models', 'views', 'assets',
+                   'components', 'internal', 'vendor', 'build', 'scripts', 'config']
+FILE_NAMES = ['__init__.py', 'index.js', 'main.go', 'README.md', 'utils.py', 'types.ts', 'test_main.py',
+              'Makefile', 'style.css', 'config.yaml']
+
+def synthetic_paths(count, seed=0):
+    """Paths two to six levels deep, with directory and file names drawn from a small vocabulary."""
+    rng = random.Random(seed)
+    paths = set()
+    while len(paths) < count:
+        depth = rng.randint(1, 5)
+        parts = [f"{rng.choice(DIRECTORY_NAMES)}{rng.randint(0, 30)}" for _ in range(depth)]
+        parts.append(f"{rng.randint(0, 200)}_{rng.choice(FILE_NAMES)}")
+        paths.add('/'.join(parts))
+    return sorted(paths)
+
+def rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        # Peak rather than current resident size, in KiB on Linux and bytes on macOS
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+def standard_item_model(tree):
+    """The previous Files model: a QStandardItem per path, holding its relative path in UserRole."""
+    model = QStandardItemModel()
+    model.setHorizontalHeaderLabels(['Name'])
+
+    def add_files(parent, prefix, subtree):
+        for name, children in sorted(subtree.items(), key=lambda entry: (entry[1] is None, entry[0].lower())):
+            rel_path = prefix + name
+            item = QStandardItem(name)
+            item.setData(rel_path, Qt.ItemDataRole.UserRole)
+            parent.appendRow(item)
+            if children is not None:
+                add_files(item, rel_path + '/', children)
+
+    add_files(model.invisibleRootItem(), '', tree)
+    return model
+
+def path_store_model(tree):
+    return FileSystemModel('.', PathStore(tree))
+
+def measure(kind, count):
+    """Build one model in this process and return its measurements."""
+    app = QApplication([])
+    gc.collect()
+    baseline = rss_bytes()
+    tree = build_path_tree(synthetic_paths(count))
+    start = time.perf_counter()
+    model = (standard_item_model if kind == 'standard' else path_store_model)(tree)
+    built = time.perf_counter() - start
+    # The path tree is only needed while building
+    del tree
+    gc.collect()
+    memory = rss_bytes() - baseline
+
+    view = QTreeView()
+    view.resize(800, 600)
+    start = time.perf_counter()
+    view.setModel(model)
+    view.show()
+    app.processEvents()
+    shown = time.perf_counter() - start
+    return {'build_s': built, 'show_s': shown, 'memory_mb': memory / 2 ** 20}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Files tree model.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--measure', nargs=2, metavar=('KIND', 'COUNT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.measure[0], int(args.measure[1]))))
+        return 0
+
+    env = dict(os.environ, PYTHONPATH=PACKAGE_PARENT)
+    print(f"{'paths':>9}  {'model':<14} {'build':>9} {'show':>9} {'memory':>10}")
+    for count in args.sizes:
+        for kind, label in (('standard', 'QStandardItem'), ('store', 'PathStore')):
+            output = subprocess.run([sys.executable, '-m', 'gitwhisper.benchmarks.file_tree',
+                                     '--measure', kind, str(count)],
+                                    env=env, capture_output=True, text=True, check=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{count:>9}  {label:<14} {result['build_s']:>8.2f}s {result['show_s']:>8.3f}s "
+                  f"{result['memory_mb']:>8.1f}MB")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
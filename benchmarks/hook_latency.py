@@ -0,0 +1,122 @@
+# gitwhisper/benchmarks/hook_latency.py
+
+"""
+Measure what the prepare-commit-msg hook adds to `git commit`.
+
+The repository is cloned into a scratch directory with several worktrees.
+A daemon is started on a private socket and the hook is installed.
+Each round, every worktree stages a small change and commits at the
+same time, once with the hook and once with hooks disabled. Commits
+whose hook ran out of budget are counted as fallbacks (git aborts them
+because the message stays empty).
+
+Point ANTHROPIC_BASE_URL at a local stand-in server to leave the API out of the measurement.
+
+Usage: python -m gitwhisper.benchmarks.hook_latency [REPO_PATH] [--worktrees N] [--rounds N] [--budget-ms MS]
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from gitwhisper.daemon import install_hook
+
+PACKAGE_PARENT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def git(cwd, *args, env=None):
+    return subprocess.run(['git'] + list(args), cwd=cwd, env=env, capture_output=True, text=True)
+
+def wait_for_socket(socket_path, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(socket_path)
+                return True
+            except OSError:
+                time.sleep(0.05)
+    return False
+
+def daemon_stats(socket_path):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall(b'{"op": "stats"}\n')
+        return json.loads(sock.makefile().readline())
+
+def timed_commit(worktree, round_index, env, use_hook):
+    name = 'hook' if use_hook else 'plain'
+    with open(os.path.join(worktree, f'bench-{name}.txt'), 'a') as f:
+        f.write(f"round {round_index}\n")
+    git(worktree, 'add', f'bench-{name}.txt')
+    args = ['commit', '-q'] if use_hook else ['-c', 'core.hooksPath=/dev/null', 'commit', '-q', '-m', 'plain']
+    start = time.perf_counter()
+    result = git(worktree, *args, env=env)
+    return time.perf_counter() - start, result.returncode == 0
+
+def summarize(label, values):
+    values = sorted(values)
+    p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+    print(f"{label}: median {statistics.median(values) * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms, "
+          f"max {values[-1] * 1000:.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prepare-commit-msg hook latency.")
+    parser.add_argument('repo', nargs='?', default='.', help="repository to clone for the benchmark")
+    parser.add_argument('--worktrees', type=int, default=4)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--budget-ms', type=int, default=1500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        base = os.path.join(scratch, 'base')
+        git(scratch, 'clone', '-q', os.path.abspath(args.repo), base)
+        worktrees = []
+        for i in range(args.worktrees):
+            path = os.path.join(scratch, f'wt{i}')
+            git(base, 'worktree', 'add', '-q', '-b', f'bench-{i}', path)
+            worktrees.append(path)
+        install_hook(base, force=True)
+
+        socket_path = os.path.join(scratch, 'daemon.sock')
+        env = dict(os.environ, GITWHISPER_SOCKET=socket_path, GITWHISPER_HOOK_BUDGET_MS=str(args.budget_ms),
+                   GIT_EDITOR='true', PYTHONPATH=PACKAGE_PARENT)
+        # Scratch clones may have no identity configured
+        for key, value in (('GIT_AUTHOR_NAME', 'bench'), ('GIT_AUTHOR_EMAIL', 'bench@example.com'),
+                           ('GIT_COMMITTER_NAME', 'bench'), ('GIT_COMMITTER_EMAIL', 'bench@example.com')):
+            env.setdefault(key, value)
+        daemon = subprocess.Popen([sys.executable, '-m', 'gitwhisper.main', 'daemon', '--socket', socket_path],
+                                  env=env, stdout=subprocess.DEVNULL)
+        try:
+            if not wait_for_socket(socket_path):
+                print("The daemon did not start")
+                return 1
+            hook_times, plain_times, fallbacks = [], [], 0
+            with ThreadPoolExecutor(max_workers=len(worktrees)) as pool:
+                for round_index in range(args.rounds):
+                    for use_hook, times in ((True, hook_times), (False, plain_times)):
+                        results = list(pool.map(lambda wt: timed_commit(wt, round_index, env, use_hook), worktrees))
+                        times.extend(elapsed for elapsed, _ in results)
+                        if use_hook:
+                            fallbacks += sum(1 for _, committed in results if not committed)
+            stats = daemon_stats(socket_path)
+        finally:
+            daemon.terminate()
+            daemon.wait()
+
+    print(f"{args.worktrees} worktrees x {args.rounds} rounds, budget {args.budget_ms} ms")
+    summarize("commit with hook", hook_times)
+    summarize("commit without hook", plain_times)
+    print(f"hook overhead (median): {(statistics.median(hook_times) - statistics.median(plain_times)) * 1000:.1f} ms")
+    print(f"fallbacks (budget exceeded): {fallbacks}/{len(hook_times)}")
+    print(f"daemon: {stats}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
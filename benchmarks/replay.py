@@ -0,0 +1,569 @@
+# gitwhisper/benchmarks/replay.py
+
+"""
+Record and replay end-to-end runs of user actions, and check them against latency budgets.
+
+`record` clones a repository into a scratch directory, stages a small change,
+and saves a snapshot of it as a fixture. It then runs every action in
+ACTIONS: the main window under offscreen Qt, the message and README
+generators, and CLI subcommands. Every one-shot git process (arguments,
+output, exit status, duration) and every model request (prompt, response,
+duration) is saved into the fixture.
+
+`replay` restores the snapshot and runs the same actions. Recorded git
+output and model responses are served in place of the real ones, after
+waiting for the recorded duration times `--scale`. Scale 1 reproduces the
+recorded latencies and scale 0 measures only gitwhisper's own work.
+Long-lived `cat-file --batch` processes and any git command missing from
+the fixture run for real against the restored snapshot. A model request
+missing from the fixture fails its action; re-record after changing
+prompts.
+
+Each action must finish within its budget: LOCAL_BUDGETS[action] plus
+`--scale` times the action's recorded duration. Budgets can be overridden
+with `--budget ACTION=SECONDS`. Replay exits with status 1 if any action
+fails or goes over its budget.
+
+Usage:
+    python -m gitwhisper.benchmarks.replay record REPO_PATH FIXTURE_DIR
+    python -m gitwhisper.benchmarks.replay replay FIXTURE_DIR [--scale 1.0] [--budget window.refresh=0.5]
+"""
+
+import argparse
+import collections
+import contextlib
+import hashlib
+import io
+import json
+import locale
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import git
+from PyQt6.QtCore import QEventLoop, QTimer
+from PyQt6.QtWidgets import QApplication
+from gitwhisper import ai_utils, commit_pipeline
+from gitwhisper.commit_summary import generate_staged_commit_summary
+from gitwhisper.main import main as cli_main
+from gitwhisper.metrics import count_git_subprocesses, registry
+from gitwhisper.readme_generator import generate_dynamic_readme
+from gitwhisper.ui.app import GitWhipperUI
+
+FIXTURE_VERSION = 1
+# Seconds an action may take beyond its scaled recorded duration
+LOCAL_BUDGETS = {
+    'window.startup': 3.0,
+    'window.refresh': 1.0,
+    'generate_summary': 0.5,
+    'readme': 1.0,
+    'cli.review': 1.0,
+    'cli.merge_preview': 0.5,
+    'window.generate_message': 0.5,
+    'window.commit': 1.0,
+}
+# Longest wait for the window to settle after an action
+IDLE_TIMEOUT_MS = 120000
+PLACEHOLDER = '{repo}'
+REPO_NAME = 'repo'
+# Before any wrapping, for commands run for real on the harness's behalf
+_REAL_POPEN = subprocess.Popen
+
+class ReplayMiss(KeyError):
+    """A model request that is not in the fixture."""
+
+class Fixture:
+    """Recorded git processes and model exchanges, stored as JSON lines with outputs in content-addressed blobs."""
+
+    def __init__(self, path, repo_path):
+        self.path = path
+        self.repo_roots = sorted({repo_path, os.path.realpath(repo_path)}, key=len, reverse=True)
+        self.lock = threading.Lock()
+        self.git = collections.defaultdict(list)
+        self.llm = collections.defaultdict(list)
+        self.served = collections.Counter()
+        os.makedirs(os.path.join(path, 'blobs'), exist_ok=True)
+
+    def load(self):
+        for name, table in (('git.jsonl', self.git), ('llm.jsonl', self.llm)):
+            with open(os.path.join(self.path, name), encoding='utf-8') as f:
+                for line in f:
+                    entry = json.loads(line)
+                    table[entry['key']].append(entry)
+        return self
+
+    def generalize(self, text):
+        for root in self.repo_roots:
+            text = text.replace(root, PLACEHOLDER)
+        return text
+
+    def localize(self, text):
+        return text.replace(PLACEHOLDER, self.repo_roots[-1])
+
+    def generalize_bytes(self, data):
+        for root in self.repo_roots:
+            data = data.replace(os.fsencode(root), PLACEHOLDER.encode())
+        return data
+
+    def localize_bytes(self, data):
+        return data.replace(PLACEHOLDER.encode(), os.fsencode(self.repo_roots[-1]))
+
+    def put_blob(self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        blob_path = os.path.join(self.path, 'blobs', digest)
+        if not os.path.exists(blob_path):
+            with open(blob_path, 'wb') as f:
+                f.write(data)
+        return digest
+
+    def get_blob(self, digest):
+        with open(os.path.join(self.path, 'blobs', digest), 'rb') as f:
+            return f.read()
+
+    def append(self, name, entry):
+        with self.lock:
+            with open(os.path.join(self.path, name), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, sort_keys=True) + '\n')
+
+    def next_entry(self, table, key):
+        """The recorded entries for a key are served in order; the last one is repeated."""
+        with self.lock:
+            entries = table.get(key)
+            if not entries:
+                return None
+            index = self.served[key]
+            self.served[key] += 1
+            return entries[min(index, len(entries) - 1)]
+
+    def git_key(self, args, cwd, stdin_data, env):
+        program, *rest = [os.fsdecode(arg) for arg in args]
+        parts = ['git'] + [self.generalize(arg) for arg in rest]
+        parts.append(f'cwd={self.generalize(os.path.abspath(cwd or os.getcwd()))}')
+        index_file = (env or {}).get('GIT_INDEX_FILE')
+        if index_file:
+            parts.append(f'index={self.generalize(os.path.abspath(index_file))}')
+        if stdin_data:
+            parts.append(f'stdin={hashlib.sha256(self.generalize_bytes(stdin_data)).hexdigest()}')
+        return hashlib.sha256('\0'.join(parts).encode()).hexdigest(), parts
+
+    def llm_key(self, prompt, system, max_tokens):
+        parts = [self.generalize(prompt), self.generalize(system or ''), str(max_tokens)]
+        return hashlib.sha256('\0'.join(parts).encode()).hexdigest()
+
+class _StdinBuffer(io.BytesIO):
+    """Collects what is written to a replayed process's stdin; closing it keeps the data."""
+
+    def close(self):
+        self.data = self.getvalue()
+
+    @property
+    def closed(self):
+        return False
+
+class _LazyOutput:
+    """A replayed process's stdout or stderr, filled in once the process is resolved."""
+
+    def __init__(self, proc, name):
+        self._proc = proc
+        self._name = name
+        self._stream = None
+
+    def _resolved(self):
+        if self._stream is None:
+            self._proc._resolve()
+            self._stream = self._proc._make_stream(self._name)
+        return self._stream
+
+    def __getattr__(self, attribute):
+        return getattr(self._resolved(), attribute)
+
+    def __iter__(self):
+        return iter(self._resolved())
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+
+def is_git_command(args) -> bool:
+    program = args if isinstance(args, (str, bytes)) else (args[0] if args else '')
+    return os.path.basename(os.fsdecode(program).split(' ', 1)[0]) in ('git', 'git.exe')
+
+class ReplayPopen:
+    """Stands in for subprocess.Popen while recording or replaying.
+
+    Git processes are resolved when their output, status or exit is first
+    asked for: while recording, the real command runs to completion and is
+    saved; while replaying, the saved result is served after the scaled
+    recorded delay. Other programs, and interactive git processes, are
+    started normally.
+    """
+
+    harness = None
+
+    def __new__(cls, args, *rest, **kwargs):
+        harness = cls.harness
+        if harness is None:
+            return _REAL_POPEN(args, *rest, **kwargs)
+        if rest or kwargs.get('shell') or not is_git_command(args) or \
+                isinstance(args, (str, bytes)) or any(os.fsdecode(arg).startswith('--batch') for arg in args) or \
+                kwargs.get('stdin') not in (None, subprocess.PIPE, subprocess.DEVNULL):
+            return harness.original_popen(args, *rest, **kwargs)
+        return super().__new__(cls)
+
+    def __init__(self, args, bufsize=-1, executable=None, stdin=None, stdout=None, stderr=None, cwd=None,
+                 env=None, universal_newlines=None, text=None, encoding=None, errors=None, **kwargs):
+        self.args = args
+        self.cwd = cwd
+        self.env = env
+        self.pid = 0
+        self.returncode = None
+        self.text_mode = bool(text or universal_newlines or encoding or errors)
+        self.encoding = encoding or locale.getpreferredencoding(False)
+        self.errors = errors or 'strict'
+        self._pipes = {'stdout': stdout, 'stderr': stderr}
+        self._result = None
+        self._lock = threading.Lock()
+        self._stdin_buffer = _StdinBuffer() if stdin == subprocess.PIPE else None
+        if self._stdin_buffer is None:
+            self.stdin = None
+        elif self.text_mode:
+            self.stdin = io.TextIOWrapper(self._stdin_buffer, self.encoding, self.errors, write_through=True)
+        else:
+            self.stdin = self._stdin_buffer
+        self.stdout = _LazyOutput(self, 'stdout') if stdout == subprocess.PIPE else None
+        self.stderr = _LazyOutput(self, 'stderr') if stderr == subprocess.PIPE else None
+
+    def _resolve(self):
+        with self._lock:
+            if self._result is None:
+                stdin_data = None
+                if self._stdin_buffer is not None:
+                    stdin_data = getattr(self._stdin_buffer, 'data', None) or self._stdin_buffer.getvalue()
+                self._result = self.harness.run_git(self.args, self.cwd, self.env, stdin_data)
+                self.returncode = self._result['returncode']
+
+    def _make_stream(self, name):
+        data = self._result[name]
+        if name == 'stdout' and self._pipes['stderr'] == subprocess.STDOUT:
+            data += self._result['stderr']
+        stream = io.BytesIO(data)
+        if self.text_mode:
+            return io.TextIOWrapper(stream, self.encoding, self.errors)
+        return stream
+
+    def poll(self):
+        self._resolve()
+        return self.returncode
+
+    def wait(self, timeout=None):
+        return self.poll()
+
+    def communicate(self, input=None, timeout=None):
+        if input is not None and self.stdin is not None:
+            self.stdin.write(input)
+        self._resolve()
+        return (self.stdout.read() if self.stdout is not None else None,
+                self.stderr.read() if self.stderr is not None else None)
+
+    def kill(self):
+        if self.returncode is None:
+            self.returncode = -9
+
+    terminate = kill
+
+    def send_signal(self, sig):
+        self.kill()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        for stream in (self.stdout, self.stderr):
+            if stream is not None:
+                stream.close()
+        self.wait()
+
+class Harness:
+    """Routes git processes and model requests to the fixture, recording or replaying them."""
+
+    def __init__(self, fixture, mode, scale=1.0):
+        self.fixture = fixture
+        self.mode = mode
+        self.scale = scale
+        self.original_popen = None
+        self.original_response = None
+        self.unrecorded_git = []
+
+    def install(self):
+        # Processes are counted where they are started, before they reach this Popen
+        count_git_subprocesses()
+        self.original_popen = subprocess.Popen
+        self.original_response = ai_utils.get_claude_response
+        ReplayPopen.harness = self
+        subprocess.Popen = ReplayPopen
+        for name in ('Popen', 'safer_popen'):
+            if getattr(git.cmd, name, None) is self.original_popen:
+                setattr(git.cmd, name, ReplayPopen)
+        ai_utils.get_claude_response = self.get_response
+        # Not a model request, and it would reach the network rather than the fixture
+        commit_pipeline.warm_connection = lambda: None
+
+    def run_real(self, args, cwd, env, stdin_data):
+        start = time.perf_counter()
+        proc = _REAL_POPEN(args, cwd=cwd, env=env,
+                           stdin=subprocess.PIPE if stdin_data else subprocess.DEVNULL,
+                           stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        stdout, stderr = proc.communicate(stdin_data)
+        return {'stdout': stdout, 'stderr': stderr, 'returncode': proc.returncode,
+                'seconds': time.perf_counter() - start}
+
+    def run_git(self, args, cwd, env, stdin_data):
+        fixture = self.fixture
+        key, parts = fixture.git_key(args, cwd, stdin_data, env)
+        if self.mode == 'record':
+            result = self.run_real(args, cwd, env, stdin_data)
+            fixture.append('git.jsonl', {
+                'key': key, 'command': parts, 'returncode': result['returncode'], 'seconds': result['seconds'],
+                'stdout': fixture.put_blob(fixture.generalize_bytes(result['stdout'])),
+                'stderr': fixture.put_blob(fixture.generalize_bytes(result['stderr'])),
+            })
+            return result
+        entry = fixture.next_entry(fixture.git, key)
+        if entry is None:
+            registry.increment('replay.git.unrecorded')
+            self.unrecorded_git.append(' '.join(parts))
+            return self.run_real(args, cwd, env, stdin_data)
+        time.sleep(entry['seconds'] * self.scale)
+        return {'stdout': fixture.localize_bytes(fixture.get_blob(entry['stdout'])),
+                'stderr': fixture.localize_bytes(fixture.get_blob(entry['stderr'])),
+                'returncode': entry['returncode']}
+
+    def get_response(self, prompt, system=None, max_tokens=300):
+        fixture = self.fixture
+        key = fixture.llm_key(prompt, system, max_tokens)
+        if self.mode == 'record':
+            start = time.perf_counter()
+            response = self.original_response(prompt, system=system, max_tokens=max_tokens)
+            fixture.append('llm.jsonl', {'key': key, 'response': fixture.generalize(response),
+                                         'seconds': time.perf_counter() - start})
+            return response
+        entry = fixture.next_entry(fixture.llm, key)
+        if entry is None:
+            raise ReplayMiss(f"model request not in the fixture ({len(prompt)} characters); re-record it")
+        time.sleep(entry['seconds'] * self.scale)
+        registry.observe('llm.total', entry['seconds'] * self.scale)
+        return fixture.localize(entry['response'])
+
+def wait_idle(window, pending=False):
+    """Run the event loop until the window's pending refreshes have been applied.
+
+    With `pending`, wait even if nothing is scheduled yet (the first refresh is queued by the event loop).
+    """
+    scheduler = window.refresh_scheduler
+    if not pending and scheduler.worker is None and not scheduler.dirty and not scheduler.timer.isActive():
+        return
+    loop = QEventLoop()
+    scheduler.idle.connect(loop.quit)
+    QTimer.singleShot(IDLE_TIMEOUT_MS, loop.quit)
+    loop.exec()
+    scheduler.idle.disconnect(loop.quit)
+
+@contextlib.contextmanager
+def accept_dialogs():
+    """Accept every modal dialog (message boxes, the commit message and README review) as soon as it opens."""
+    timer = QTimer()
+    timer.setInterval(10)
+    timer.timeout.connect(lambda: QApplication.activeModalWidget() and QApplication.activeModalWidget().accept())
+    timer.start()
+    try:
+        yield
+    finally:
+        timer.stop()
+
+class Session:
+    """State shared by the actions of one run: the repository and, once started, the main window."""
+
+    def __init__(self, repo_path, meta):
+        self.repo_path = repo_path
+        self.meta = meta
+        self.window = None
+
+def start_window(session):
+    session.window = GitWhipperUI([session.repo_path])
+    session.window.show()
+    wait_idle(session.window, pending=True)
+    # Measure generation itself, not whether a speculative run happened to finish first
+    session.window.speculative_message.cancel()
+
+def refresh_window(session):
+    session.window.schedule_refresh()
+    wait_idle(session.window)
+
+def generate_summary(session):
+    generate_staged_commit_summary(session.repo_path)
+
+def generate_readme(session):
+    with accept_dialogs():
+        generate_dynamic_readme(session.repo_path)
+
+def cli_review(session):
+    with contextlib.redirect_stdout(io.StringIO()):
+        cli_main(['--repo', session.repo_path, 'review', session.meta['review_base']])
+
+def cli_merge_preview(session):
+    with contextlib.redirect_stdout(io.StringIO()):
+        cli_main(['--repo', session.repo_path, 'merge-preview', session.meta['merge_branch']])
+
+def window_generate_message(session):
+    session.window.generate_commit_message()
+
+def window_commit(session):
+    with accept_dialogs():
+        session.window.commit_changes()
+        wait_idle(session.window)
+
+# In order; the commit comes last, since replay does not change the repository as the recording did
+ACTIONS = [
+    ('window.startup', start_window),
+    ('window.refresh', refresh_window),
+    ('generate_summary', generate_summary),
+    ('readme', generate_readme),
+    ('cli.review', cli_review),
+    ('cli.merge_preview', cli_merge_preview),
+    ('window.generate_message', window_generate_message),
+    ('window.commit', window_commit),
+]
+
+def run_actions(session):
+    """Run every action and return {name: (seconds, error or None)}."""
+    results = {}
+    for name, run in ACTIONS:
+        start = time.perf_counter()
+        error = None
+        try:
+            with registry.timer(f'replay.{name}'):
+                run(session)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        results[name] = (time.perf_counter() - start, error)
+    window = session.window
+    if window is not None:
+        window.speculative_message.cancel()
+        for worker in list(window.commit_cache_workers.values()) + list(window.speculative_message.stale_workers):
+            worker.wait()
+        window.close()
+    return results
+
+def stage_change(repo_path):
+    """Stage a small, deterministic change: a line appended to a few tracked text files and one new file."""
+    tracked = subprocess.run(['git', 'ls-files', '-z'], cwd=repo_path, capture_output=True,
+                             check=True).stdout.decode().split('\0')
+    text_files = [path for path in tracked if path.endswith(('.py', '.md', '.txt', '.js', '.ts', '.go', '.rs'))]
+    for path in text_files[:3]:
+        with open(os.path.join(repo_path, path), 'a', encoding='utf-8') as f:
+            f.write("\n# replay harness change\n")
+    with open(os.path.join(repo_path, 'REPLAY_NOTES.md'), 'w', encoding='utf-8') as f:
+        f.write("Notes written by the replay harness.\n")
+    subprocess.run(['git', 'add', '-A'], cwd=repo_path, check=True)
+
+def prepare_repo(source, scratch):
+    """Clone `source`, add a branch to preview merging, and stage a change."""
+    repo_path = os.path.join(scratch, REPO_NAME)
+    subprocess.run(['git', 'clone', '-q', source, repo_path], check=True)
+    count = int(subprocess.run(['git', 'rev-list', '--count', 'HEAD'], cwd=repo_path, capture_output=True,
+                               text=True, check=True).stdout)
+    review_base = f'HEAD~{min(3, count - 1)}' if count > 1 else 'HEAD'
+    subprocess.run(['git', 'branch', 'replay-merge', review_base], cwd=repo_path, check=True)
+    stage_change(repo_path)
+    return repo_path, {'review_base': review_base, 'merge_branch': 'replay-merge'}
+
+def record(source, fixture_dir):
+    if os.path.exists(os.path.join(fixture_dir, 'meta.json')):
+        print(f"{fixture_dir} already holds a fixture; remove it first", file=sys.stderr)
+        return 2
+    with tempfile.TemporaryDirectory() as scratch:
+        repo_path, meta = prepare_repo(os.path.abspath(source), scratch)
+        os.makedirs(fixture_dir, exist_ok=True)
+        with tarfile.open(os.path.join(fixture_dir, 'repo.tar.gz'), 'w:gz') as tar:
+            tar.add(repo_path, arcname=REPO_NAME)
+        for name in ('git.jsonl', 'llm.jsonl'):
+            open(os.path.join(fixture_dir, name), 'w').close()
+
+        harness = Harness(Fixture(fixture_dir, repo_path), 'record')
+        harness.install()
+        app = QApplication([])
+        results = run_actions(Session(repo_path, meta))
+        app.processEvents()
+
+    meta.update(version=FIXTURE_VERSION, recorded_at=time.time(),
+                actions={name: seconds for name, (seconds, error) in results.items()})
+    with open(os.path.join(fixture_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2, sort_keys=True)
+    failed = False
+    for name, (seconds, error) in results.items():
+        print(f"{name:<26} {seconds * 1000:>9.1f} ms  {error or ''}")
+        failed = failed or error is not None
+    return 1 if failed else 0
+
+def replay(fixture_dir, scale, budget_overrides):
+    with open(os.path.join(fixture_dir, 'meta.json'), encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('version') != FIXTURE_VERSION:
+        print(f"fixture version {meta.get('version')} is not {FIXTURE_VERSION}; re-record it", file=sys.stderr)
+        return 2
+    with tempfile.TemporaryDirectory() as scratch:
+        with tarfile.open(os.path.join(fixture_dir, 'repo.tar.gz')) as tar:
+            tar.extractall(scratch)
+        repo_path = os.path.join(scratch, REPO_NAME)
+        harness = Harness(Fixture(fixture_dir, repo_path).load(), 'replay', scale)
+        harness.install()
+        app = QApplication([])
+        results = run_actions(Session(repo_path, meta))
+        app.processEvents()
+
+    failed = False
+    print(f"{'action':<26} {'replayed':>12} {'recorded':>12} {'budget':>12}")
+    for name, (seconds, error) in results.items():
+        budget = budget_overrides.get(name, LOCAL_BUDGETS[name] + scale * meta['actions'].get(name, 0.0))
+        status = error or ('OVER BUDGET' if seconds > budget else 'ok')
+        failed = failed or status != 'ok'
+        print(f"{name:<26} {seconds * 1000:>9.1f} ms {meta['actions'].get(name, 0.0) * 1000:>9.1f} ms "
+              f"{budget * 1000:>9.1f} ms  {status}")
+    if harness.unrecorded_git:
+        print(f"{len(harness.unrecorded_git)} git commands were not in the fixture and ran for real:")
+        for command in harness.unrecorded_git:
+            print(f"  {command}")
+    return 1 if failed else 0
+
+def parse_budget(value):
+    name, _, seconds = value.partition('=')
+    if name not in LOCAL_BUDGETS or not seconds:
+        raise argparse.ArgumentTypeError(f"expected ACTION=SECONDS with ACTION one of {', '.join(LOCAL_BUDGETS)}")
+    return name, float(seconds)
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay gitwhisper actions against latency budgets.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    record_parser = subparsers.add_parser('record', help="run every action for real and save a fixture")
+    record_parser.add_argument('repo', help="repository to clone for the recording")
+    record_parser.add_argument('fixture', help="directory to write the fixture to")
+    replay_parser = subparsers.add_parser('replay', help="replay a fixture and check the budgets")
+    replay_parser.add_argument('fixture', help="directory of a recorded fixture")
+    replay_parser.add_argument('--scale', type=float, default=1.0,
+                               help="multiplier for recorded git and model latencies (0 leaves them out)")
+    replay_parser.add_argument('--budget', type=parse_budget, action='append', default=[],
+                               help="override an action's budget, e.g. window.refresh=0.5")
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        return record(args.repo, args.fixture)
+    return replay(args.fixture, args.scale, dict(args.budget))
+
+if __name__ == "__main__":
+    sys.exit(main())
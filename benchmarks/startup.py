@@ -0,0 +1,75 @@
+# gitwhisper/benchmarks/startup.py
+
+"""
+Measure main-window startup under offscreen Qt.
+
+Time-to-first-paint is when the window first paints (placeholder panels);
+time-to-interactive is when every panel has been filled with repository data.
+
+Usage: python -m gitwhisper.benchmarks.startup [REPO_PATH] [--runs N]
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6.QtCore import QEvent, QEventLoop, QObject, QTimer
+from PyQt6.QtWidgets import QApplication
+from gitwhisper.ui.app import GitWhipperUI, apply_stylesheet
+
+class FirstPaintFilter(QObject):
+    """Records the time of the first paint event of the watched widget."""
+
+    def __init__(self):
+        super().__init__()
+        self.painted_at = None
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint and self.painted_at is None:
+            self.painted_at = time.perf_counter()
+        return False
+
+def measure_startup(repo_path, timeout_ms=60000):
+    """Open one window on repo_path and return (first_paint, interactive) in seconds."""
+    os.chdir(repo_path)
+    paint_filter = FirstPaintFilter()
+    start = time.perf_counter()
+    window = GitWhipperUI()
+    window.installEventFilter(paint_filter)
+    window.show()
+
+    loop = QEventLoop()
+    window.refresh_scheduler.idle.connect(loop.quit)
+    QTimer.singleShot(timeout_ms, loop.quit)
+    loop.exec()
+    interactive = time.perf_counter() - start
+
+    first_paint = (paint_filter.painted_at or interactive + start) - start
+    for worker in list(window.commit_cache_workers.values()):
+        worker.wait()
+    window.close()
+    window.deleteLater()
+    return first_paint, interactive
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark gitwhisper startup time.")
+    parser.add_argument('repo', nargs='?', default='.', help="repository to open")
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+    repo_path = os.path.abspath(args.repo)
+
+    app = QApplication([])
+    apply_stylesheet(app)
+    results = [measure_startup(repo_path) for _ in range(args.runs)]
+    app.processEvents()
+
+    for label, values in (("time to first paint", [r[0] for r in results]),
+                          ("time to interactive", [r[1] for r in results])):
+        print(f"{label}: median {statistics.median(values) * 1000:.1f} ms, "
+              f"min {min(values) * 1000:.1f} ms, max {max(values) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
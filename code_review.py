@@ -0,0 +1,124 @@
+# gitwhisper/code_review.py
+
+import os
+import sqlite3
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Optional
+
+import git
+
+from .ai_utils import MODEL, review_file_diff
+from .diff_pruning import prunable_paths
+from .diff_reader import read_diff
+from .git_utils import get_change_metrics, parse_raw_diff
+from .metrics import registry, run_git
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reviews (
+    old_blob TEXT NOT NULL,
+    new_blob TEXT NOT NULL,
+    model TEXT NOT NULL,
+    review TEXT NOT NULL,
+    PRIMARY KEY (old_blob, new_blob, model)
+);
+"""
+
+class ReviewCache:
+    """Reviews keyed by (old blob, new blob), so unchanged files are never reviewed twice."""
+
+    def __init__(self, repo_path: str = '.'):
+        cache_dir = os.path.join(git.Repo(repo_path).common_dir, 'gitwhisper')
+        os.makedirs(cache_dir, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(cache_dir, 'reviews.sqlite'), timeout=30)
+        self.conn.executescript(SCHEMA)
+
+    def get(self, old_blob: str, new_blob: str) -> Optional[str]:
+        row = self.conn.execute('SELECT review FROM reviews WHERE old_blob = ? AND new_blob = ? AND model = ?',
+                                (old_blob, new_blob, MODEL)).fetchone()
+        registry.increment('cache.reviews.hit' if row else 'cache.reviews.miss')
+        return row[0] if row else None
+
+    def put(self, old_blob: str, new_blob: str, review: str):
+        with self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO reviews VALUES (?, ?, ?, ?)', (old_blob, new_blob, MODEL, review))
+
+    def close(self):
+        self.conn.close()
+
+def get_range_changes(repo_path: str, base: str, head: str = 'HEAD') -> List[dict]:
+    """Files changed on `head` since it diverged from `base`, largest churn first.
+
+    Each entry has the raw diff fields (status, path, old_path, old_blob,
+    new_blob) plus added, removed and binary from numstat.
+    """
+    revision = f'{base}...{head}'
+    result = run_git(['git', 'diff', '--raw', '-z', '--no-abbrev', '-M', revision], cwd=repo_path,
+                     stdin=subprocess.DEVNULL, capture_output=True)
+    if result.returncode != 0:
+        raise git.GitCommandError(['git', 'diff', revision], result.returncode, result.stderr)
+    counts = {f['path']: f for f in get_change_metrics(repo_path, revs=[revision]).files}
+    changes = []
+    for entry in parse_raw_diff(result.stdout):
+        stats = counts.get(entry['path'], {'added': 0, 'removed': 0, 'binary': False})
+        entry.update(added=stats['added'], removed=stats['removed'], binary=stats['binary'])
+        changes.append(entry)
+    # Review the files with the most churn first; they are the most likely to have findings
+    changes.sort(key=lambda c: c['added'] + c['removed'], reverse=True)
+    return changes
+
+def review_range(repo_path: str, base: str, head: str = 'HEAD', max_workers: int = 4,
+                 on_result: Optional[Callable[[dict], None]] = None) -> List[dict]:
+    """Review every file changed between `base` and `head` (e.g. a branch against its base).
+
+    Files are reviewed concurrently, at most `max_workers` at a time, in
+    order of churn. `on_result` is called with each result as soon as it is
+    ready. A result has path, status, added, removed, cached and review;
+    reviews are cached per blob pair, so after a small push only the files
+    that actually changed are sent to the model again.
+    """
+    revision = f'{base}...{head}'
+    cache = ReviewCache(repo_path)
+    results = []
+
+    def finish(result):
+        results.append(result)
+        if on_result:
+            on_result(result)
+
+    def review(change):
+        paths = [change['path']] if change['old_path'] == change['path'] else [change['old_path'], change['path']]
+        diff = read_diff(repo_path, ['diff', '-M', revision], paths).text()
+        return review_file_diff(change['path'], diff)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {}
+            changes = get_range_changes(repo_path, base, head)
+            pruned = prunable_paths(repo_path, [change['path'] for change in changes])
+            for change in changes:
+                result = {key: change[key] for key in ('path', 'status', 'added', 'removed')}
+                if change['path'] in pruned:
+                    finish(dict(result, cached=False, review=f"Skipped ({pruned[change['path']]})."))
+                    continue
+                if change['binary'] or change['status'] == 'D' or change['added'] + change['removed'] == 0:
+                    finish(dict(result, cached=False, review='Skipped (binary, deleted or no line changes).'))
+                    continue
+                cached = cache.get(change['old_blob'], change['new_blob'])
+                if cached is not None:
+                    finish(dict(result, cached=True, review=cached))
+                    continue
+                futures[executor.submit(review, change)] = (change, result)
+
+            for future in as_completed(futures):
+                change, result = futures[future]
+                try:
+                    review_text = future.result()
+                except Exception as e:
+                    finish(dict(result, cached=False, review=f"Review failed: {str(e)}"))
+                    continue
+                cache.put(change['old_blob'], change['new_blob'], review_text)
+                finish(dict(result, cached=False, review=review_text))
+    finally:
+        cache.close()
+    return results
@@ -0,0 +1,314 @@
+# gitwhisper/commit_cache.py
+
+import datetime
+import heapq
+import os
+import sqlite3
+import subprocess
+import threading
+from typing import Dict, Iterator, List, Optional
+
+import git
+
+from .metrics import popen_git, registry, run_git
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS commits (
+    sha TEXT PRIMARY KEY,
+    parents TEXT NOT NULL,
+    author_name TEXT,
+    author_email TEXT,
+    authored_date INTEGER,
+    committed_date INTEGER,
+    committed_tz INTEGER,
+    subject TEXT,
+    message TEXT
+);
+CREATE TABLE IF NOT EXISTS file_changes (
+    sha TEXT NOT NULL,
+    path TEXT NOT NULL,
+    old_path TEXT,
+    added INTEGER,
+    removed INTEGER,
+    PRIMARY KEY (sha, path)
+);
+CREATE TABLE IF NOT EXISTS tips (
+    ref TEXT PRIMARY KEY,
+    sha TEXT NOT NULL
+);
+"""
+
+# Fields of one commit header in `git log -z` output, separated by \x1f
+LOG_FORMAT = '%x1e%H%x1f%P%x1f%an%x1f%ae%x1f%at%x1f%ct%x1f%cI%x1f%B'
+
+# One lock per database so a background build and a UI refresh never write concurrently
+_update_locks: Dict[str, threading.Lock] = {}
+_update_locks_guard = threading.Lock()
+
+def _parse_numstat_count(value: bytes) -> Optional[int]:
+    # Binary files report "-" for both counts
+    return None if value == b'-' else int(value)
+
+def _tz_offset(iso_date: str) -> int:
+    offset = datetime.datetime.fromisoformat(iso_date).utcoffset()
+    return int(offset.total_seconds()) if offset else 0
+
+def iter_log_numstat(repo_path: str, revs: List[str], extra_args: Optional[List[str]] = None,
+                     chunk_size: int = 1 << 16) -> Iterator[dict]:
+    """Stream `git log --numstat -z` and yield one dict per commit.
+
+    Each dict has sha, parents, author_name, author_email, authored_date,
+    committed_date, committed_tz, message and files, where files is a list of
+    (path, old_path, added, removed) tuples (counts are None for binary files).
+    Only one commit is held in memory at a time. If git fails, even after
+    some commits were yielded, GitCommandError is raised once the output
+    ends, so callers never mistake a partial walk for a complete one.
+    """
+    command = ['git', 'log', '--numstat', '-z', '-M', f'--format={LOG_FORMAT}'] + (extra_args or []) + revs
+    proc = popen_git(command, cwd=repo_path, stdin=subprocess.DEVNULL,
+                     stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    stderr_chunks = []
+    stderr_reader = threading.Thread(target=lambda: stderr_chunks.append(proc.stderr.read()), daemon=True)
+    stderr_reader.start()
+    current = None
+    pending_rename = None
+    tail = b''
+    try:
+        while True:
+            chunk = proc.stdout.read(chunk_size)
+            if not chunk:
+                break
+            *tokens, tail = (tail + chunk).split(b'\0')
+            for token in tokens:
+                if pending_rename is not None:
+                    # A rename is "added\tremoved\t\0old\0new\0"
+                    pending_rename.append(token.decode('utf-8', 'replace'))
+                    if len(pending_rename) == 4:
+                        added, removed, old_path, new_path = pending_rename
+                        current['files'].append((new_path, old_path, added, removed))
+                        pending_rename = None
+                    continue
+                token = token.lstrip(b'\n')
+                if token.startswith(b'\x1e'):
+                    if current is not None:
+                        yield current
+                    fields = token[1:].decode('utf-8', 'replace').split('\x1f', 7)
+                    sha, parents, name, email, authored, committed, committed_iso, message = fields
+                    current = {
+                        'sha': sha,
+                        'parents': parents.split(),
+                        'author_name': name,
+                        'author_email': email,
+                        'authored_date': int(authored),
+                        'committed_date': int(committed),
+                        'committed_tz': _tz_offset(committed_iso),
+                        'message': message.strip(),
+                        'files': [],
+                    }
+                elif token and current is not None:
+                    added, removed, path = token.split(b'\t', 2)
+                    added, removed = _parse_numstat_count(added), _parse_numstat_count(removed)
+                    if path:
+                        path = path.decode('utf-8', 'replace')
+                        current['files'].append((path, path, added, removed))
+                    else:
+                        pending_rename = [added, removed]
+        # The last commit may be cut short, so only yield it once git has succeeded
+        if proc.wait() != 0:
+            stderr_reader.join()
+            raise git.GitCommandError(command, proc.returncode, b''.join(stderr_chunks))
+        if current is not None:
+            yield current
+    finally:
+        proc.stdout.close()
+        proc.kill()
+        proc.wait()
+        stderr_reader.join()
+        proc.stderr.close()
+
+class CommitCache:
+    """Persistent store of commit metadata and numstat, kept in the repository's git dir.
+
+    The cache is filled by walking only commits that are reachable from the
+    current ref tips but not from the tips recorded by the previous update, so
+    after the first full walk each startup only reads new commits. History is
+    always read by walking parent links from the *current* tips, so commits
+    orphaned by rewritten history (rebases, force pushes) are never shown.
+    """
+
+    def __init__(self, repo_path: str = '.'):
+        self.repo_path = repo_path
+        self.repo = git.Repo(repo_path)
+        cache_dir = os.path.join(self.repo.common_dir, 'gitwhisper')
+        os.makedirs(cache_dir, exist_ok=True)
+        self.db_path = os.path.join(cache_dir, 'commits.sqlite')
+        self.conn = sqlite3.connect(self.db_path, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+        if not self.conn.execute("SELECT 1 FROM pragma_index_list('file_changes') WHERE origin = 'pk'").fetchone():
+            # Caches built before file changes had a key may hold duplicate rows; start them over
+            self.conn.executescript('DROP TABLE file_changes; DELETE FROM commits; DELETE FROM tips;' + SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _lock(self) -> threading.Lock:
+        with _update_locks_guard:
+            return _update_locks.setdefault(self.db_path, threading.Lock())
+
+    def is_populated(self) -> bool:
+        return self.conn.execute('SELECT 1 FROM tips LIMIT 1').fetchone() is not None
+
+    def current_tips(self) -> Dict[str, str]:
+        """Map of ref name to commit sha for HEAD, branches, remote branches and tags."""
+        output = self.repo.git.for_each_ref('--format=%(refname)%00%(objectname)%00%(*objectname)',
+                                            'refs/heads', 'refs/remotes', 'refs/tags')
+        tips = {}
+        for line in output.splitlines():
+            ref, sha, peeled = line.split('\0')
+            tips[ref] = peeled or sha
+        try:
+            tips['HEAD'] = self.repo.head.commit.hexsha
+        except ValueError:
+            pass  # No commits yet
+        return tips
+
+    def _existing(self, shas: List[str]) -> List[str]:
+        """Filter shas down to commits still present in the object database."""
+        if not shas:
+            return []
+        proc = run_git(['git', 'cat-file', '--batch-check'], cwd=self.repo_path,
+                       input='\n'.join(shas) + '\n', capture_output=True, text=True)
+        # Lines are "<sha> <type> <size>" or "<sha> missing"
+        return [fields[0] for fields in map(str.split, proc.stdout.splitlines())
+                if len(fields) == 3 and fields[1] == 'commit']
+
+    def _cached_heads(self) -> List[str]:
+        """Cached commits still in the object database that are no such commit's parent.
+
+        Every cached commit that still exists is an ancestor of one of them.
+        """
+        parents = dict(self.conn.execute('SELECT sha, parents FROM commits'))
+        existing = set(self._existing(sorted(parents)))
+        ancestors = {parent for sha in existing for parent in parents[sha].split()}
+        return sorted(existing - ancestors)
+
+    def has_commit(self, sha: str) -> bool:
+        return self.conn.execute('SELECT 1 FROM commits WHERE sha = ?', (sha,)).fetchone() is not None
+
+    def update(self, blocking: bool = True) -> bool:
+        """Bring the cache up to date with the current ref tips.
+
+        Returns False without doing anything if another update of the same
+        cache is running and `blocking` is False.
+        """
+        lock = self._lock()
+        if not lock.acquire(blocking):
+            return False
+        try:
+            tips = self.current_tips()
+            known = dict(self.conn.execute('SELECT ref, sha FROM tips'))
+            new_tips = sorted({sha for sha in tips.values() if not self.has_commit(sha)})
+            if new_tips:
+                known_tips = sorted(set(known.values()))
+                exclude = self._existing(known_tips)
+                if len(exclude) < len(known_tips):
+                    # Old tips were garbage collected after a history rewrite; stop at what is cached instead
+                    exclude = self._cached_heads()
+                revs = new_tips + (['--not'] + exclude if exclude else [])
+                # One transaction, so an interrupted walk never leaves commits without their ancestors
+                with self.conn:
+                    batch = []
+                    for commit in iter_log_numstat(self.repo_path, revs):
+                        batch.append(commit)
+                        if len(batch) >= 1000:
+                            self._insert(batch)
+                            batch = []
+                    self._insert(batch)
+                    self._store_tips(tips)
+            elif tips != known:
+                with self.conn:
+                    self._store_tips(tips)
+            return True
+        finally:
+            lock.release()
+
+    def _store_tips(self, tips: Dict[str, str]):
+        self.conn.execute('DELETE FROM tips')
+        self.conn.executemany('INSERT INTO tips (ref, sha) VALUES (?, ?)', tips.items())
+
+    def _insert(self, commits: List[dict]):
+        self.conn.executemany(
+            'INSERT OR IGNORE INTO commits VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            [(c['sha'], ' '.join(c['parents']), c['author_name'], c['author_email'], c['authored_date'],
+              c['committed_date'], c['committed_tz'], c['message'].split('\n', 1)[0], c['message'])
+             for c in commits])
+        self.conn.executemany(
+            'INSERT OR IGNORE INTO file_changes VALUES (?, ?, ?, ?, ?)',
+            [(c['sha'], path, old_path, added, removed)
+             for c in commits for path, old_path, added, removed in c['files']])
+
+    def resolve(self, rev: str = 'HEAD') -> str:
+        return self.repo.rev_parse(f'{rev}^{{commit}}').hexsha
+
+    def _row(self, sha: str) -> Optional[dict]:
+        row = self.conn.execute(
+            'SELECT sha, parents, author_name, author_email, authored_date, committed_date, committed_tz, '
+            'subject, message FROM commits WHERE sha = ?', (sha,)).fetchone()
+        if row is None:
+            return None
+        keys = ('sha', 'parents', 'author_name', 'author_email', 'authored_date',
+                'committed_date', 'committed_tz', 'subject', 'message')
+        commit = dict(zip(keys, row))
+        commit['parents'] = commit['parents'].split()
+        return commit
+
+    def history(self, rev: str = 'HEAD', max_count: Optional[int] = None) -> Optional[List[dict]]:
+        """Commits reachable from `rev`, newest first (same order as `git log`).
+
+        Returns None when the cache cannot answer yet (no full walk has
+        finished), so callers can fall back to asking git directly.
+        """
+        try:
+            tip = self.resolve(rev)
+        except (ValueError, git.BadName, git.BadObject):
+            return None  # Unknown revision or empty repository; let git report it
+        if not self.has_commit(tip):
+            if not self.is_populated() or not self.update(blocking=False):
+                return None
+        # Walk parents by commit date, like git's default ordering
+        queue = []
+        seen = {tip}
+        row = self._row(tip)
+        if row:
+            heapq.heappush(queue, (-row['committed_date'], tip, row))
+        commits = []
+        while queue and (max_count is None or len(commits) < max_count):
+            _, _, commit = heapq.heappop(queue)
+            commits.append(commit)
+            for parent in commit['parents']:
+                if parent not in seen:
+                    seen.add(parent)
+                    parent_row = self._row(parent)
+                    if parent_row:  # Missing in shallow clones
+                        heapq.heappush(queue, (-parent_row['committed_date'], parent, parent_row))
+        return commits
+
+    def file_changes(self, sha: str) -> List[tuple]:
+        return self.conn.execute('SELECT path, old_path, added, removed FROM file_changes WHERE sha = ?',
+                                 (sha,)).fetchall()
+
+def committed_datetime(commit: dict) -> datetime.datetime:
+    """Timezone-aware commit date of a cached commit row."""
+    tz = datetime.timezone(datetime.timedelta(seconds=commit['committed_tz']))
+    return datetime.datetime.fromtimestamp(commit['committed_date'], tz)
+
+def cached_history(repo_path: str = '.', rev: str = 'HEAD', max_count: Optional[int] = None) -> Optional[List[dict]]:
+    """Read history through the commit cache, or None if it isn't built yet."""
+    cache = CommitCache(repo_path)
+    try:
+        history = cache.history(rev, max_count)
+    finally:
+        cache.close()
+    registry.increment('cache.commits.hit' if history is not None else 'cache.commits.miss')
+    return history
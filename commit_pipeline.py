@@ -0,0 +1,258 @@
+# gitwhisper/commit_pipeline.py
+
+import asyncio
+import os
+import re
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+import git
+
+from .ai_utils import generate_chunked_commit_message, get_client
+from .commit_summary import (choose_generation_strategy, generate_commit_summary, summarize_change_metrics,
+                             without_pruned_files)
+from .diff_pruning import prune_diff
+from .diff_reader import read_diff
+from .git_utils import get_change_metrics, get_staged_status, git_push
+from .metrics import registry, run_git
+
+STAGES = ('status', 'numstat', 'warm', 'diff', 'prune', 'generate', 'validate', 'commit', 'push')
+
+# Seconds the connection warm-up may take; it never holds up generation
+WARM_UP_TIMEOUT = 3.0
+
+def warm_connection():
+    """Open a pooled connection to the API, so the generation request skips DNS, TCP and TLS setup.
+
+    Any response will do, including an error; failures are ignored.
+    """
+    try:
+        client = get_client().with_options(timeout=WARM_UP_TIMEOUT, max_retries=0)
+        client.get('/v1/models', cast_to=object, options={'params': {'limit': 1}})
+    except Exception:
+        pass
+
+def validate_message(message: Optional[str]) -> Tuple[bool, str]:
+    """Clean up a commit message the way `git commit` does without an editor, and reject empty ones."""
+    lines = [line.rstrip() for line in (message or '').strip().splitlines()]
+    cleaned = re.sub(r'\n{3,}', '\n\n', '\n'.join(lines))
+    if not cleaned:
+        return False, "The commit message is empty."
+    return True, cleaned
+
+def commit_staged(repo_path: str = '.', message: str = '', env: Optional[dict] = None, edit: bool = False) -> str:
+    """Commit the staged changes with `git commit`, so the repository's hooks run; returns the new commit's sha.
+
+    With `edit`, git opens the user's editor on the message first.
+    """
+    if not edit:
+        command = ['git', 'commit', '-q', '-F', '-']
+        result = run_git(command, cwd=repo_path, env=env, input=(message + '\n').encode(),
+                         capture_output=True)
+    else:
+        # The editor needs the terminal, so the message goes through a file and nothing is captured
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', prefix='gitwhisper-', suffix='.txt',
+                                         delete=False) as f:
+            f.write(message + '\n')
+        command = ['git', 'commit', '-q', '-e', '-F', f.name]
+        try:
+            result = run_git(command, cwd=repo_path, env=env)
+        finally:
+            os.unlink(f.name)
+    if result.returncode != 0:
+        raise git.GitCommandError(command, result.returncode, result.stderr or '')
+    return run_git(['git', 'rev-parse', 'HEAD'], cwd=repo_path, env=env, stdin=subprocess.DEVNULL,
+                   capture_output=True, text=True, check=True).stdout.strip()
+
+async def run_in_thread(func, *args, **kwargs):
+    """Await a blocking call made on its own daemon thread.
+
+    Unlike the loop's default executor, nothing waits for the thread when
+    the loop shuts down, so a call whose result is no longer wanted (an
+    unneeded warm-up, or a stage left behind by a failure) never holds up
+    `asyncio.run`.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def deliver(result, error):
+        if not future.done():
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def target():
+        try:
+            result, error = func(*args, **kwargs), None
+        except BaseException as e:
+            result, error = None, e
+        try:
+            loop.call_soon_threadsafe(deliver, result, error)
+        except RuntimeError:
+            # The loop has closed; nobody is waiting for the result
+            pass
+
+    threading.Thread(target=target, name=getattr(func, '__name__', 'stage'), daemon=True).start()
+    return await future
+
+class CommitPipeline:
+    """Write and make a commit of the staged changes as a series of asyncio stages, without any UI.
+
+    `prepare` runs status, numstat, warm, diff, prune and generate and
+    returns the message; `finish` runs validate, commit and, optionally,
+    push. `run` does both, with an optional `review` callback in between
+    (plain or async, returning the edited message or None to cancel) where
+    the GUI shows its dialog. Blocking git and model calls run in worker
+    threads: status, numstat, the staged diff and the API connection
+    warm-up all start at once, and the model request goes out over the
+    warmed connection as soon as the diff is pruned.
+
+    Every stage reports 'start' and then 'done', 'failed' or 'cancelled' to
+    `on_event` as a dict with stage, state, at (seconds since the pipeline
+    started) and, once finished, seconds; durations of completed stages are
+    also observed as `pipeline.<stage>`. All events are kept in `events`,
+    and once prune is done `pruned.report` lists what it saved per file.
+    Pass `message` to skip generation, `warm_up=False` where the client
+    is kept warm anyway, and `env` to use a different index, e.g.
+    GIT_INDEX_FILE from a commit hook.
+    """
+
+    def __init__(self, repo_path: str = '.', message: Optional[str] = None, push: bool = False,
+                 env: Optional[dict] = None, prune_config=None, edit: bool = False, warm_up: bool = True,
+                 on_event: Optional[Callable[[dict], None]] = None):
+        self.repo_path = repo_path
+        self.message = message
+        self.push = push
+        self.env = env
+        self.prune_config = prune_config
+        self.edit = edit
+        self.warm_up = warm_up
+        self.on_event = on_event
+        self.events = []
+        self.entries = None
+        self.fingerprint = None
+        self.metrics = None
+        self.strategy = None
+        self.pruned = None
+        self.commit_sha = None
+        self._started = None
+
+    def emit(self, stage: str, state: str, seconds: Optional[float] = None, error: Optional[str] = None):
+        event = {'stage': stage, 'state': state, 'at': time.perf_counter() - self._started}
+        if seconds is not None:
+            event['seconds'] = seconds
+        if error is not None:
+            event['error'] = error
+        self.events.append(event)
+        if state == 'done':
+            registry.observe(f'pipeline.{stage}', seconds)
+        if self.on_event:
+            self.on_event(event)
+
+    async def stage(self, name: str, func, *args, **kwargs):
+        """Run a blocking call in a worker thread as stage `name`, emitting its events."""
+        if self._started is None:
+            self._started = time.perf_counter()
+        self.emit(name, 'start')
+        start = time.perf_counter()
+        try:
+            result = await run_in_thread(func, *args, **kwargs)
+        except asyncio.CancelledError:
+            self.emit(name, 'cancelled', time.perf_counter() - start)
+            raise
+        except Exception as e:
+            self.emit(name, 'failed', time.perf_counter() - start, str(e))
+            raise
+        self.emit(name, 'done', time.perf_counter() - start)
+        return result
+
+    async def prepare(self) -> Tuple[bool, str]:
+        """Collect the staged changes and write a message for them; returns (True, message) or (False, reason)."""
+        self._started = time.perf_counter()
+        status = asyncio.ensure_future(self.stage('status', get_staged_status, self.repo_path, self.env))
+        numstat = asyncio.ensure_future(self.stage('numstat', get_change_metrics, self.repo_path, env=self.env))
+        tasks = [status, numstat]
+        warm = None
+        if self.message is None:
+            # Started before the status is known: an empty index costs one cheap diff, and the rest gets a head start
+            diff = asyncio.ensure_future(self.stage('diff', read_diff, self.repo_path, ['diff', '--staged'],
+                                                    env=self.env))
+            tasks.append(diff)
+            if self.warm_up:
+                warm = asyncio.ensure_future(self.stage('warm', warm_connection))
+                tasks.append(warm)
+        try:
+            self.entries, self.fingerprint = await status
+            if not self.entries:
+                return False, "No changes staged for commit."
+            self.metrics = await numstat
+            if self.message is None:
+                strategy, pruned = await self.stage('prune', self._prune, await diff)
+                self.strategy = strategy
+                if warm is not None and strategy != 'skip':
+                    # Finishing the connection already being opened beats opening a second one
+                    await warm
+                self.message = await self.stage('generate', self._generate, strategy, pruned)
+            return True, self.message
+        except Exception as e:
+            return False, str(e)
+        finally:
+            # Stages left behind by a failure, or a warm-up that turned out not to be needed, are not waited
+            # for: they run on daemon threads, which finish on their own
+            for task in tasks:
+                task.cancel()
+
+    def _prune(self, diff):
+        with diff:
+            strategy = choose_generation_strategy(without_pruned_files(self.repo_path, self.metrics,
+                                                                       self.prune_config))
+            if strategy == 'skip':
+                return strategy, None
+            self.pruned = prune_diff(self.repo_path, diff, self.prune_config)
+            return strategy, self.pruned
+
+    def _generate(self, strategy, pruned):
+        if strategy == 'skip':
+            return summarize_change_metrics(self.metrics)
+        if strategy == 'single':
+            return generate_commit_summary(pruned.text())
+        return generate_chunked_commit_message([text for _, text in pruned.files])
+
+    async def finish(self, message: Optional[str] = None) -> Tuple[bool, str]:
+        """Validate the message, commit and push if asked; returns (True, commit sha) or (False, reason)."""
+        if self._started is None:
+            self._started = time.perf_counter()
+        ok, cleaned = await self.stage('validate', validate_message, self.message if message is None else message)
+        if not ok:
+            return False, cleaned
+        self.message = cleaned
+        try:
+            self.commit_sha = await self.stage('commit', commit_staged, self.repo_path, cleaned, self.env, self.edit)
+        except git.GitCommandError as e:
+            return False, f"Failed to commit changes: {str(e)}"
+        if self.push:
+            pushed, output = await self.stage('push', git_push, self.repo_path)
+            if not pushed:
+                return False, f"Committed {self.commit_sha[:8]}, but the push failed: {output}"
+        return True, self.commit_sha
+
+    async def run(self, review=None) -> Tuple[bool, str]:
+        """Run every stage; `review(message)` may edit the message in between, or return None to cancel."""
+        ok, message = await self.prepare()
+        if not ok:
+            return ok, message
+        if review is not None:
+            message = review(message)
+            if asyncio.iscoroutine(message):
+                message = await message
+            if message is None:
+                return False, "Commit cancelled."
+        return await self.finish(message)
+
+def run_commit_pipeline(repo_path: str = '.', **kwargs) -> Tuple[bool, str]:
+    """Run a CommitPipeline to completion from synchronous code."""
+    return asyncio.run(CommitPipeline(repo_path, **kwargs).run())
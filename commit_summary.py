@@ -1,6 +1,12 @@
 # gitwhisper/commit_summary.py
 
-from .ai_utils import generate_commit_message
+from .ai_utils import generate_commit_message, generate_chunked_commit_message
+from .diff_pruning import prunable_paths, prune_diff
+from .diff_reader import read_diff
+from .git_utils import ChangeMetrics, get_change_metrics
+
+# Changes up to this many added + removed lines go to the model in one prompt
+SINGLE_SHOT_MAX_LINES = 1500
 
 def generate_commit_summary(diff):
     """
@@ -15,11 +21,77 @@ def generate_commit_summary(diff):
     """
     return generate_commit_message(diff)
 
-# You can add more commit-related utility functions here if needed in the future.
-# For example:
-# def parse_commit_summary(summary):
-#     """Parse a commit summary into its components."""
-#     lines = summary.split('\n', 1)
-#     brief_summary = lines[0]
-#     detailed_description = lines[1] if len(lines) > 1 else ""
-#     return brief_summary, detailed_description
\ No newline at end of file
+def choose_generation_strategy(metrics):
+    """
+    Decide how to generate a message for a change from its numstat metrics.
+
+    Returns 'skip' when there are no textual line changes (binary files, pure
+    renames, mode changes), 'single' when the diff fits in one prompt and
+    'chunked' otherwise.
+    """
+    if metrics.total_changed == 0:
+        return 'skip'
+    if metrics.total_changed <= SINGLE_SHOT_MAX_LINES:
+        return 'single'
+    return 'chunked'
+
+def summarize_change_metrics(metrics):
+    """
+    Describe a change without the LLM, for changes with no textual line changes
+    outside the files the pruning stage stubs out (lockfiles, generated code).
+    """
+    renamed = metrics.renamed_files
+    binary = metrics.binary_files
+    # Everything else: files with pruned line changes, empty new files, mode changes
+    updated = [f['path'] for f in metrics.files if not f['binary'] and f['old_path'] == f['path']]
+    if metrics.file_count == 1:
+        if renamed:
+            return f"Rename {renamed[0][0]} to {renamed[0][1]}"
+        return f"Update {metrics.files[0]['path']}"
+    if metrics.file_count == 2:
+        subject = f"Update {metrics.files[0]['path']} and {metrics.files[1]['path']}"
+        if len(updated) == 2:
+            # The subject already says it all
+            return subject
+    else:
+        subject = f"Update {metrics.file_count} files"
+    details = []
+    if renamed:
+        details.append('Renamed: ' + ', '.join(f"{old} -> {new}" for old, new in renamed))
+    if binary:
+        details.append('Binary files: ' + ', '.join(binary))
+    if updated:
+        details.append('Updated: ' + ', '.join(updated))
+    return subject + '\n\n' + '\n'.join(details)
+
+def without_pruned_files(repo_path, metrics, prune_config=None):
+    """
+    Drop files that the pruning stage will stub out anyway (lockfiles, generated code),
+    so they don't push a change onto the chunked path.
+    """
+    pruned = prunable_paths(repo_path, [f['path'] for f in metrics.files], prune_config)
+    return ChangeMetrics([f for f in metrics.files if f['path'] not in pruned])
+
+def prepare_staged_diff(repo_path='.', prune_config=None, env=None):
+    """
+    Read the staged diff and run it through the pruning stage.
+    The returned PrunedDiff's report lists the bytes and tokens saved per file.
+    """
+    return prune_diff(repo_path, read_diff(repo_path, ['diff', '--staged'], env=env), prune_config)
+
+def generate_staged_commit_summary(repo_path='.', metrics=None, prune_config=None, env=None):
+    """
+    Generate a commit summary for the staged changes, using numstat metrics to pick
+    the cheapest adequate path: no LLM call, a single prompt, or chunked summarization.
+    The diff is pruned of generated and whitespace-only noise before it is sent.
+    Pass `env` to read a different index, e.g. GIT_INDEX_FILE from a commit hook.
+    """
+    if metrics is None:
+        metrics = get_change_metrics(repo_path, env=env)
+    strategy = choose_generation_strategy(without_pruned_files(repo_path, metrics, prune_config))
+    if strategy == 'skip':
+        return summarize_change_metrics(metrics)
+    diff = prepare_staged_diff(repo_path, prune_config, env)
+    if strategy == 'single':
+        return generate_commit_summary(diff.text())
+    return generate_chunked_commit_message([text for _, text in diff.files])
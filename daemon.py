@@ -0,0 +1,174 @@
+# gitwhisper/daemon.py
+
+import asyncio
+import json
+import os
+import socket
+import socketserver
+import stat
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Optional
+
+from .ai_utils import get_client
+from .commit_pipeline import CommitPipeline
+from .git_utils import get_staged_fingerprint, is_git_repo
+from . import hook_client
+from .metrics import registry, run_git
+
+# Messages kept for staged states that were already seen (e.g. a commit retried after a failed hook)
+MESSAGE_CACHE_SIZE = 256
+# Messages generated concurrently across all repositories
+GENERATION_WORKERS = 4
+
+HOOK_MARKER = '# Installed by gitwhisper'
+
+class MessageService:
+    """Generates commit messages for hook clients, keeping everything warm between requests.
+
+    Generations are keyed by the staged fingerprint (HEAD plus the exact
+    staged blobs), so concurrent requests for the same staged state share
+    one LLM call and repeated ones are answered from memory. A generation
+    that misses a client's budget keeps running, so the next attempt at
+    the same commit is instant.
+    """
+
+    def __init__(self, max_workers: int = GENERATION_WORKERS, cache_size: int = MESSAGE_CACHE_SIZE):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='generate')
+        self.cache_size = cache_size
+        self.messages = OrderedDict()
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'cache_hits': 0, 'shared': 0, 'generated': 0,
+                      'timeouts': 0, 'errors': 0, 'wait_ms': 0.0}
+
+    def warm_up(self):
+        """Create the API client so its connection pool outlives individual requests."""
+        try:
+            get_client()
+        except KeyError:
+            print("ANTHROPIC_API_KEY is not set; requests will fail until it is")
+
+    def _generate(self, key, repo_path, env):
+        ok, message = asyncio.run(CommitPipeline(repo_path, env=env, warm_up=False).prepare())
+        if not ok:
+            print(f"Error generating message for {repo_path}: {message}")
+            message = ''
+        with self.lock:
+            self.pending.pop(key, None)
+            if message:
+                self.messages[key] = message
+                self.messages.move_to_end(key)
+                while len(self.messages) > self.cache_size:
+                    self.messages.popitem(last=False)
+            self.stats['generated' if message else 'errors'] += 1
+        return message
+
+    def message(self, repo_path: str, index_file: Optional[str] = None,
+                budget_ms: int = hook_client.DEFAULT_BUDGET_MS) -> dict:
+        start = time.monotonic()
+        env = dict(os.environ, GIT_INDEX_FILE=index_file) if index_file else None
+        key = (os.path.realpath(repo_path), get_staged_fingerprint(repo_path, env))
+        with self.lock:
+            self.stats['requests'] += 1
+            if key in self.messages:
+                self.messages.move_to_end(key)
+                self.stats['cache_hits'] += 1
+                registry.increment('cache.hook_messages.hit')
+                return {'message': self.messages[key], 'source': 'cache'}
+            registry.increment('cache.hook_messages.miss')
+            future = self.pending.get(key)
+            if future is None:
+                future = self.pending[key] = self.executor.submit(self._generate, key, repo_path, env)
+            else:
+                self.stats['shared'] += 1
+        remaining = budget_ms / 1000 - (time.monotonic() - start)
+        try:
+            message = future.result(timeout=max(remaining, 0))
+        except FutureTimeoutError:
+            with self.lock:
+                self.stats['timeouts'] += 1
+            return {'message': '', 'source': 'timeout'}
+        with self.lock:
+            self.stats['wait_ms'] += (time.monotonic() - start) * 1000
+        return {'message': message, 'source': 'generated'}
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            op = request.get('op')
+            if op == 'message':
+                if not is_git_repo(request['repo']):
+                    response = {'message': '', 'error': 'not a git repository'}
+                else:
+                    response = self.server.service.message(request['repo'], request.get('index_file'),
+                                                           request.get('budget_ms', hook_client.DEFAULT_BUDGET_MS))
+            elif op == 'stats':
+                with self.server.service.lock:
+                    response = dict(self.server.service.stats)
+            elif op == 'ping':
+                response = {'ok': True}
+            else:
+                response = {'error': f"unknown op {op!r}"}
+        except Exception as e:
+            response = {'message': '', 'error': str(e)}
+        try:
+            self.wfile.write(json.dumps(response).encode() + b'\n')
+        except OSError:
+            pass  # The hook gave up waiting
+
+class DaemonServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, service: MessageService):
+        self.service = service
+        super().__init__(socket_path, _RequestHandler)
+
+def _remove_stale_socket(socket_path: str):
+    if not os.path.exists(socket_path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(socket_path)
+        except OSError:
+            os.unlink(socket_path)
+            return
+    raise RuntimeError(f"A gitwhisper daemon is already listening on {socket_path}")
+
+def serve(socket_path: Optional[str] = None):
+    """Run the daemon in the foreground until interrupted."""
+    socket_path = socket_path or hook_client.default_socket_path()
+    _remove_stale_socket(socket_path)
+    service = MessageService()
+    service.warm_up()
+    server = DaemonServer(socket_path, service)
+    os.chmod(socket_path, stat.S_IRUSR | stat.S_IWUSR)
+    print(f"gitwhisper daemon listening on {socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(socket_path)
+
+def install_hook(repo_path: str = '.', force: bool = False):
+    """Install the prepare-commit-msg hook; worktrees of the repository share it."""
+    hooks_dir = run_git(['git', 'rev-parse', '--path-format=absolute', '--git-path', 'hooks'],
+                        cwd=repo_path, capture_output=True, text=True, check=True).stdout.strip()
+    os.makedirs(hooks_dir, exist_ok=True)
+    hook_path = os.path.join(hooks_dir, 'prepare-commit-msg')
+    if os.path.exists(hook_path) and not force:
+        with open(hook_path, encoding='utf-8') as f:
+            if HOOK_MARKER not in f.read():
+                return False, f"{hook_path} already exists; use --force to replace it"
+    with open(hook_client.__file__, encoding='utf-8') as f:
+        source = f.read()
+    with open(hook_path, 'w', encoding='utf-8') as f:
+        f.write(f"#!{sys.executable}\n{HOOK_MARKER}\n{source}")
+    os.chmod(hook_path, 0o755)
+    return True, f"Installed {hook_path}"
@@ -0,0 +1,196 @@
+# gitwhisper/diff_pruning.py
+
+import fnmatch
+import os
+import re
+from typing import Dict, List, Optional
+
+from .diff_reader import DiffResult, FileDiff
+from .metrics import registry, run_git
+
+# Files whose diffs are almost always noise to a reader of the change
+DEFAULT_PRUNE_GLOBS = [
+    'package-lock.json', 'npm-shrinkwrap.json', 'yarn.lock', 'pnpm-lock.yaml', 'poetry.lock', 'Pipfile.lock',
+    'Cargo.lock', 'Gemfile.lock', 'composer.lock', 'go.sum', 'uv.lock',
+    '*.min.js', '*.min.css', '*.map',
+    '*_pb2.py', '*_pb2_grpc.py', '*.pb.go', '*.pb.h', '*.pb.cc',
+    '*.snap', '*/__snapshots__/*', '__snapshots__/*',
+    'dist/*', 'build/*',
+]
+
+# Only looked for in a file's first lines, where generators put their header
+GENERATED_MARKER = re.compile(r'@generated\b|^\W*Code generated .* DO NOT EDIT')
+GENERATED_MARKER_LINES = 10
+HUNK_NEW_START = re.compile(r'^@@ -\d+(?:,\d+)? \+(\d+)')
+
+# Added lines longer than this on average mean minified or otherwise machine-written content
+MINIFIED_AVERAGE_LINE_LENGTH = 300
+
+# Rough characters-per-token ratio used to report token savings
+CHARS_PER_TOKEN = 4
+
+class PruneConfig:
+    """Which pruning rules to apply. Extra globs can also be given in GITWHISPER_PRUNE_GLOBS (comma separated)."""
+
+    def __init__(self, globs: Optional[List[str]] = None, use_gitattributes: bool = True,
+                 detect_generated: bool = True, collapse_renames: bool = True, drop_whitespace_only: bool = True):
+        extra = [g.strip() for g in os.environ.get('GITWHISPER_PRUNE_GLOBS', '').split(',') if g.strip()]
+        self.globs = (DEFAULT_PRUNE_GLOBS if globs is None else globs) + extra
+        self.use_gitattributes = use_gitattributes
+        self.detect_generated = detect_generated
+        self.collapse_renames = collapse_renames
+        self.drop_whitespace_only = drop_whitespace_only
+
+class PrunedDiff:
+    """Result of pruning: per-file prompt text plus a report of what was removed and why."""
+
+    def __init__(self):
+        self.files: List[tuple] = []
+        self.report: List[dict] = []
+
+    def text(self) -> str:
+        return '\n'.join(text for _, text in self.files)
+
+    @property
+    def bytes_saved(self) -> int:
+        return sum(entry['bytes_saved'] for entry in self.report)
+
+    @property
+    def tokens_saved(self) -> int:
+        return sum(entry['tokens_saved'] for entry in self.report)
+
+    def format_report(self) -> str:
+        lines = [f"{entry['path']}: {entry['reason']}, {entry['bytes_saved']} bytes / ~{entry['tokens_saved']} tokens saved"
+                 for entry in self.report if entry['bytes_saved'] > 0]
+        lines.append(f"Total: {self.bytes_saved} bytes / ~{self.tokens_saved} tokens saved")
+        return '\n'.join(lines)
+
+def matches_glob(path: str, globs: List[str]) -> Optional[str]:
+    """Return the first glob matching the path (or, for globs without a slash, its file name)."""
+    name = path.rsplit('/', 1)[-1]
+    for pattern in globs:
+        if fnmatch.fnmatchcase(path, pattern) or ('/' not in pattern and fnmatch.fnmatchcase(name, pattern)):
+            return pattern
+    return None
+
+def linguist_generated_paths(repo_path: str, paths: List[str]) -> set:
+    """Paths marked `linguist-generated` in .gitattributes."""
+    if not paths:
+        return set()
+    result = run_git(['git', 'check-attr', '-z', '--stdin', 'linguist-generated'], cwd=repo_path,
+                     input=b'\0'.join(p.encode() for p in paths) + b'\0', capture_output=True)
+    fields = result.stdout.split(b'\0')
+    # Output is "path\0attribute\0value\0" per path
+    return {fields[i].decode('utf-8', 'replace') for i in range(0, len(fields) - 2, 3)
+            if fields[i + 2] in (b'set', b'true')}
+
+def prunable_paths(repo_path: str, paths: List[str], config: Optional[PruneConfig] = None) -> Dict[str, str]:
+    """Map each path that is dropped by path rules alone (globs, .gitattributes) to the reason."""
+    config = config or PruneConfig()
+    reasons = {}
+    for path in paths:
+        pattern = matches_glob(path, config.globs)
+        if pattern:
+            reasons[path] = f"matches {pattern}"
+    if config.use_gitattributes:
+        for path in linguist_generated_paths(repo_path, [p for p in paths if p not in reasons]):
+            reasons[path] = "linguist-generated"
+    return reasons
+
+def _hunks(file_diff: FileDiff):
+    """Split a file's lines into its header and a list of hunks (each a list of lines)."""
+    header, hunks = [], []
+    for line in file_diff.lines:
+        if line.startswith('@@'):
+            hunks.append([line])
+        elif hunks:
+            hunks[-1].append(line)
+        else:
+            header.append(line)
+    return header, hunks
+
+def _without_inner_whitespace(line: str) -> str:
+    # Indentation is kept: in Python or YAML re-indenting changes meaning
+    content = line.lstrip()
+    return line[:len(line) - len(content)] + ' '.join(content.split())
+
+def _is_whitespace_only(hunk: List[str]) -> bool:
+    """Whether a hunk only changes whitespace inside lines, or adds and removes blank lines."""
+    changed = [line for line in hunk[1:] if line[:1] in ('-', '+')]
+    removed = [_without_inner_whitespace(line[1:]) for line in changed if line[0] == '-' and line[1:].strip()]
+    added = [_without_inner_whitespace(line[1:]) for line in changed if line[0] == '+' and line[1:].strip()]
+    return bool(changed) and removed == added
+
+def _header_lines(file_diff: FileDiff) -> List[str]:
+    """The file's first lines as far as the diff shows them, from a hunk starting at line 1."""
+    _, hunks = _hunks(file_diff)
+    for hunk in hunks:
+        match = HUNK_NEW_START.match(hunk[0])
+        if match and int(match.group(1)) <= 1:
+            return [line[1:] for line in hunk[1:] if line[:1] in (' ', '+')][:GENERATED_MARKER_LINES]
+    return []
+
+def _looks_generated(file_diff: FileDiff) -> Optional[str]:
+    added = [line[1:] for line in file_diff.lines if line.startswith('+') and not line.startswith('+++')]
+    if not added:
+        return None
+    if any(GENERATED_MARKER.search(line) for line in _header_lines(file_diff)):
+        return "generated-file marker"
+    if any(line.endswith(' [line truncated]') for line in added):
+        return "minified (over-long lines)"
+    if sum(map(len, added)) / len(added) > MINIFIED_AVERAGE_LINE_LENGTH:
+        return "minified (long average line length)"
+    return None
+
+def prune_diff(repo_path: str, diff: DiffResult, config: Optional[PruneConfig] = None) -> PrunedDiff:
+    """Shrink a diff before it goes into a prompt.
+
+    Files matching the prune globs or marked `linguist-generated`, and files
+    whose content looks generated or minified, are reduced to a one-line stub.
+    Pure renames collapse to a single line and whitespace-only hunks are
+    dropped. The report lists bytes and estimated tokens saved per file.
+    """
+    config = config or PruneConfig()
+    by_path = prunable_paths(repo_path, [f.path for f in diff.files], config)
+    pruned = PrunedDiff()
+    for file_diff in diff.files:
+        original = file_diff.text()
+        reason = by_path.get(file_diff.path)
+        if reason is None and config.detect_generated and not file_diff.binary:
+            reason = _looks_generated(file_diff)
+
+        if reason is not None:
+            text = f"[pruned {file_diff.path}: {reason}, {file_diff.total_lines} diff lines]"
+        elif file_diff.binary or file_diff.omitted:
+            text, reason = original, "kept"
+        else:
+            header, hunks = _hunks(file_diff)
+            renamed = file_diff.old_path != file_diff.path
+            reasons = []
+            if config.drop_whitespace_only:
+                kept = [hunk for hunk in hunks if not _is_whitespace_only(hunk)]
+                if len(kept) < len(hunks):
+                    reasons.append(f"{len(hunks) - len(kept)} whitespace-only hunks dropped")
+                hunks = kept
+            if config.collapse_renames and renamed:
+                header = [f"renamed {file_diff.old_path} -> {file_diff.path}"]
+                reasons.append("rename collapsed")
+            if not hunks and renamed and config.collapse_renames:
+                text = header[0]
+            elif not hunks and reasons:
+                text = f"[{file_diff.path}: whitespace-only changes]"
+            else:
+                text = '\n'.join(header + [line for hunk in hunks for line in hunk])
+                if file_diff.truncated:
+                    text += f"\n[diff truncated: {file_diff.total_lines} lines in total]"
+            reason = ', '.join(reasons) or "kept"
+
+        saved = max(len(original.encode()) - len(text.encode()), 0)
+        pruned.files.append((file_diff.path, text))
+        pruned.report.append({'path': file_diff.path, 'reason': reason, 'bytes_saved': saved,
+                              'tokens_saved': saved // CHARS_PER_TOKEN})
+    if diff.preamble:
+        pruned.files.insert(0, ('', '\n'.join(diff.preamble)))
+    registry.increment('prune.bytes_saved', pruned.bytes_saved)
+    registry.increment('prune.tokens_saved', pruned.tokens_saved)
+    return pruned
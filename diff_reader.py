@@ -0,0 +1,321 @@
+# gitwhisper/diff_reader.py
+
+import codecs
+import os
+import re
+from typing import Iterator, List, Optional, Tuple
+
+import git
+
+from .diff_store import DiffStore, run_to_store
+from .metrics import registry
+
+# Limits applied while streaming a diff. Content beyond them is replaced with a stub.
+MAX_FILE_LINES = 2000
+MAX_FILE_BYTES = 256 * 1024
+MAX_TOTAL_BYTES = 2 * 1024 * 1024
+# Longest single line kept; minified files can have lines hundreds of MB long
+MAX_LINE_BYTES = 4096
+
+DIFF_OPTIONS = ['--no-color', '--no-ext-diff', '--src-prefix=a/', '--dst-prefix=b/']
+
+_QUOTED_PATH = re.compile(r'"((?:[^"\\]|\\.)*)"')
+
+def unquote_path(path: str) -> str:
+    """Undo git's C-style quoting of a path, e.g. "\\303\\251.txt" -> "é.txt"."""
+    if not (path.startswith('"') and path.endswith('"')):
+        return path
+    raw = codecs.escape_decode(path[1:-1].encode('latin-1', 'backslashreplace'))[0]
+    return raw.decode('utf-8', 'replace')
+
+def _strip_prefix(path: str) -> str:
+    path = unquote_path(path)
+    return path[2:] if path[:2] in ('a/', 'b/') else path
+
+def parse_diff_header_path(line: str) -> str:
+    """Extract the (new) path from a "diff --git a/X b/Y" line."""
+    rest = line[len('diff --git '):]
+    if rest.endswith('"'):
+        return _strip_prefix(f'"{_QUOTED_PATH.findall(rest)[-1]}"')
+    # Unquoted and unrenamed: "a/P b/P", so the path is half of what remains
+    half = (len(rest) - 1) // 2
+    if rest[half:half + 3] == ' b/' and rest[2:half] == rest[half + 3:]:
+        return rest[half + 3:]
+    # Ambiguous (renames with spaces); the "+++" or "rename to" line refines it
+    return rest.rsplit(' b/', 1)[-1] if ' b/' in rest else rest
+
+class FileDiff:
+    """One file's section of a diff, with content capped by the reader's limits."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.old_path = path
+        self.lines: List[str] = []
+        self.total_lines = 0
+        self.total_bytes = 0
+        self.binary = False
+        self.truncated = False
+        self.omitted = False
+        self.in_header = True
+        # Byte range of the section in the stored output
+        self.start = 0
+        self.end = 0
+
+    def text(self) -> str:
+        """The stored diff text, with a stub describing anything that was left out."""
+        if self.binary:
+            return '\n'.join(self.header_lines() + [f"[binary file changed: {self.path}]"])
+        if self.omitted:
+            return (f"[diff omitted for {self.path}: {self.total_lines} lines, "
+                    f"{self.total_bytes} bytes, total size limit reached]")
+        text = '\n'.join(self.lines)
+        if self.truncated:
+            hidden = self.total_lines - len(self.lines)
+            text += f"\n[diff truncated: {hidden} more lines, {self.total_bytes} bytes in total]"
+        return text
+
+    def header_lines(self) -> List[str]:
+        header = []
+        for line in self.lines:
+            if line.startswith('@@'):
+                break
+            header.append(line)
+        return header
+
+class DiffResult:
+    """A capped diff split into files, plus any preamble (e.g. the commit header of `git show`).
+
+    The complete output stays available in `store` (spilled to disk when
+    large), so `load_full` can return any file's whole diff without running
+    git again.
+    """
+
+    def __init__(self, repo_path: str, args: List[str], store: Optional[DiffStore] = None):
+        self.repo_path = repo_path
+        self.args = args
+        self.store = store
+        self.preamble: List[str] = []
+        self.files: List[FileDiff] = []
+
+    def text(self) -> str:
+        parts = ['\n'.join(self.preamble)] if self.preamble else []
+        parts.extend(file_diff.text() for file_diff in self.files)
+        return '\n'.join(parts)
+
+    @property
+    def truncated(self) -> bool:
+        return any(f.truncated or f.omitted for f in self.files)
+
+    def load_full(self, path: str) -> str:
+        """Fetch the complete, uncapped diff for one file. Only call this on explicit request."""
+        if self.store is not None and self.store.data:
+            for file_diff in self.files:
+                if path in (file_diff.path, file_diff.old_path):
+                    end = file_diff.end
+                    # Like git.execute, leave out the final newline
+                    if end > file_diff.start and self.store.data[end - 1:end] == b'\n':
+                        end -= 1
+                    return self.store.text(file_diff.start, end)
+        repo = git.Repo(self.repo_path)
+        return repo.git.execute(['git'] + self.args[:1] + DIFF_OPTIONS + self.args[1:] + ['--', path])
+
+    def close(self):
+        """Release the complete output; `load_full` then runs git again."""
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _read_section(store: DiffStore, start: int, end: int, total_lines: int, omitted: bool,
+                  max_file_lines: int, max_file_bytes: int) -> Tuple[FileDiff, int]:
+    """Parse one file's section of a stored diff, reading only the lines that are kept.
+
+    Returns the FileDiff and the number of bytes it keeps.
+    """
+    current = None
+    kept_bytes = 0
+    capped = False
+    for line_start, line_end in store.iter_lines(start, end):
+        # Over-long lines are cut, as if read with readline(MAX_LINE_BYTES)
+        cut = line_end - line_start >= MAX_LINE_BYTES
+        line = store.text(line_start, min(line_end, line_start + MAX_LINE_BYTES))
+        raw_bytes = min(min(line_end + 1, end) - line_start, MAX_LINE_BYTES)
+        if current is None:
+            if line.startswith('diff --git '):
+                path = parse_diff_header_path(line)
+            else:
+                path = unquote_path(line.split(' ', 2)[2])
+            current = FileDiff(path)
+            current.start, current.end = start, end
+            current.total_lines = total_lines
+            current.total_bytes = end - start
+            current.omitted = omitted
+        elif current.in_header:
+            if line.startswith('@@'):
+                current.in_header = False
+            elif line.startswith('+++ ') and line != '+++ /dev/null':
+                current.path = _strip_prefix(line[4:].rstrip('\t'))
+            elif line.startswith('rename from ') or line.startswith('copy from '):
+                current.old_path = unquote_path(line.split(' from ', 1)[1])
+            elif line.startswith('rename to ') or line.startswith('copy to '):
+                current.path = unquote_path(line.split(' to ', 1)[1])
+            elif line.startswith('Binary files ') or line == 'GIT binary patch':
+                current.binary = True
+        elif store.find(b'\0', line_start, line_end) != -1:
+            current.binary = True
+
+        if current.binary or current.omitted or capped:
+            # Totals come from the index, so once nothing more is kept only the header matters
+            if current.in_header:
+                continue
+            break
+        if cut:
+            line += ' [line truncated]'
+            current.truncated = True
+        if len(current.lines) >= max_file_lines or line_start - start + raw_bytes > max_file_bytes:
+            current.truncated = capped = True
+            continue
+        current.lines.append(line)
+        kept_bytes += raw_bytes
+    return current, kept_bytes
+
+def read_diff(repo_path: str, args: List[str], paths: Optional[List[str]] = None,
+              max_file_lines: int = MAX_FILE_LINES, max_file_bytes: int = MAX_FILE_BYTES,
+              max_total_bytes: int = MAX_TOTAL_BYTES, env: Optional[dict] = None) -> DiffResult:
+    """Run `git <args>` (a diff or show command) and split it into capped per-file sections.
+
+    The output is streamed into a DiffStore, which spills to a memory-mapped
+    file when large, and each file is parsed from slices of it, so memory
+    stays bounded by the caps no matter how large the diff is: binary files
+    become stubs, each file keeps at most `max_file_lines` lines /
+    `max_file_bytes` bytes, and once `max_total_bytes` have been kept the
+    remaining files only record their headers and sizes.
+    `env` replaces the environment of the git process (e.g. to set GIT_INDEX_FILE).
+    """
+    command = ['git'] + args[:1] + DIFF_OPTIONS + args[1:]
+    if paths:
+        command += ['--'] + list(paths)
+    store = run_to_store(command, repo_path, env)
+    result = DiffResult(repo_path, args, store)
+    sections = store.sections()
+    preamble_end = sections[0][0] if sections else store.size
+    result.preamble = [store.text(start, min(end, start + MAX_LINE_BYTES))
+                       for start, end in store.iter_lines(0, preamble_end)]
+    kept_bytes = 0
+    for start, end, total_lines in sections:
+        file_diff, kept = _read_section(store, start, end, total_lines, kept_bytes >= max_total_bytes,
+                                        max_file_lines, max_file_bytes)
+        result.files.append(file_diff)
+        kept_bytes += kept
+    return result
+
+class StagedDiffIndex:
+    """Every staged per-file diff from one `git diff --staged` call, indexed by byte range.
+
+    The index is rebuilt only when the git index file or HEAD changes, so
+    looking up the diff of another staged file costs no subprocess. A large
+    staged diff is kept in a memory-mapped file rather than in memory.
+    """
+
+    def __init__(self, repo_path: str = '.'):
+        self.repo_path = repo_path
+        self.repo = git.Repo(repo_path)
+        self._stamp = None
+        self._store = DiffStore().finish()
+        self._ranges = {}
+
+    def _current_stamp(self):
+        try:
+            st = os.stat(self.repo.index.path)
+            index_stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except FileNotFoundError:
+            index_stamp = None
+        try:
+            head = self.repo.head.commit.hexsha
+        except ValueError:
+            head = None
+        return index_stamp, head
+
+    def refresh(self):
+        """Rebuild the index if the staged state changed since the last build."""
+        stamp = self._current_stamp()
+        if stamp == self._stamp:
+            registry.increment('cache.staged_diff.hit')
+            return
+        registry.increment('cache.staged_diff.miss')
+        command = ['git', 'diff', '--staged', '-z', '--raw', '-p', '--no-abbrev'] + DIFF_OPTIONS
+        # The previous store is not closed here; a reader in another thread may still hold it
+        self._store = run_to_store(command, self.repo_path)
+        self._ranges = self._split(self._store.data)
+        self._stamp = stamp
+
+    @staticmethod
+    def _split(data) -> dict:
+        # The --raw section lists NUL-separated entries (":modes shas status\0path\0[path\0]")
+        # and ends with an empty entry; the patches that follow are in the same order.
+        paths = []
+        old_paths = []
+        pos = 0
+        while data[pos:pos + 1] == b':':
+            end = data.find(b'\0', pos)
+            status = data[pos:end].rsplit(b' ', 1)[-1]
+            pos = end + 1
+            names = []
+            for _ in range(2 if status[:1] in (b'R', b'C') else 1):
+                end = data.find(b'\0', pos)
+                names.append(data[pos:end].decode('utf-8', 'replace'))
+                pos = end + 1
+            paths.append(names[-1])
+            old_paths.append(names[0])
+        if data[pos:pos + 1] == b'\0':
+            pos += 1
+
+        starts = []
+        while pos != -1 and pos < len(data):
+            starts.append(pos)
+            next_start = data.find(b'\ndiff --git ', pos)
+            pos = next_start + 1 if next_start != -1 else -1
+        bounds = list(zip(starts, starts[1:] + [len(data)]))
+        if len(bounds) != len(paths):
+            # Unusual output (e.g. unmerged entries); fall back to the patch headers
+            paths = [parse_diff_header_path(bytes(data[start:data.find(b'\n', start)]).decode('utf-8', 'replace'))
+                     for start, _ in bounds]
+            old_paths = paths
+        ranges = dict(zip(paths, bounds))
+        # Renamed files can also be looked up by their old name
+        for old_path, bound in zip(old_paths, bounds):
+            ranges.setdefault(old_path, bound)
+        return ranges
+
+    @property
+    def size(self) -> int:
+        """Bytes of diff text currently held in memory."""
+        return self._store.resident_bytes
+
+    def paths(self) -> List[str]:
+        self.refresh()
+        seen = set()
+        # Drop the old-name aliases of renamed files
+        return [path for path, bound in self._ranges.items() if not (bound in seen or seen.add(bound))]
+
+    def file_diff(self, path: str, max_bytes: Optional[int] = None) -> str:
+        """The staged diff of one file, optionally cut at `max_bytes`."""
+        self.refresh()
+        if path not in self._ranges:
+            return ''
+        start, end = self._ranges[path]
+        store = self._store
+        if max_bytes is not None and end - start > max_bytes:
+            text = store.text(start, start + max_bytes)
+            return text + f"\n[diff truncated: {end - start} bytes in total]"
+        return store.text(start, end)
+
+    def items(self, max_bytes: Optional[int] = None) -> Iterator[Tuple[str, str]]:
+        """(path, diff) pairs for every staged file, e.g. for per-file message generation."""
+        for path in self.paths():
+            yield path, self.file_diff(path, max_bytes)
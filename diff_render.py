@@ -0,0 +1,271 @@
+# gitwhisper/diff_render.py
+
+import difflib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from .diff_reader import parse_diff_header_path, unquote_path
+from .metrics import registry
+
+# Rendered lines kept in the span cache across all files
+MAX_CACHED_LINES = 500_000
+# Longer lines are shown without syntax or word highlighting
+MAX_HIGHLIGHT_CHARS = 1000
+# Removed/added line pairs less similar than this are shown as wholly replaced
+MIN_WORD_DIFF_RATIO = 0.4
+
+# A rendered line is (kind, text, tokens, emphasis): kind is one of meta, file,
+# hunk, context, added, removed and note; tokens are (start, end, token kind)
+# spans of syntax (keyword, string, comment, number); emphasis are (start, end)
+# spans changed within a line relative to its paired line.
+RenderedLine = Tuple[str, str, List[Tuple[int, int, str]], List[Tuple[int, int]]]
+
+class Language:
+    """Just enough of a language's lexical rules to colour single lines."""
+
+    def __init__(self, keywords: str, line_comment: Optional[str] = None,
+                 block_comment: Optional[Tuple[str, str]] = None, strings: str = '"\''):
+        patterns = []
+        if block_comment:
+            start, end = map(re.escape, block_comment)
+            patterns.append(f'(?P<comment_block>{start}.*?(?:{end}|$))')
+        if line_comment:
+            patterns.append(f'(?P<comment>{re.escape(line_comment)}.*)')
+        for quote in strings:
+            q = re.escape(quote)
+            patterns.append(f'(?P<string_{ord(quote)}>{q}(?:[^{q}\\\\]|\\\\.)*(?:{q}|$))')
+        patterns.append(r'(?P<number>\b(?:0[xX][0-9a-fA-F_]+|\d[\d_]*(?:\.\d+)?(?:[eE][+-]?\d+)?)\b)')
+        patterns.append(r'(?P<word>[A-Za-z_][A-Za-z0-9_]*)')
+        self.pattern = re.compile('|'.join(patterns))
+        self.keywords = frozenset(keywords.split())
+
+    def tokenize(self, text: str, offset: int = 0) -> List[Tuple[int, int, str]]:
+        tokens = []
+        for match in self.pattern.finditer(text):
+            group = match.lastgroup
+            if group == 'word':
+                if match.group() not in self.keywords:
+                    continue
+                kind = 'keyword'
+            else:
+                kind = group.split('_', 1)[0]
+            tokens.append((match.start() + offset, match.end() + offset, kind))
+        return tokens
+
+_C_KEYWORDS = ('if else for while do switch case default break continue return goto struct union enum typedef '
+               'const static extern void char short int long float double signed unsigned sizeof inline volatile '
+               'true false NULL')
+_LANGUAGES = {
+    'python': Language('False None True and as assert async await break class continue def del elif else except '
+                       'finally for from global if import in is lambda nonlocal not or pass raise return try while '
+                       'with yield self', '#'),
+    'c': Language(_C_KEYWORDS + ' class namespace template typename public private protected virtual override '
+                  'new delete this nullptr auto constexpr using', '//', ('/*', '*/')),
+    'javascript': Language('async await break case catch class const continue default delete do else export '
+                           'extends false finally for function if import in instanceof let new null of return '
+                           'static super switch this throw true try typeof undefined var void while yield '
+                           'interface type implements enum readonly private public protected', '//', ('/*', '*/'),
+                           '"\'`'),
+    'java': Language('abstract boolean break byte case catch char class const continue default do double else '
+                     'enum extends final finally float for if implements import instanceof int interface long '
+                     'new null package private protected public return short static super switch this throw '
+                     'throws true false try void while val var fun object when', '//', ('/*', '*/')),
+    'go': Language('break case chan const continue default defer else fallthrough for func go goto if import '
+                   'interface map package range return select struct switch type var nil true false', '//',
+                   ('/*', '*/'), '"\'`'),
+    'rust': Language('as async await break const continue crate else enum extern false fn for if impl in let loop '
+                     'match mod move mut pub ref return self Self static struct super trait true type unsafe use '
+                     'where while', '//', ('/*', '*/'), '"'),
+    'ruby': Language('alias and begin break case class def do else elsif end ensure false for if in module next '
+                     'nil not or redo rescue retry return self super then true undef unless until when while yield',
+                     '#'),
+    'shell': Language('if then else elif fi case esac for while until do done in function return local export '
+                      'echo exit set unset', '#'),
+    'sql': Language('select from where and or not insert into values update set delete create table index primary '
+                    'key references join left right inner outer on group by order having limit as null is in '
+                    'SELECT FROM WHERE AND OR NOT INSERT INTO VALUES UPDATE SET DELETE CREATE TABLE INDEX PRIMARY '
+                    'KEY REFERENCES JOIN LEFT RIGHT INNER OUTER ON GROUP BY ORDER HAVING LIMIT AS NULL IS IN', '--'),
+    'config': Language('true false null yes no on off', '#'),
+}
+_EXTENSIONS = {
+    '.py': 'python', '.pyi': 'python',
+    '.c': 'c', '.h': 'c', '.cc': 'c', '.cpp': 'c', '.cxx': 'c', '.hpp': 'c', '.cs': 'c', '.swift': 'c',
+    '.js': 'javascript', '.jsx': 'javascript', '.mjs': 'javascript', '.ts': 'javascript', '.tsx': 'javascript',
+    '.java': 'java', '.kt': 'java', '.scala': 'java',
+    '.go': 'go', '.rs': 'rust', '.rb': 'ruby',
+    '.sh': 'shell', '.bash': 'shell', '.zsh': 'shell',
+    '.sql': 'sql',
+    '.yml': 'config', '.yaml': 'config', '.toml': 'config', '.ini': 'config', '.cfg': 'config',
+}
+
+def language_for(path: str) -> Optional[Language]:
+    name = _EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if name is None and os.path.basename(path) in ('Makefile', 'Dockerfile', '.gitignore'):
+        name = 'shell'
+    return _LANGUAGES.get(name)
+
+_WORD = re.compile(r'\w+|\s+|[^\w\s]')
+
+def word_diff(old: str, new: str) -> Optional[Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]]:
+    """Character spans that differ between two lines, compared word by word.
+
+    Returns None when the lines have too little in common for the spans to
+    be useful.
+    """
+    old_words, new_words = _WORD.findall(old), _WORD.findall(new)
+    matcher = difflib.SequenceMatcher(None, old_words, new_words, autojunk=False)
+    if matcher.ratio() < MIN_WORD_DIFF_RATIO:
+        return None
+    old_offsets, new_offsets = [0], [0]
+    for word in old_words:
+        old_offsets.append(old_offsets[-1] + len(word))
+    for word in new_words:
+        new_offsets.append(new_offsets[-1] + len(word))
+    old_spans, new_spans = [], []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+        if i2 > i1:
+            old_spans.append((old_offsets[i1], old_offsets[i2]))
+        if j2 > j1:
+            new_spans.append((new_offsets[j1], new_offsets[j2]))
+    return old_spans, new_spans
+
+def _file_path(lines: List[str]) -> str:
+    for line in lines:
+        if line.startswith('+++ ') and line != '+++ /dev/null':
+            path = unquote_path(line[4:])
+            return path[2:] if path.startswith('b/') else path
+        if line.startswith('@@'):
+            break
+    first = lines[0]
+    if first.startswith('diff --git '):
+        return parse_diff_header_path(first)
+    return first.split(' ', 2)[-1] if first.startswith('diff --') else ''
+
+def _emphasize(rendered: List[list], removed: List[int], added: List[int], prefix: int):
+    # Only pair up equal-length blocks, so each pair is a modified line rather than a guess
+    if len(removed) != len(added):
+        return
+    for old_index, new_index in zip(removed, added):
+        old, new = rendered[old_index][1], rendered[new_index][1]
+        if len(old) > MAX_HIGHLIGHT_CHARS or len(new) > MAX_HIGHLIGHT_CHARS:
+            continue
+        spans = word_diff(old[prefix:], new[prefix:])
+        if spans:
+            rendered[old_index][3] = [(start + prefix, end + prefix) for start, end in spans[0]]
+            rendered[new_index][3] = [(start + prefix, end + prefix) for start, end in spans[1]]
+
+def render_file(lines: List[str]) -> List[RenderedLine]:
+    """Classify and tokenize the lines of one file's section of a diff."""
+    language = language_for(_file_path(lines))
+    rendered = []
+    in_header = True
+    prefix = 1
+    removed: List[int] = []
+    added: List[int] = []
+    for line in lines:
+        if line.startswith('@@'):
+            in_header = False
+            # Combined diffs of merges ("@@@") have one prefix column per parent
+            prefix = len(line) - len(line.lstrip('@')) - 1
+            kind = 'hunk'
+        elif in_header:
+            kind = 'file'
+        elif line.startswith('\\') or line.startswith('[diff truncated'):
+            kind = 'note'
+        else:
+            marks = line[:prefix]
+            kind = 'added' if '+' in marks else 'removed' if '-' in marks else 'context'
+        tokens = []
+        if kind in ('added', 'removed', 'context') and language and len(line) <= MAX_HIGHLIGHT_CHARS:
+            tokens = language.tokenize(line[prefix:], prefix)
+        if kind == 'removed':
+            if added:
+                _emphasize(rendered, removed, added, prefix)
+                removed, added = [], []
+            removed.append(len(rendered))
+        elif kind == 'added':
+            added.append(len(rendered))
+        elif removed or added:
+            _emphasize(rendered, removed, added, prefix)
+            removed, added = [], []
+        rendered.append([kind, line, tokens, []])
+    _emphasize(rendered, removed, added, prefix)
+    return [tuple(line) for line in rendered]
+
+_INDEX_LINE = re.compile(r'^index ([0-9a-f]+)\.\.([0-9a-f]+)')
+
+def _split_files(lines: List[str]) -> List[List[str]]:
+    sections, current = [], []
+    for line in lines:
+        if line.startswith('diff --') and current:
+            sections.append(current)
+            current = []
+        current.append(line)
+    if current:
+        sections.append(current)
+    return sections
+
+def _section_key(lines: List[str]) -> Optional[tuple]:
+    # The blob pair identifies the content; the path picks the language and the
+    # length tells a truncated copy of the same diff from the full one
+    for line in lines[1:6]:
+        match = _INDEX_LINE.match(line)
+        if match:
+            return match.group(1), match.group(2), lines[0], sum(map(len, lines))
+    return None
+
+class SpanCache:
+    """Rendered file sections keyed by blob pair, evicted least recently used first."""
+
+    def __init__(self, max_lines: int = MAX_CACHED_LINES):
+        self.max_lines = max_lines
+        self.lines = 0
+        self.entries: 'OrderedDict[tuple, List[RenderedLine]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[List[RenderedLine]]:
+        with self._lock:
+            rendered = self.entries.get(key)
+            if rendered is not None:
+                self.entries.move_to_end(key)
+        registry.increment('cache.diff_render.hit' if rendered is not None else 'cache.diff_render.miss')
+        return rendered
+
+    def put(self, key: tuple, rendered: List[RenderedLine]):
+        with self._lock:
+            if key in self.entries:
+                return
+            self.entries[key] = rendered
+            self.lines += len(rendered)
+            while self.lines > self.max_lines and len(self.entries) > 1:
+                _, evicted = self.entries.popitem(last=False)
+                self.lines -= len(evicted)
+
+span_cache = SpanCache()
+
+def render_diff(diff_text: str, cache: Optional[SpanCache] = span_cache) -> List[RenderedLine]:
+    """Render a whole diff (or `git show` output) line by line.
+
+    Lines before the first file (a commit header) are kept as meta lines.
+    Each file section is rendered on its own and cached by its blob pair, so
+    the same change seen again, from another commit or the index, is not
+    tokenized twice.
+    """
+    rendered: List[RenderedLine] = []
+    for section in _split_files(diff_text.split('\n')):
+        if not section[0].startswith('diff --'):
+            rendered.extend(('meta', line, [], []) for line in section)
+            continue
+        key = _section_key(section) if cache is not None else None
+        lines = cache.get(key) if key is not None else None
+        if lines is None:
+            lines = render_file(section)
+            if key is not None:
+                cache.put(key, lines)
+        rendered.extend(lines)
+    return rendered
@@ -0,0 +1,182 @@
+# gitwhisper/diff_store.py
+
+import mmap
+import os
+import subprocess
+import tempfile
+import threading
+from array import array
+from typing import Iterator, List, Optional, Tuple
+
+import git
+
+from .metrics import popen_git
+
+# Output larger than this is written to a temporary file and memory-mapped
+SPILL_THRESHOLD = 8 * 1024 * 1024
+# Bytes read from git per call
+READ_SIZE = 1 << 20
+
+SECTION_MARKER = b'\ndiff --'
+
+class DiffStore:
+    """Raw diff output held in memory, or above `spill_threshold` in an unlinked temporary file read through mmap.
+
+    While the output is written, one pass indexes the offset and line number
+    where each file section (a line starting with "diff --") begins and counts
+    the lines. Sections are then read as slices, so only the parts actually
+    looked at are decoded or paged in.
+    """
+
+    def __init__(self, spill_dir: Optional[str] = None, spill_threshold: int = SPILL_THRESHOLD):
+        self.spill_dir = spill_dir
+        self.spill_threshold = spill_threshold
+        self.size = 0
+        self.line_count = 0
+        # Section index: start offset and line number of each "diff --" line
+        self.section_offsets = array('q')
+        self.section_lines = array('q')
+        # The output starts at a line start, as if after a newline
+        self._tail = b'\n'
+        self._buffer = bytearray()
+        self._file = None
+        self._map = None
+        self.data = b''
+
+    @property
+    def spilled(self) -> bool:
+        return self._file is not None
+
+    @property
+    def resident_bytes(self) -> int:
+        """Bytes of diff held in process memory; spilled output lives in the file and the page cache."""
+        return 0 if self.spilled else self.size
+
+    def write(self, chunk: bytes):
+        base = self.size
+        # A marker may straddle chunks, so search from the end of the previous one
+        tail = self._tail
+        window = tail + chunk
+        pos = window.find(SECTION_MARKER)
+        while pos != -1:
+            start = base - len(tail) + pos + 1
+            self.section_offsets.append(start)
+            self.section_lines.append(self.line_count + chunk.count(b'\n', 0, max(start - base, 0)))
+            pos = window.find(SECTION_MARKER, pos + 1)
+        self._tail = window[-(len(SECTION_MARKER) - 1):]
+
+        self.line_count += chunk.count(b'\n')
+        self.size += len(chunk)
+        if self._file is not None:
+            self._file.write(chunk)
+            return
+        self._buffer += chunk
+        if len(self._buffer) > self.spill_threshold:
+            self._file = self._open_spill_file()
+            self._file.write(self._buffer)
+            self._buffer = bytearray()
+
+    def _open_spill_file(self):
+        try:
+            return tempfile.TemporaryFile(prefix='diff-', dir=self.spill_dir)
+        except OSError:
+            return tempfile.TemporaryFile(prefix='gitwhisper-diff-')
+
+    def finish(self) -> 'DiffStore':
+        """Stop writing and make the data readable."""
+        if self._file is None:
+            self.data = bytes(self._buffer)
+            self._buffer = bytearray()
+        elif self.size:
+            self._file.flush()
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.data = self._map
+        # A final line without a newline is still a line
+        if self.size and self._tail[-1:] != b'\n':
+            self.line_count += 1
+        return self
+
+    def close(self):
+        self.data = b''
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def sections(self) -> List[Tuple[int, int, int]]:
+        """(start, end, line count) of each file section, in order."""
+        starts = list(self.section_offsets)
+        ends = starts[1:] + [self.size]
+        line_ends = list(self.section_lines[1:]) + [self.line_count]
+        return [(start, end, line_end - first_line)
+                for start, end, first_line, line_end in zip(starts, ends, self.section_lines, line_ends)]
+
+    def find(self, sub: bytes, start: int = 0, end: Optional[int] = None) -> int:
+        return self.data.find(sub, start, self.size if end is None else end)
+
+    def slice(self, start: int, end: int) -> memoryview:
+        """A view of the raw bytes, without copying them."""
+        return memoryview(self.data)[start:end]
+
+    def text(self, start: int = 0, end: Optional[int] = None, max_bytes: Optional[int] = None) -> str:
+        end = self.size if end is None else end
+        if max_bytes is not None:
+            end = min(end, start + max_bytes)
+        return str(self.slice(start, end), 'utf-8', 'replace')
+
+    def iter_lines(self, start: int, end: int) -> Iterator[Tuple[int, int]]:
+        """(start, end) offsets of the lines between two offsets, ends excluding the newline."""
+        pos = start
+        while pos < end:
+            newline = self.data.find(b'\n', pos, end)
+            line_end = end if newline == -1 else newline
+            yield pos, line_end
+            pos = line_end + 1
+
+def spill_dir_for(repo_path: str) -> Optional[str]:
+    # Kept next to the repository's other gitwhisper files rather than in a /tmp that may be RAM-backed
+    try:
+        path = os.path.join(git.Repo(repo_path, search_parent_directories=True).common_dir, 'gitwhisper')
+        os.makedirs(path, exist_ok=True)
+        return path
+    except (git.InvalidGitRepositoryError, git.NoSuchPathError, OSError):
+        return None
+
+def run_to_store(command: List[str], repo_path: str, env: Optional[dict] = None,
+                 spill_threshold: int = SPILL_THRESHOLD) -> DiffStore:
+    """Run a git command and stream its output into a DiffStore."""
+    proc = popen_git(command, cwd=repo_path, env=env, stdin=subprocess.DEVNULL,
+                     stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    stderr_chunks = []
+    stderr_reader = threading.Thread(target=lambda: stderr_chunks.append(proc.stderr.read()), daemon=True)
+    stderr_reader.start()
+    store = DiffStore(spill_threshold=spill_threshold)
+    try:
+        while True:
+            chunk = proc.stdout.read(READ_SIZE)
+            if not chunk:
+                break
+            if store.spill_dir is None and store.size + len(chunk) > spill_threshold:
+                store.spill_dir = spill_dir_for(repo_path)
+            store.write(chunk)
+    except BaseException:
+        proc.kill()
+        store.close()
+        raise
+    finally:
+        proc.stdout.close()
+        returncode = proc.wait()
+        stderr_reader.join()
+        proc.stderr.close()
+    if returncode != 0:
+        store.close()
+        raise git.GitCommandError(command, returncode, b''.join(stderr_chunks))
+    return store.finish()
@@ -0,0 +1,187 @@
+# gitwhisper/file_history.py
+
+import json
+import os
+import sqlite3
+import subprocess
+import threading
+from typing import Iterator, List
+
+import git
+
+from .commit_cache import iter_log_numstat
+from .diff_reader import unquote_path
+from .metrics import popen_git, registry, run_git
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_history (
+    head TEXT NOT NULL,
+    path TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (head, path, kind)
+);
+"""
+
+class FileHistoryCache:
+    """Complete file histories and blames, keyed by (HEAD commit, path), kept in the repository's git dir.
+
+    Both only depend on the commit they were computed at, so an entry stays
+    valid until HEAD moves. Writing an entry drops those of other HEADs, so
+    the file only ever holds what was viewed since HEAD last moved.
+    """
+
+    def __init__(self, repo_path: str = '.'):
+        cache_dir = os.path.join(git.Repo(repo_path).common_dir, 'gitwhisper')
+        os.makedirs(cache_dir, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(cache_dir, 'file_history.sqlite'), timeout=30)
+        self.conn.executescript(SCHEMA)
+
+    def get(self, head: str, path: str, kind: str):
+        row = self.conn.execute('SELECT data FROM file_history WHERE head = ? AND path = ? AND kind = ?',
+                                (head, path, kind)).fetchone()
+        registry.increment(f'cache.file_{kind}.hit' if row else f'cache.file_{kind}.miss')
+        return json.loads(row[0]) if row else None
+
+    def put(self, head: str, path: str, kind: str, data):
+        with self.conn:
+            self.conn.execute('DELETE FROM file_history WHERE head != ?', (head,))
+            self.conn.execute('INSERT OR REPLACE INTO file_history VALUES (?, ?, ?, ?)',
+                              (head, path, kind, json.dumps(data, separators=(',', ':'))))
+
+    def close(self):
+        self.conn.close()
+
+def resolve_head(repo_path: str = '.', rev: str = 'HEAD') -> str:
+    command = ['git', 'rev-parse', '--verify', f'{rev}^{{commit}}']
+    result = run_git(command, cwd=repo_path, stdin=subprocess.DEVNULL, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise git.GitCommandError(command, result.returncode, result.stderr)
+    return result.stdout.strip()
+
+def iter_file_history(repo_path: str, path: str, rev: str = 'HEAD') -> Iterator[dict]:
+    """Stream the commits that changed `path`, newest first, following renames.
+
+    Each entry has sha, author_name, author_email, authored_date, subject,
+    and the file's path, old path, added and removed lines in that commit.
+    """
+    for commit in iter_log_numstat(repo_path, [rev, '--', path], ['--follow']):
+        entry = {key: commit[key] for key in ('sha', 'author_name', 'author_email', 'authored_date')}
+        entry['subject'] = commit['message'].split('\n', 1)[0]
+        # --follow reports only the followed file, under its name in that commit
+        file_path, old_path, added, removed = commit['files'][0] if commit['files'] else (path, path, None, None)
+        entry.update(path=file_path, old_path=old_path, added=added, removed=removed)
+        yield entry
+
+def iter_blame(repo_path: str, path: str, rev: str = 'HEAD') -> Iterator[dict]:
+    """Stream `git blame --incremental` as it runs.
+
+    Each entry covers `count` consecutive lines of the file at `rev`,
+    starting at 1-based `line`, and carries `sha`. The first entry for a
+    commit also has `commit` with its author, author_time and summary.
+    Entries arrive in the order git settles them, not in line order.
+    """
+    command = ['git', 'blame', '--incremental', rev, '--', path]
+    proc = popen_git(command, cwd=repo_path, stdin=subprocess.DEVNULL,
+                     stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    seen = set()
+    entry = None
+    try:
+        for raw in proc.stdout:
+            line = raw.decode('utf-8', 'replace').rstrip('\n')
+            if entry is None:
+                sha, _, final_line, count = line.split(' ')
+                entry = {'sha': sha, 'line': int(final_line), 'count': int(count)}
+                if sha not in seen:
+                    seen.add(sha)
+                    entry['commit'] = {}
+                continue
+            key, _, value = line.partition(' ')
+            if key == 'filename':
+                entry['path'] = unquote_path(value)
+                yield entry
+                entry = None
+            elif 'commit' in entry and key in ('author', 'author-time', 'summary'):
+                entry['commit'][key.replace('-', '_')] = int(value) if key == 'author-time' else value
+        stderr = proc.stderr.read()
+    finally:
+        proc.stdout.close()
+        # Stops blame when the caller gives up early; a no-op once it has exited
+        proc.kill()
+        proc.wait()
+        proc.stderr.close()
+    if proc.returncode != 0:
+        raise git.GitCommandError(command, proc.returncode, stderr)
+
+def file_lines(repo_path: str, path: str, rev: str = 'HEAD') -> List[str]:
+    """The file's lines at `rev`, read with one `git cat-file`, which is much faster than blame."""
+    command = ['git', 'cat-file', 'blob', f'{rev}:{path}']
+    result = run_git(command, cwd=repo_path, stdin=subprocess.DEVNULL, capture_output=True)
+    if result.returncode != 0:
+        raise git.GitCommandError(command, result.returncode, result.stderr)
+    return result.stdout.decode('utf-8', 'replace').splitlines()
+
+def file_diff(repo_path: str, sha: str, paths: List[str]) -> str:
+    """`git show` of one commit, limited to a file's paths (both sides of a rename)."""
+    command = ['git', 'show', '-M', '--format=commit %H%nAuthor: %an <%ae>%nDate:   %ad%n%n%w(0,4,4)%B',
+               sha, '--'] + paths
+    result = run_git(command, cwd=repo_path, stdin=subprocess.DEVNULL, capture_output=True)
+    if result.returncode != 0:
+        raise git.GitCommandError(command, result.returncode, result.stderr)
+    return result.stdout.decode('utf-8', 'replace')
+
+def cached_or_stream(repo_path: str, path: str, kind: str, stream, on_batch, rev: str = 'HEAD',
+                     interval: float = 0.1, stop_requested=None) -> list:
+    """Deliver a file's history or blame entries to `on_batch` as they arrive, from the cache when possible.
+
+    `stream(repo_path, path, head)` yields the entries. The first is passed
+    on at once and the rest every `interval` seconds, from a timer thread
+    while git is still working on the next one. Once the stream finishes,
+    the complete list is cached for (HEAD, path). Returns every entry. If
+    `stop_requested()` turns true, the stream is stopped and the entries so
+    far are returned uncached.
+    """
+    head = resolve_head(repo_path, rev)
+    cache = FileHistoryCache(repo_path)
+    try:
+        entries = cache.get(head, path, kind)
+        if entries is not None:
+            on_batch(entries)
+            return entries
+        entries, batch = [], []
+        lock = threading.Lock()
+        finished = threading.Event()
+
+        def flush():
+            nonlocal batch
+            # Held while on_batch runs, so batches never overtake each other
+            with lock:
+                if batch:
+                    on_batch(batch)
+                    batch = []
+
+        def flush_periodically():
+            while not finished.wait(interval):
+                flush()
+
+        flusher = threading.Thread(target=flush_periodically, daemon=True)
+        flusher.start()
+        try:
+            entry_stream = stream(repo_path, path, head)
+            for entry in entry_stream:
+                if stop_requested is not None and stop_requested():
+                    entry_stream.close()
+                    return entries
+                entries.append(entry)
+                with lock:
+                    batch.append(entry)
+                if len(entries) == 1:
+                    flush()
+        finally:
+            finished.set()
+            flusher.join()
+        flush()
+        cache.put(head, path, kind, entries)
+        return entries
+    finally:
+        cache.close()
@@ -1,8 +1,23 @@
 # gitwhisper/git_utils.py
 
 import git
+import hashlib
 import os
-from typing import List, Tuple
+import re
+import subprocess
+import sys
+import threading
+from functools import cached_property
+from typing import Callable, List, Optional, Tuple
+from .diff_reader import read_diff
+from .commit_cache import cached_history, committed_datetime
+from .metrics import popen_git, run_git
+
+# Matches git's progress lines, e.g. "Writing objects:  45% (9/20), 1.20 MiB | 2.00 MiB/s"
+PROGRESS_LINE = re.compile(
+    r'^(?:remote: )?(?P<stage>[A-Za-z ]+):\s+\d+% \((?P<current>\d+)/(?P<total>\d+)\)'
+    r'(?:, (?P<transferred>[^|,]+?)(?: \| (?P<rate>[^,]+?))?)?(?:, done\.)?\s*$'
+)
 
 def is_git_repo(path):
     """Check if the given path is a Git repository."""
@@ -18,16 +33,129 @@ def get_unstaged_changes(repo_path='.'):
     return repo.git.diff()
 
 def get_staged_changes(repo_path: str = '.', file_name: str = None) -> str:
-    """Get staged changes in the repository, optionally for a specific file."""
-    repo = git.Repo(repo_path)
-    if file_name:
-        return repo.git.diff('--staged', '--', file_name)
-    else:
-        return repo.git.diff('--staged')
+    """Get staged changes in the repository, optionally for a specific file.
+
+    Binary and oversized files are replaced with stubs (see diff_reader).
+    """
+    return read_diff(repo_path, ['diff', '--staged'], [file_name] if file_name else None).text()
+
+class ChangeMetrics:
+    """Per-file added/removed line counts of a diff, from `git diff --numstat`.
+
+    `files` is a list of dicts with path, old_path, added, removed and binary
+    (counts are 0 for binary files).
+    """
+
+    def __init__(self, files: List[dict]):
+        self.files = files
+
+    @property
+    def file_count(self) -> int:
+        return len(self.files)
+
+    @property
+    def total_added(self) -> int:
+        return sum(f['added'] for f in self.files)
+
+    @property
+    def total_removed(self) -> int:
+        return sum(f['removed'] for f in self.files)
+
+    @property
+    def total_changed(self) -> int:
+        return self.total_added + self.total_removed
+
+    @property
+    def binary_files(self) -> List[str]:
+        return [f['path'] for f in self.files if f['binary']]
+
+    @property
+    def renamed_files(self) -> List[Tuple[str, str]]:
+        return [(f['old_path'], f['path']) for f in self.files if f['old_path'] != f['path']]
+
+def parse_numstat(output: bytes) -> List[dict]:
+    """Parse `git diff --numstat -z` output into ChangeMetrics file dicts."""
+    tokens = output.split(b'\0')
+    files = []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i].lstrip(b'\n')
+        i += 1
+        if not token:
+            continue
+        added, removed, path = token.split(b'\t', 2)
+        if path:
+            old_path = path
+        else:
+            # Renames and copies are "added\tremoved\t\0old\0new\0"
+            old_path, path = tokens[i], tokens[i + 1]
+            i += 2
+        binary = added == b'-'
+        files.append({
+            'path': path.decode('utf-8', 'replace'),
+            'old_path': old_path.decode('utf-8', 'replace'),
+            'added': 0 if binary else int(added),
+            'removed': 0 if binary else int(removed),
+            'binary': binary,
+        })
+    return files
+
+def get_change_metrics(repo_path: str = '.', staged: bool = True, revs: List[str] = None,
+                       env: Optional[dict] = None) -> ChangeMetrics:
+    """Measure a diff without producing patch text.
+
+    By default this measures the staged changes; pass `revs` (e.g.
+    ['main', 'HEAD']) to measure a diff between commits instead.
+    """
+    args = ['git', 'diff', '--numstat', '-z', '-M']
+    if revs:
+        args += list(revs)
+    elif staged:
+        args.append('--staged')
+    result = run_git(args, cwd=repo_path, env=env, stdin=subprocess.DEVNULL, capture_output=True)
+    if result.returncode != 0:
+        raise git.GitCommandError(args, result.returncode, result.stderr)
+    return ChangeMetrics(parse_numstat(result.stdout))
+
+def parse_raw_diff(output: bytes) -> List[dict]:
+    """Parse `git diff --raw -z --no-abbrev` output into dicts with status, paths and blob ids."""
+    tokens = output.split(b'\0')
+    entries = []
+    i = 0
+    while i < len(tokens) and tokens[i].startswith(b':'):
+        old_mode, new_mode, old_blob, new_blob, status = tokens[i][1:].decode().split(' ')
+        paths = tokens[i + 1:i + (3 if status[0] in 'RC' else 2)]
+        i += 1 + len(paths)
+        entries.append({
+            'status': status[0],
+            'old_path': paths[0].decode('utf-8', 'replace'),
+            'path': paths[-1].decode('utf-8', 'replace'),
+            'old_blob': old_blob,
+            'new_blob': new_blob,
+            'old_mode': old_mode,
+            'new_mode': new_mode,
+        })
+    return entries
+
+def get_staged_status(repo_path: str = '.', env: Optional[dict] = None) -> Tuple[List[dict], str]:
+    """The staged entries (as parsed by parse_raw_diff) and the fingerprint of the staged content."""
+    result = run_git(['git', 'diff', '--staged', '--raw', '-z', '--no-abbrev'], cwd=repo_path, env=env,
+                     stdin=subprocess.DEVNULL, capture_output=True)
+    head = run_git(['git', 'rev-parse', '--verify', '-q', 'HEAD'], cwd=repo_path, env=env,
+                   stdin=subprocess.DEVNULL, capture_output=True).stdout
+    return parse_raw_diff(result.stdout), hashlib.sha1(head + b'\0' + result.stdout).hexdigest()
 
-def is_substantial_change(diff, threshold=10):
-    """Determine if changes are substantial based on the number of lines changed."""
-    return diff.count('\n') > threshold
+def get_staged_fingerprint(repo_path: str = '.', env: Optional[dict] = None) -> str:
+    """A hash identifying the exact staged content relative to HEAD.
+
+    It changes whenever a file is staged, unstaged or restaged with different
+    content, and costs a single `git diff --raw` (no patch text).
+    """
+    return get_staged_status(repo_path, env)[1]
+
+def is_substantial_change(metrics: ChangeMetrics, threshold=10):
+    """Determine if changes are substantial based on the number of lines added or removed."""
+    return metrics.total_changed > threshold
 
 def git_add_all(repo_path='.'):
     """Stage all changes in the repository."""
@@ -50,15 +178,72 @@ def commit_changes(repo_path='.', commit_message=None):
             return False
     return False
 
-def git_push(repo_path='.'):
+def run_remote_operation(repo_path: str, args: List[str],
+                         progress: Optional[Callable[[str, int, int, str], None]] = None,
+                         cancel_event: Optional[threading.Event] = None) -> Tuple[bool, str]:
+    """Run a push/pull/fetch and stream its progress.
+
+    `args` should include `--progress` so git reports progress even though
+    stderr is a pipe. Each progress line is passed to
+    `progress(stage, current, total, rate)`. Setting `cancel_event` terminates
+    the git process.
+    """
+    env = dict(os.environ, GIT_TERMINAL_PROMPT='0')
+    proc = popen_git(['git'] + list(args), cwd=repo_path, env=env,
+                     stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    cancelled = threading.Event()
+
+    def watch_cancel():
+        while not cancel_event.wait(0.1):
+            if proc.poll() is not None:
+                return
+        cancelled.set()
+        proc.terminate()
+
+    if cancel_event is not None:
+        threading.Thread(target=watch_cancel, daemon=True).start()
+
+    # Drain stdout separately so a chatty pull can't block on a full pipe
+    stdout_chunks = []
+    stdout_reader = threading.Thread(target=lambda: stdout_chunks.append(proc.stdout.read()), daemon=True)
+    stdout_reader.start()
+
+    messages = []
+    pending = b''
+    while True:
+        chunk = os.read(proc.stderr.fileno(), 8192)
+        if not chunk:
+            break
+        pending += chunk
+        *lines, pending = re.split(rb'[\r\n]', pending)
+        for raw in lines:
+            line = raw.decode('utf-8', 'replace').strip()
+            match = PROGRESS_LINE.match(line)
+            if match:
+                if progress:
+                    progress(match.group('stage').strip(), int(match.group('current')),
+                             int(match.group('total')), (match.group('rate') or '').strip())
+            elif line:
+                messages.append(line)
+    if pending.strip():
+        messages.append(pending.decode('utf-8', 'replace').strip())
+    proc.wait()
+    stdout_reader.join()
+    proc.stdout.close()
+    proc.stderr.close()
+
+    if cancelled.is_set():
+        return False, "Operation cancelled."
+    output = b''.join(stdout_chunks).decode('utf-8', 'replace').strip()
+    details = '\n'.join(part for part in (output, '\n'.join(messages[-20:])) if part)
+    return proc.returncode == 0, details
+
+def git_push(repo_path='.', progress=None, cancel_event=None):
     """Push committed changes to the remote repository."""
-    try:
-        repo = git.Repo(repo_path)
-        origin = repo.remote(name='origin')
-        origin.push()
+    success, details = run_remote_operation(repo_path, ['push', '--progress', 'origin'], progress, cancel_event)
+    if success:
         return True, "Changes pushed successfully."
-    except git.GitCommandError as e:
-        return False, f"Error pushing changes: {str(e)}"
+    return False, f"Error pushing changes: {details}"
 
 def get_last_commit_id(repo_path='.'):
     """Get the ID of the last commit."""
@@ -80,7 +265,7 @@ def get_staged_commits(repo_path='.'):
     last_commit_hash = repo.head.object.hexsha[:7]
 
     # Since we can't get actual commits for staged changes, we'll create a pseudo-commit
-    diff = repo.git.diff('--staged')
+    diff = read_diff(repo_path, ['diff', '--staged']).text()
     return [{
         'id': last_commit_hash,
         'summary': 'Staged changes',
@@ -88,20 +273,33 @@ def get_staged_commits(repo_path='.'):
         'diff': diff
     }]
 
-def get_commit_details(repo_path='.', commit_id='HEAD'):
-    """Get details of a specific commit."""
+def get_commit_details(repo_path='.', commit_id='HEAD', include_diff=True):
+    """Get details of a specific commit; leave out the diff to fetch it separately."""
     repo = git.Repo(repo_path)
     commit = repo.commit(commit_id)
     return {
         'id': commit.hexsha,
         'summary': commit.summary,
         'description': commit.message[len(commit.summary):].strip(),
-        'diff': repo.git.show(commit.hexsha),
+        'diff': get_commit_diff(repo_path, commit.hexsha) if include_diff else None,
         'timestamp': commit.committed_date
     }
 
+def get_commit_diff(repo_path='.', commit_id='HEAD'):
+    """`git show` output for a commit, capped by the diff reader's limits."""
+    return read_diff(repo_path, ['show', commit_id]).text()
+
 def get_commits(repo_path='.', count=10):
-    """Get a list of recent commits."""
+    """Get a list of recent commits, from the commit cache when it has been built."""
+    cached = cached_history(repo_path, 'HEAD', count)
+    if cached is not None:
+        return [{
+            'id': commit['sha'],
+            'summary': commit['subject'],
+            'description': commit['message'][len(commit['subject']):].strip(),
+            'timestamp': commit['committed_date']
+        } for commit in cached]
+
     repo = git.Repo(repo_path)
     commits = []
     for commit in repo.iter_commits(max_count=count):
@@ -123,6 +321,70 @@ def get_modified_files(repo_path='.'):
     repo = git.Repo(repo_path)
     return [item.a_path for item in repo.index.diff(None)] + repo.untracked_files
 
+def _ls_files(repo_path: str, args: List[str]) -> List[str]:
+    output = run_git(['git', 'ls-files', '-z'] + args, cwd=repo_path, stdin=subprocess.DEVNULL,
+                     capture_output=True, check=True).stdout
+    return [path.decode('utf-8', 'replace') for path in output.split(b'\0') if path]
+
+def list_worktree_files(repo_path: str = '.') -> List[str]:
+    """Tracked files plus untracked files that are not ignored, relative to the repository root."""
+    root = git.Repo(repo_path, search_parent_directories=True).working_tree_dir
+    return _ls_files(root, ['--cached', '--others', '--exclude-standard', '--deduplicate'])
+
+def list_ignored_entries(repo_path: str = '.') -> List[str]:
+    """Ignored untracked paths; wholly ignored directories are listed once, with a trailing slash."""
+    root = git.Repo(repo_path, search_parent_directories=True).working_tree_dir
+    return _ls_files(root, ['--others', '--ignored', '--exclude-standard', '--directory'])
+
+def build_path_tree(paths: List[str]) -> dict:
+    """Fold slash-separated paths into nested dicts keyed by path segment; files map to None.
+
+    Segment strings are interned, so names repeated across directories
+    (`__init__.py`, `index.js`, `src`) are stored once.
+    """
+    tree = {}
+    for path in paths:
+        *dirs, name = path.rstrip('/').split('/')
+        node = tree
+        for segment in dirs:
+            child = node.get(segment)
+            if child is None:
+                child = node[sys.intern(segment)] = {}
+            node = child
+        node.setdefault(sys.intern(name), {} if path.endswith('/') else None)
+    return tree
+
+class RepoSnapshot:
+    """Repository state shared by every panel refreshed in one UI tick.
+
+    Each attribute is computed on first access and reused afterwards, so
+    panels that need the same information (e.g. the staged file list) only
+    cost one git invocation between them.
+    """
+
+    def __init__(self, repo_path: str = '.'):
+        self.repo_path = repo_path
+
+    @cached_property
+    def staged_files(self) -> List[str]:
+        return get_staged_files(self.repo_path)
+
+    @cached_property
+    def modified_files(self) -> List[str]:
+        return get_modified_files(self.repo_path)
+
+    @cached_property
+    def commits(self) -> List[dict]:
+        return get_commits(self.repo_path)
+
+    @cached_property
+    def current_branch(self) -> str:
+        return get_current_branch(self.repo_path)
+
+    @cached_property
+    def branches(self) -> List[str]:
+        return list_branches(self.repo_path)
+
 def get_current_branch(repo_path: str = '.') -> str:
     """Get the name of the current active branch."""
     repo = git.Repo(repo_path)
@@ -183,40 +445,44 @@ def rebase_branch(repo_path: str = '.', onto_branch: str = None) -> Tuple[bool,
     except git.GitCommandError as e:
         return False, str(e)
 
-def push_branch(repo_path: str = '.', branch_name: str = None, remote: str = 'origin') -> Tuple[bool, str]:
+def push_branch(repo_path: str = '.', branch_name: str = None, remote: str = 'origin',
+                progress=None, cancel_event=None) -> Tuple[bool, str]:
     """Push a branch to a remote repository, explicitly setting upstream if necessary."""
     try:
         if branch_name is None:
             # Get the current branch name
-            result = subprocess.run(['git', 'rev-parse', '--abbrev-ref', 'HEAD'], 
-                                    cwd=repo_path, capture_output=True, text=True, check=True)
+            result = run_git(['git', 'rev-parse', '--abbrev-ref', 'HEAD'], 
+                             cwd=repo_path, capture_output=True, text=True, check=True)
             branch_name = result.stdout.strip()
 
         # Try to push with -u option to set upstream
-        try:
-            result = subprocess.run(['git', 'push', '-u', remote, branch_name], 
-                                    cwd=repo_path, capture_output=True, text=True, check=True)
+        success, details = run_remote_operation(repo_path, ['push', '--progress', '-u', remote, branch_name],
+                                                progress, cancel_event)
+        if success:
             return True, f"Successfully pushed and set upstream for {branch_name} to {remote}/{branch_name}"
-        except subprocess.CalledProcessError as e:
-            # If push fails, return the error message
-            return False, f"Failed to push: {e.stderr.strip()}"
+        return False, f"Failed to push: {details}"
 
     except subprocess.CalledProcessError as e:
         return False, f"An error occurred: {e.stderr.strip()}"
     except Exception as e:
         return False, f"An unexpected error occurred: {str(e)}"
 
-def pull_changes(repo_path: str = '.', remote: str = 'origin', branch: str = None) -> Tuple[bool, str]:
+def pull_changes(repo_path: str = '.', remote: str = 'origin', branch: str = None,
+                 progress=None, cancel_event=None) -> Tuple[bool, str]:
     """Pull changes from the remote counterpart of the current or specified branch."""
-    repo = git.Repo(repo_path)
-    try:
-        if branch:
-            repo.git.pull(remote, branch)
-        else:
-            repo.git.pull()
+    args = ['pull', '--progress', remote, branch] if branch else ['pull', '--progress']
+    success, details = run_remote_operation(repo_path, args, progress, cancel_event)
+    if success:
         return True, f"Pulled changes from {remote}"
-    except git.GitCommandError as e:
-        return False, str(e)
+    return False, details
+
+def fetch_changes(repo_path: str = '.', remote: str = 'origin',
+                  progress=None, cancel_event=None) -> Tuple[bool, str]:
+    """Fetch from a remote without touching the working tree."""
+    success, details = run_remote_operation(repo_path, ['fetch', '--progress', remote], progress, cancel_event)
+    if success:
+        return True, f"Fetched changes from {remote}"
+    return False, details
 
 def create_and_switch_branch(repo_path: str = '.', branch_name: str = None) -> Tuple[bool, str]:
     """Create a new branch and immediately switch to it."""
@@ -240,6 +506,10 @@ def get_branch_history(repo_path: str = '.', branch_name: str = None, max_count:
     """Get the commit history of a branch."""
     repo = git.Repo(repo_path)
     try:
+        cached = cached_history(repo_path, branch_name or 'HEAD', max_count)
+        if cached is not None:
+            return [{'sha': commit['sha'], 'message': commit['message'], 'author': commit['author_name'],
+                     'date': committed_datetime(commit)} for commit in cached]
         if branch_name:
             commits = list(repo.iter_commits(branch_name, max_count=max_count))
         else:
@@ -0,0 +1,70 @@
+# gitwhisper/hook_client.py
+#
+# prepare-commit-msg hook that asks a running `gitwhisper daemon` for a message.
+# It only uses the standard library and is copied verbatim into the hook file,
+# so a commit never pays for importing anthropic, GitPython or the rest of gitwhisper.
+# If the daemon is not running or does not answer within the budget, the
+# message file is left as it is and git carries on as if the hook did nothing.
+
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+
+# Total time the hook may add to a commit
+DEFAULT_BUDGET_MS = 1500
+
+# Commit sources that already have a message; the hook leaves these alone
+SKIP_SOURCES = ('message', 'template', 'merge', 'squash', 'commit')
+
+def default_socket_path():
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    return os.environ.get('GITWHISPER_SOCKET') or os.path.join(runtime_dir, f'gitwhisper-{os.getuid()}.sock')
+
+def request_message(repo_path, index_file=None, budget_ms=DEFAULT_BUDGET_MS, socket_path=None):
+    """Ask the daemon for a message for the staged changes; returns '' on any failure or timeout."""
+    deadline = time.monotonic() + budget_ms / 1000
+    request = {'op': 'message', 'repo': repo_path, 'index_file': index_file, 'budget_ms': budget_ms}
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(budget_ms / 1000)
+            sock.connect(socket_path or default_socket_path())
+            sock.sendall(json.dumps(request).encode() + b'\n')
+            response = b''
+            while not response.endswith(b'\n'):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return ''
+                sock.settimeout(remaining)
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                response += chunk
+        return json.loads(response).get('message') or ''
+    except (OSError, ValueError):
+        return ''
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        return 0
+    message_file = argv[0]
+    source = argv[1] if len(argv) > 1 else ''
+    if source in SKIP_SOURCES:
+        return 0
+    index_file = os.environ.get('GIT_INDEX_FILE')
+    # Hooks run at the top of the worktree, and git may pass a relative index path
+    index_file = os.path.abspath(index_file) if index_file else None
+    budget_ms = int(os.environ.get('GITWHISPER_HOOK_BUDGET_MS', DEFAULT_BUDGET_MS))
+    message = request_message(os.getcwd(), index_file, budget_ms)
+    if message:
+        with open(message_file, encoding='utf-8') as f:
+            existing = f.read()
+        with open(message_file, 'w', encoding='utf-8') as f:
+            f.write(message.strip() + '\n' + existing)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,136 @@
 # gitwhisper/main.py
 
-from gitwhisper.ui.app import run_app
+import argparse
+import asyncio
+import sys
 
-def main():
-    print("Starting gitwhisper...")
-    run_app()
+from gitwhisper.metrics import count_git_subprocesses, dump_on_exit
+
+def review(args):
+    from gitwhisper.code_review import review_range
+
+    def print_result(result):
+        source = " (cached)" if result['cached'] else ""
+        print(f"== {result['path']} (+{result['added']}/-{result['removed']}){source}")
+        print(result['review'])
+        print()
+
+    review_range(args.repo, args.base, args.head, max_workers=args.jobs, on_result=print_result)
+
+def release_notes(args):
+    from gitwhisper.release_notes import generate_release_notes
+
+    def print_progress(done, total):
+        print(f"Summarized {done}/{total} commit groups", file=sys.stderr)
+
+    print(generate_release_notes(args.repo, args.base, args.head, max_workers=args.jobs, on_progress=print_progress))
+
+def merge_preview(args):
+    import json
+    from gitwhisper.merge_preview import preview_merge, preview_rebase, summarize_preview
+
+    preview = (preview_rebase if args.rebase else preview_merge)(args.repo, args.branch)
+    if args.json:
+        print(json.dumps(preview.to_dict(), indent=2))
+    else:
+        metrics = preview.metrics
+        print(f"{preview.incoming} incoming, {preview.outgoing} local commits; {metrics.file_count} files changed "
+              f"(+{metrics.total_added}/-{metrics.total_removed})")
+        for conflict in preview.conflicts:
+            print(f"CONFLICT {conflict['path']}: {', '.join(conflict['types'])}")
+        if preview.approximate:
+            print("(rebase approximated by merging the branch tips)")
+    if args.summary and preview.incoming:
+        print(summarize_preview(args.repo, preview))
+    return 1 if preview.conflicts else 0
+
+def commit(args):
+    from gitwhisper.commit_pipeline import CommitPipeline
+
+    def print_event(event):
+        if event['state'] != 'start':
+            error = f": {event['error']}" if 'error' in event else ''
+            print(f"{event['at']:7.3f}s {event['stage']:<9} {event['state']} in {event['seconds']:.3f}s{error}",
+                  file=sys.stderr)
+        if event['stage'] == 'prune' and event['state'] == 'done' and pipeline.pruned is not None:
+            print(pipeline.pruned.format_report(), file=sys.stderr)
+
+    pipeline = CommitPipeline(args.repo, message=args.message, push=args.push, edit=not args.no_edit,
+                              on_event=print_event if args.timings else None)
+    if args.dry_run:
+        ok, result = asyncio.run(pipeline.prepare())
+    else:
+        ok, result = asyncio.run(pipeline.run())
+    if not ok:
+        print(result, file=sys.stderr)
+        return 1
+    print(result if args.dry_run else f"Committed {result[:8]}")
+    return 0
+
+def daemon(args):
+    from gitwhisper.daemon import serve
+    serve(args.socket)
+
+def install_hook(args):
+    from gitwhisper.daemon import install_hook
+    success, message = install_hook(args.repo, force=args.force)
+    print(message)
+    return 0 if success else 1
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='gitwhisper')
+    parser.add_argument('--repo', default='.', help="path of the Git repository")
+    subparsers = parser.add_subparsers(dest='command')
+
+    review_parser = subparsers.add_parser('review', help="review the changes of a branch or commit range")
+    review_parser.add_argument('base', help="base branch or commit, e.g. main")
+    review_parser.add_argument('head', nargs='?', default='HEAD', help="branch or commit to review (default: HEAD)")
+    review_parser.add_argument('-j', '--jobs', type=int, default=4, help="files reviewed concurrently")
+
+    notes_parser = subparsers.add_parser('release-notes', help="write release notes for a tag range")
+    notes_parser.add_argument('base', nargs='?', help="previous release tag or commit (default: the previous tag)")
+    notes_parser.add_argument('head', nargs='?', default='HEAD', help="this release's tag or commit (default: HEAD)")
+    notes_parser.add_argument('-j', '--jobs', type=int, default=4, help="commit groups summarized concurrently")
+
+    merge_parser = subparsers.add_parser('merge-preview',
+                                         help="show conflicts and changes of merging a branch, without touching the worktree")
+    merge_parser.add_argument('branch', help="branch to merge into the current branch (or to rebase onto)")
+    merge_parser.add_argument('--rebase', action='store_true', help="preview rebasing the current branch onto it")
+    merge_parser.add_argument('--summary', action='store_true', help="summarize the incoming changes with the model")
+    merge_parser.add_argument('--json', action='store_true', help="print the preview as JSON")
+
+    commit_parser = subparsers.add_parser('commit', help="commit the staged changes with a generated message")
+    commit_parser.add_argument('-m', '--message', help="use this message instead of generating one")
+    commit_parser.add_argument('--no-edit', action='store_true', help="commit without opening the editor")
+    commit_parser.add_argument('--push', action='store_true', help="push the current branch after committing")
+    commit_parser.add_argument('--dry-run', action='store_true', help="only print the message")
+    commit_parser.add_argument('--timings', action='store_true', help="print each stage's timing to stderr")
+
+    daemon_parser = subparsers.add_parser('daemon', help="serve commit messages to the git hook over a Unix socket")
+    daemon_parser.add_argument('--socket', help="socket path (default: $GITWHISPER_SOCKET or a per-user runtime path)")
+
+    hook_parser = subparsers.add_parser('install-hook', help="install the prepare-commit-msg hook")
+    hook_parser.add_argument('--force', action='store_true', help="replace an existing hook")
+
+    args = parser.parse_args(argv)
+    count_git_subprocesses()
+    dump_on_exit()
+    if args.command == 'review':
+        review(args)
+    elif args.command == 'release-notes':
+        release_notes(args)
+    elif args.command == 'merge-preview':
+        return merge_preview(args)
+    elif args.command == 'commit':
+        return commit(args)
+    elif args.command == 'daemon':
+        daemon(args)
+    elif args.command == 'install-hook':
+        return install_hook(args)
+    else:
+        from gitwhisper.ui.app import run_app
+        print("Starting gitwhisper...")
+        run_app([args.repo])
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,127 @@
+# gitwhisper/merge_preview.py
+
+import subprocess
+from typing import List, Optional
+
+import git
+
+from .ai_utils import summarize_incoming_changes
+from .commit_cache import iter_log_numstat
+from .git_utils import ChangeMetrics, get_change_metrics
+from .metrics import run_git
+from .release_notes import describe_commit
+
+# Incoming commits described to the model; the rest are only counted
+MAX_SUMMARY_COMMITS = 100
+
+class MergePreview:
+    """The outcome of merging `theirs` into `ours`, computed without touching the worktree or index.
+
+    `tree` is the merged tree git wrote to the object store (with conflict
+    markers in conflicted files), `conflicts` lists each conflicted path with
+    its conflict types and git's messages, and `metrics` measures how the
+    merge would change `ours`.
+    """
+
+    def __init__(self, ours: str, theirs: str, merge_base: Optional[str], tree: str, conflicts: List[dict],
+                 metrics: ChangeMetrics, incoming: int, outgoing: int, approximate: bool = False):
+        self.ours = ours
+        self.theirs = theirs
+        self.merge_base = merge_base
+        self.tree = tree
+        self.conflicts = conflicts
+        self.metrics = metrics
+        self.incoming = incoming
+        self.outgoing = outgoing
+        self.approximate = approximate
+
+    @property
+    def clean(self) -> bool:
+        return not self.conflicts
+
+    def to_dict(self) -> dict:
+        return {
+            'ours': self.ours, 'theirs': self.theirs, 'merge_base': self.merge_base, 'tree': self.tree,
+            'clean': self.clean, 'approximate': self.approximate, 'conflicts': self.conflicts,
+            'incoming_commits': self.incoming, 'outgoing_commits': self.outgoing,
+            'files': self.metrics.files,
+        }
+
+def _git(repo_path: str, args: List[str]) -> subprocess.CompletedProcess:
+    return run_git(['git'] + args, cwd=repo_path, stdin=subprocess.DEVNULL, capture_output=True)
+
+def _rev_parse(repo_path: str, rev: str) -> str:
+    command = ['rev-parse', '--verify', '--end-of-options', f'{rev}^{{commit}}']
+    result = _git(repo_path, command)
+    if result.returncode != 0:
+        raise git.GitCommandError(['git'] + command, result.returncode, result.stderr)
+    return result.stdout.decode().strip()
+
+def parse_merge_tree(output: bytes) -> tuple:
+    """Split `git merge-tree --write-tree --name-only --messages -z` output into (tree, conflicts).
+
+    The output is the tree id, the conflicted paths, an empty field, then one
+    record per message: a path count, the paths, the conflict type and the
+    message text.
+    """
+    fields = output.split(b'\0')
+    tree = fields[0].decode()
+    position = 1
+    conflicted = []
+    while position < len(fields) and fields[position]:
+        conflicted.append(fields[position].decode('utf-8', 'replace'))
+        position += 1
+    position += 1
+    conflicts = {path: {'path': path, 'types': [], 'messages': []} for path in conflicted}
+    while position < len(fields) and fields[position]:
+        count = int(fields[position])
+        paths = [field.decode('utf-8', 'replace') for field in fields[position + 1:position + 1 + count]]
+        kind, message = (field.decode('utf-8', 'replace') for field in fields[position + 1 + count:position + 3 + count])
+        position += 3 + count
+        for path in paths:
+            if path in conflicts and kind.startswith('CONFLICT'):
+                conflicts[path]['types'].append(kind[len('CONFLICT '):].strip('()'))
+                conflicts[path]['messages'].append(message.strip())
+    return tree, list(conflicts.values())
+
+def _count(repo_path: str, rev_range: str) -> int:
+    result = _git(repo_path, ['rev-list', '--count', rev_range])
+    return int(result.stdout) if result.returncode == 0 else 0
+
+def preview_merge(repo_path: str = '.', branch: str = None, into: str = 'HEAD') -> MergePreview:
+    """Merge `branch` into `into` in memory with `git merge-tree --write-tree` (git 2.38 or newer)."""
+    ours, theirs = _rev_parse(repo_path, into), _rev_parse(repo_path, branch)
+    # Pass the names as given so git's conflict messages mention them rather than commit ids
+    command = ['merge-tree', '--write-tree', '--name-only', '--messages', '-z', into, branch]
+    result = _git(repo_path, command)
+    # Exit status 1 means conflicts; anything else without a tree is an error
+    if result.returncode not in (0, 1) or not result.stdout:
+        raise git.GitCommandError(['git'] + command, result.returncode, result.stderr)
+    tree, conflicts = parse_merge_tree(result.stdout)
+    base = _git(repo_path, ['merge-base', ours, theirs]).stdout.decode().strip() or None
+    return MergePreview(ours, theirs, base, tree, conflicts, get_change_metrics(repo_path, revs=[ours, tree]),
+                        _count(repo_path, f'{ours}..{theirs}'), _count(repo_path, f'{theirs}..{ours}'))
+
+def preview_rebase(repo_path: str = '.', onto: str = None, branch: str = 'HEAD') -> MergePreview:
+    """Approximate rebasing `branch` onto `onto` by merging their tips in memory.
+
+    A rebase replays each commit in turn, so it can stop on a conflict that
+    a later commit resolves, or (rarely) conflict where the tips merge
+    cleanly. The final tree of a conflict-free rebase matches the merge.
+    As for a merge, `ours` is the branch being rebased, so the counts, file
+    stats and summary describe what `onto` brings into it.
+    """
+    preview = preview_merge(repo_path, onto, into=branch)
+    preview.approximate = True
+    return preview
+
+def summarize_preview(repo_path: str, preview: MergePreview) -> str:
+    """Ask the model to describe the commits the merge would bring in, and their conflicts."""
+    commits = list(iter_log_numstat(repo_path, [f'{preview.ours}..{preview.theirs}'],
+                                    ['--no-merges', f'--max-count={MAX_SUMMARY_COMMITS}']))
+    lines = [f"Incoming commits: {preview.incoming} (described: {len(commits)})"]
+    lines.extend(describe_commit(commit) for commit in commits)
+    if preview.conflicts:
+        lines.append("Conflicts:")
+        lines.extend(f"  {conflict['path']}: {', '.join(conflict['types'])}" for conflict in preview.conflicts)
+    return summarize_incoming_changes('\n'.join(lines))
@@ -0,0 +1,158 @@
+# gitwhisper/metrics.py
+
+import atexit
+import functools
+import json
+import os
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+class MetricsRegistry:
+    """In-process counters and timings, cheap enough to leave on all the time.
+
+    Counters are plain integers (`increment`). Timings keep count, total,
+    last and max in seconds (`observe`, `timer`). Cache hit rates come from
+    pairs of counters named `cache.<name>.hit` and `cache.<name>.miss`.
+    Everything is safe to update from worker threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {}
+        self.timings: Dict[str, dict] = {}
+        self.version = 0
+
+    def increment(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+            self.version += 1
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            timing = self.timings.get(name)
+            if timing is None:
+                timing = self.timings[name] = {'count': 0, 'total': 0.0, 'last': 0.0, 'max': 0.0}
+            timing['count'] += 1
+            timing['total'] += seconds
+            timing['last'] = seconds
+            timing['max'] = max(timing['max'], seconds)
+            self.version += 1
+
+    @contextmanager
+    def timer(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def hit_rate(self, cache: str) -> Optional[float]:
+        """Fraction of lookups of `cache` that hit, or None before the first lookup."""
+        with self._lock:
+            hits = self.counters.get(f'cache.{cache}.hit', 0)
+            misses = self.counters.get(f'cache.{cache}.miss', 0)
+        return hits / (hits + misses) if hits + misses else None
+
+    def caches(self):
+        with self._lock:
+            names = {name.split('.')[1] for name in self.counters if name.startswith('cache.')}
+        return sorted(names)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            data = {'counters': dict(self.counters),
+                    'timings': {name: dict(timing) for name, timing in self.timings.items()}}
+        data['cache_hit_rates'] = {cache: self.hit_rate(cache) for cache in self.caches()}
+        return data
+
+    def dump_json(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2, sort_keys=True)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.timings.clear()
+            self.version += 1
+
+registry = MetricsRegistry()
+
+_current = threading.local()
+
+def current_action() -> str:
+    return getattr(_current, 'action', 'other')
+
+@contextmanager
+def action(name: str):
+    """Attribute git subprocesses started by this thread to `name` while the block runs."""
+    previous = getattr(_current, 'action', None)
+    _current.action = name
+    try:
+        yield
+    finally:
+        _current.action = previous
+
+def tracked(name: str):
+    """Decorator running a method under `action(name)`.
+
+    Extra positional arguments beyond what the method takes (such as the
+    `checked` flag of a Qt `clicked` signal) are dropped.
+    """
+    def decorate(method):
+        positional = method.__code__.co_argcount
+
+        @functools.wraps(method)
+        def wrapper(*args):
+            with action(name):
+                return method(*args[:positional])
+        return wrapper
+    return decorate
+
+def count_git_process():
+    """Count one git process started under the current action."""
+    registry.increment(f'git.subprocess.{current_action()}')
+
+def run_git(args, **kwargs) -> subprocess.CompletedProcess:
+    """`subprocess.run` for a git command, counted per action."""
+    count_git_process()
+    return subprocess.run(args, **kwargs)
+
+def popen_git(args, **kwargs) -> subprocess.Popen:
+    """`subprocess.Popen` for a git command, counted per action."""
+    count_git_process()
+    return subprocess.Popen(args, **kwargs)
+
+_counting_installed = False
+
+def count_git_subprocesses():
+    """Also count the git processes GitPython starts, per action.
+
+    Our own git processes are counted by run_git and popen_git. GitPython
+    runs all of its commands, including the long-lived cat-file ones,
+    through Git.execute, so repositories opened from now on use a Git
+    subclass that counts them. Nothing else in the process is affected.
+    """
+    global _counting_installed
+    if _counting_installed:
+        return
+    _counting_installed = True
+    try:
+        import git
+    except ImportError:
+        return
+
+    class CountingGit(git.Git):
+        def execute(self, *args, **kwargs):
+            count_git_process()
+            return super().execute(*args, **kwargs)
+
+    git.Repo.GitCommandWrapperType = CountingGit
+
+def dump_on_exit(path: Optional[str] = None):
+    """Write the registry to `path` (or GITWHISPER_METRICS_FILE) when the process exits."""
+    path = path or os.environ.get('GITWHISPER_METRICS_FILE')
+    if path:
+        atexit.register(registry.dump_json, path)
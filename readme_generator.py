@@ -1,10 +1,65 @@
 # gitwhisper/readme_generator.py
 
 import os
+import subprocess
 import git
 from gitwhisper import ai_utils
+from gitwhisper.analytics import analyze_history, files_at, format_summary
+from gitwhisper.commit_cache import cached_history
 from PyQt6.QtWidgets import QDialog, QVBoxLayout, QTextEdit, QPushButton, QMessageBox
 
+# Recent commits analyzed for churn and hotspots; the README is generated on the GUI thread
+HISTORY_MAX_COMMITS = 1000
+
+README_INSTRUCTIONS = """
+Based on the following information about a Git repository, generate a comprehensive and professional README.md file. 
+This project is a Git workflow assistant that integrates Large Language Models (LLMs) to enhance the development process.
+
+The README should include:
+1. Title: Use the repository name as the main title.
+
+2. Introduction: 
+   - Provide a concise overview of the project's purpose and primary features.
+   - Highlight the integration of LLMs in Git workflow assistance without using marketing language.
+   - Briefly mention how it aids in documentation generation and workflow enhancement.
+
+3. Key Features:
+   - List and briefly explain the main functionalities of the tool.
+   - Describe how LLMs are utilized in specific features (e.g., commit message generation, code review assistance).
+   - Mention any unique aspects that set this tool apart from traditional Git clients.
+
+4. Installation:
+   - Provide clear, step-by-step installation instructions.
+   - Include any dependencies or prerequisites.
+
+5. Usage:
+   - Offer concise examples of how to use the main features.
+   - Include code snippets or command-line examples where appropriate.
+   - Explain how to leverage the LLM-assisted features in a typical workflow.
+
+6. Project Structure:
+   - List the main files and directories.
+   - Provide a brief description of each component's purpose.
+   - Use the change history, if provided, to put the most actively developed components first.
+
+7. Recent Changes:
+   - If available, summarize recent updates or changes based on the provided commit messages.
+   - Where hotspots are provided, mention which areas have seen the most recent work.
+
+8. Contributing:
+   - Outline how others can contribute to the project.
+   - Mention any coding standards or guidelines to follow.
+
+9. License:
+   - State the project's license (suggest MIT License if not evident from the repository information).
+
+Maintain a professional and informative tone throughout the document. Focus on providing clear, factual information about the project's capabilities and benefits, avoiding overly enthusiastic or marketing-like language.
+
+The user message contains the repository information.
+
+Please provide ONLY the content for the README.md file, formatted in Markdown. Ensure the document is well-structured, informative, and presents the project in a professional manner.
+"""
+
 class ReadmeReviewDialog(QDialog):
     def __init__(self, readme_content, parent=None):
         super().__init__(parent)
@@ -66,7 +121,11 @@ def generate_dynamic_readme(repo_path='.', parent=None):
     default_branch = get_default_branch(repo)
     if default_branch:
         try:
-            commits = list(repo.iter_commits(default_branch, max_count=5))
+            cached = cached_history(repo_path, default_branch, 5)
+            if cached is not None:
+                commits = [commit['message'] for commit in cached]
+            else:
+                commits = [commit.message for commit in repo.iter_commits(default_branch, max_count=5)]
         except git.exc.GitCommandError:
             commits = []
             QMessageBox.warning(parent, "Warning", f"Could not retrieve commit history for branch '{default_branch}'.")
@@ -74,6 +133,17 @@ def generate_dynamic_readme(repo_path='.', parent=None):
         commits = []
         QMessageBox.warning(parent, "Warning", "Could not determine the default branch.")
 
+    recent_commits = ' '.join(message.split('\n')[0] for message in commits) if commits else "No recent commits found."
+
+    # Churn and hotspots from one pass over the branch's recent history
+    history = "No history available."
+    if default_branch:
+        try:
+            analytics = analyze_history(repo_path, default_branch, max_count=HISTORY_MAX_COMMITS)
+            history = format_summary(analytics, files_at(repo_path, default_branch))
+        except (git.exc.GitCommandError, subprocess.CalledProcessError):
+            pass
+
     # Prepare information for AI to generate README
     repo_info = f"""
     Repository Name: {repo_name}
@@ -83,59 +153,15 @@ def generate_dynamic_readme(repo_path='.', parent=None):
     {', '.join(files)}
     
     Recent commits:
-    {' '.join(commit.message.split('\n')[0] for commit in commits) if commits else "No recent commits found."}
-    """
-
-    # Use Claude AI to generate README content
-    prompt = f"""
-    Based on the following information about a Git repository, generate a comprehensive and professional README.md file. 
-    This project is a Git workflow assistant that integrates Large Language Models (LLMs) to enhance the development process.
-
-    The README should include:
-    1. Title: Use the repository name as the main title.
-    
-    2. Introduction: 
-       - Provide a concise overview of the project's purpose and primary features.
-       - Highlight the integration of LLMs in Git workflow assistance without using marketing language.
-       - Briefly mention how it aids in documentation generation and workflow enhancement.
-
-    3. Key Features:
-       - List and briefly explain the main functionalities of the tool.
-       - Describe how LLMs are utilized in specific features (e.g., commit message generation, code review assistance).
-       - Mention any unique aspects that set this tool apart from traditional Git clients.
-
-    4. Installation:
-       - Provide clear, step-by-step installation instructions.
-       - Include any dependencies or prerequisites.
-
-    5. Usage:
-       - Offer concise examples of how to use the main features.
-       - Include code snippets or command-line examples where appropriate.
-       - Explain how to leverage the LLM-assisted features in a typical workflow.
-
-    6. Project Structure:
-       - List the main files and directories.
-       - Provide a brief description of each component's purpose.
-
-    7. Recent Changes:
-       - If available, summarize recent updates or changes based on the provided commit messages.
-
-    8. Contributing:
-       - Outline how others can contribute to the project.
-       - Mention any coding standards or guidelines to follow.
-
-    9. License:
-       - State the project's license (suggest MIT License if not evident from the repository information).
-
-    Maintain a professional and informative tone throughout the document. Focus on providing clear, factual information about the project's capabilities and benefits, avoiding overly enthusiastic or marketing-like language.
-
-    Repository Information:
-    {repo_info}
+    {recent_commits}
 
-    Please provide ONLY the content for the README.md file, formatted in Markdown. Ensure the document is well-structured, informative, and presents the project in a professional manner.
+    Change history:
+    {history}
     """
 
-    readme_content = ai_utils.get_claude_response(prompt) 
+    # Use Claude AI to generate README content; the static instructions are a cacheable system prefix
+    readme_content = ai_utils.get_claude_response(f"Repository Information:\n{repo_info}",
+                                                  system=README_INSTRUCTIONS, max_tokens=4096)
     readme_content = readme_content + "\n\n---\n\nGenerated by [gitwhisper](https://github.com/jefedigital/gitwhisper)"
 
     # Show dialog for user review and editing
@@ -0,0 +1,186 @@
+# gitwhisper/release_notes.py
+
+import hashlib
+import os
+import sqlite3
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+import git
+
+from .ai_utils import MODEL, combine_release_notes, summarize_commit_group
+from .commit_cache import iter_log_numstat
+from .metrics import registry, run_git
+
+# Commits summarized together in one request
+GROUP_SIZE = 30
+# Lines of a commit body and changed files included in its description
+MAX_BODY_LINES = 6
+MAX_FILES = 8
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS commit_summaries (
+    sha TEXT PRIMARY KEY,
+    summary TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS group_summaries (
+    group_key TEXT NOT NULL,
+    model TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    PRIMARY KEY (group_key, model)
+);
+"""
+
+class ReleaseNotesCache:
+    """Per-commit descriptions and per-group summaries, kept in the repository's git dir.
+
+    Commit descriptions are derived from git alone, so they are stored
+    regardless of model; group summaries are stored per model.
+    """
+
+    def __init__(self, repo_path: str = '.'):
+        cache_dir = os.path.join(git.Repo(repo_path).common_dir, 'gitwhisper')
+        os.makedirs(cache_dir, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(cache_dir, 'release_notes.sqlite'), timeout=30)
+        self.conn.executescript(SCHEMA)
+
+    def commit_summaries(self, shas: List[str]) -> Dict[str, str]:
+        found = {}
+        for start in range(0, len(shas), 500):
+            batch = shas[start:start + 500]
+            found.update(self.conn.execute(
+                f"SELECT sha, summary FROM commit_summaries WHERE sha IN ({','.join('?' * len(batch))})", batch))
+        registry.increment('cache.release_commits.hit', len(found))
+        registry.increment('cache.release_commits.miss', len(shas) - len(found))
+        return found
+
+    def put_commit_summaries(self, summaries: Dict[str, str]):
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO commit_summaries VALUES (?, ?)', summaries.items())
+
+    def group_summary(self, group_key: str) -> Optional[str]:
+        row = self.conn.execute('SELECT summary FROM group_summaries WHERE group_key = ? AND model = ?',
+                                (group_key, MODEL)).fetchone()
+        registry.increment('cache.release_groups.hit' if row else 'cache.release_groups.miss')
+        return row[0] if row else None
+
+    def put_group_summary(self, group_key: str, summary: str):
+        with self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO group_summaries VALUES (?, ?, ?)', (group_key, MODEL, summary))
+
+    def close(self):
+        self.conn.close()
+
+def previous_tag(repo_path: str = '.', rev: str = 'HEAD') -> Optional[str]:
+    """The most recent tag reachable from the parent of `rev`, i.e. the base of the release ending at `rev`."""
+    result = run_git(['git', 'describe', '--tags', '--abbrev=0', f'{rev}^'], cwd=repo_path,
+                     stdin=subprocess.DEVNULL, capture_output=True, text=True)
+    return result.stdout.strip() if result.returncode == 0 else None
+
+def describe_commit(commit: dict) -> str:
+    """Compact description of a commit for a release-notes prompt: subject, body excerpt and diffstat."""
+    subject, _, body = commit['message'].partition('\n')
+    lines = [f"{commit['sha'][:10]} {subject.strip()}"]
+    body_lines = [line.strip() for line in body.strip().splitlines() if line.strip()]
+    lines.extend(f"    {line}" for line in body_lines[:MAX_BODY_LINES])
+    files = sorted(commit['files'], key=lambda f: (f[2] or 0) + (f[3] or 0), reverse=True)
+    if files:
+        stats = ', '.join(f"{path} (+{added}/-{removed})" if added is not None else f"{path} (binary)"
+                          for path, _, added, removed in files[:MAX_FILES])
+        more = f", and {len(files) - MAX_FILES} more" if len(files) > MAX_FILES else ""
+        lines.append(f"    files: {stats}{more}")
+    return '\n'.join(lines)
+
+def _range_commits(repo_path: str, base: str, head: str) -> List[tuple]:
+    """(sha, is_merge) for every commit in base..head, oldest first."""
+    command = ['git', 'rev-list', '--topo-order', '--reverse', '--parents', head, f'^{base}']
+    result = run_git(command, cwd=repo_path, stdin=subprocess.DEVNULL, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise git.GitCommandError(command, result.returncode, result.stderr)
+    return [(fields[0], len(fields) > 2) for fields in map(str.split, result.stdout.splitlines())]
+
+def _tagged_commits(repo_path: str) -> set:
+    output = run_git(['git', 'for-each-ref', '--format=%(objectname) %(*objectname)', 'refs/tags'],
+                     cwd=repo_path, stdin=subprocess.DEVNULL, capture_output=True, text=True).stdout
+    # Annotated tags peel to the commit in the second field
+    return {fields[-1] for fields in map(str.split, output.splitlines()) if fields}
+
+def plan_groups(repo_path: str, base: str, head: str = 'HEAD', group_size: int = GROUP_SIZE) -> List[List[str]]:
+    """Split the non-merge commits of base..head into groups, oldest first.
+
+    The range is first cut at every tag inside it, and each tag-to-tag
+    segment is batched from its start. Groups therefore only depend on the
+    segment they are in, so the groups of earlier releases (and their cached
+    summaries) are identical whatever range is requested.
+    """
+    tagged = _tagged_commits(repo_path)
+    groups, current = [], []
+    for sha, is_merge in _range_commits(repo_path, base, head):
+        if not is_merge:
+            current.append(sha)
+            if len(current) == group_size:
+                groups.append(current)
+                current = []
+        if sha in tagged and current:
+            groups.append(current)
+            current = []
+    if current:
+        groups.append(current)
+    return groups
+
+def group_key(shas: List[str]) -> str:
+    return hashlib.sha1('\n'.join(shas).encode()).hexdigest()
+
+def _load_commit_summaries(repo_path: str, cache: ReleaseNotesCache, shas: List[str]) -> Dict[str, str]:
+    summaries = cache.commit_summaries(shas)
+    missing = [sha for sha in shas if sha not in summaries]
+    new = {}
+    for start in range(0, len(missing), 500):
+        for commit in iter_log_numstat(repo_path, missing[start:start + 500], ['--no-walk=unsorted']):
+            new[commit['sha']] = describe_commit(commit)
+    cache.put_commit_summaries(new)
+    summaries.update(new)
+    return summaries
+
+def generate_release_notes(repo_path: str = '.', base: Optional[str] = None, head: str = 'HEAD',
+                           max_workers: int = 4,
+                           on_progress: Optional[Callable[[int, int], None]] = None) -> str:
+    """Write release notes for the commits in base..head (base defaults to the previous tag).
+
+    Commits are batched into groups, each group is summarized by the model
+    concurrently (at most `max_workers` at a time), and the group summaries
+    are reduced into one set of sections. Commit descriptions and group
+    summaries are cached, so a new release only sends the groups made of
+    commits since the previous tag. `on_progress(done, total)` is called as
+    groups complete.
+    """
+    base = base or previous_tag(repo_path, head)
+    if base is None:
+        raise ValueError("No earlier tag found; give the base of the release explicitly")
+    groups = plan_groups(repo_path, base, head)
+    if not groups:
+        return ""
+    cache = ReleaseNotesCache(repo_path)
+    try:
+        summaries: List[Optional[str]] = [cache.group_summary(group_key(group)) for group in groups]
+        pending = [i for i, summary in enumerate(summaries) if summary is None]
+        done = len(groups) - len(pending)
+        if on_progress:
+            on_progress(done, len(groups))
+        if pending:
+            descriptions = _load_commit_summaries(repo_path, cache, [sha for i in pending for sha in groups[i]])
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {executor.submit(summarize_commit_group,
+                                           '\n\n'.join(descriptions[sha] for sha in groups[i])): i
+                           for i in pending}
+                for future in as_completed(futures):
+                    i = futures[future]
+                    summaries[i] = future.result()
+                    cache.put_group_summary(group_key(groups[i]), summaries[i])
+                    done += 1
+                    if on_progress:
+                        on_progress(done, len(groups))
+    finally:
+        cache.close()
+    return combine_release_notes(summaries)
@@ -1,5 +1,6 @@
 # gitwhipper/ui/app.py
 
+import asyncio
 import sys
 import os
 import git
@@ -8,51 +9,71 @@ from PyQt6.QtWidgets import (QApplication, QMainWindow, QTextEdit, QPushButton,
                              QVBoxLayout, QHBoxLayout, QWidget, QFileDialog, QLabel,
                              QMessageBox, QGroupBox, QFormLayout, QListWidget, QSplitter,
                              QMenu, QMenuBar, QTabWidget, QTreeView, QAbstractItemView,
-                             QInputDialog)
-from PyQt6.QtCore import Qt, QDir, QModelIndex
-from PyQt6.QtGui import QPalette, QColor, QStandardItemModel, QStandardItem, QDragEnterEvent, QDropEvent, QTextCharFormat, QBrush, QTextCursor
-from ..git_utils import (is_substantial_change, commit_changes, 
-                         is_git_repo, git_add_all, git_push, get_unstaged_changes, 
+                             QInputDialog, QProgressDialog, QCheckBox, QComboBox, QStatusBar, QDialog)
+from PyQt6.QtCore import Qt, QDir, QModelIndex, QTimer
+from PyQt6.QtGui import QPalette, QColor, QStandardItemModel, QStandardItem, QDragEnterEvent, QDropEvent
+from ..git_utils import (is_git_repo, git_add_all, git_push, get_unstaged_changes, 
                          get_staged_changes, get_commits, get_staged_files,
-                         get_commit_details, get_modified_files, get_current_branch,
+                         get_commit_details, get_commit_diff, get_modified_files, get_current_branch,
                          list_branches, create_branch, switch_branch, delete_branch,
-                         merge_branch, rebase_branch, push_branch, pull_changes,
+                         merge_branch, rebase_branch, push_branch, pull_changes, fetch_changes,
                          create_and_switch_branch, rename_branch, get_branch_history)
-from ..commit_summary import generate_commit_summary
+from ..commit_pipeline import CommitPipeline
+from ..diff_reader import MAX_FILE_BYTES
+from ..metrics import registry, count_git_subprocesses, tracked
 from ..readme_generator import generate_dynamic_readme
-
-class FileSystemModel(QStandardItemModel):
-    def __init__(self, root_path):
-        super().__init__()
-        self.root_path = root_path
-        self.setHorizontalHeaderLabels(['Name'])
-        self.populate_model()
-
-    def populate_model(self):
-        root_node = self.invisibleRootItem()
-        self.add_files(root_node, self.root_path)
-
-    def add_files(self, parent, path):
-        for name in os.listdir(path):
-            if name.startswith('.'):
-                continue
-            full_path = os.path.join(path, name)
-            item = QStandardItem(name)
-            item.setData(full_path, Qt.ItemDataRole.UserRole)
-            parent.appendRow(item)
-            if os.path.isdir(full_path):
-                self.add_files(item, full_path)
+from ..release_notes import previous_tag
+from .refresh import RefreshScheduler, CommitCacheWorker
+from .remote import RemoteOperationWorker
+from .speculative import SpeculativeCommitMessage
+from .review import ReviewDialog
+from .release_notes import ReleaseNotesDialog
+from .merge_preview import MergePreviewDialog
+from .workspace import Workspace
+from .metrics_panel import MetricsPanel, format_status
+from .hotspots import HotspotsPanel
+from .file_model import FileSystemModel, IGNORED_ROLE
+from .file_history import BlameDialog, FileHistoryDialog
+from .diff_view import DiffView
+
+def placeholder_model(text="Loading..."):
+    """A one-row model shown in a tree view until its real model is ready."""
+    model = QStandardItemModel()
+    model.setHorizontalHeaderLabels(['Name'])
+    item = QStandardItem(text)
+    item.setFlags(Qt.ItemFlag.NoItemFlags)
+    model.appendRow(item)
+    return model
+
+def add_placeholder(list_widget, text="Loading..."):
+    list_widget.clear()
+    list_widget.addItem(text)
+    list_widget.item(0).setFlags(Qt.ItemFlag.NoItemFlags)
 
 class GitWhipperUI(QMainWindow):
-    def __init__(self):
+    def __init__(self, repo_paths=None):
         super().__init__()
         self.setWindowTitle("GitWhipper")
         self.setGeometry(100, 100, 1400, 800)
-        self.current_dir = os.getcwd()
+        self.workspace = Workspace(parent=self)
+        for repo_path in repo_paths or [os.getcwd()]:
+            self.workspace.open(repo_path)
         self.modified_files = set()
         self.staged_files = set()
+        self.show_ignored = False
+        self.refresh_scheduler = RefreshScheduler(lambda: self.current_dir, parent=self)
+        self.remote_worker = None
+        self.commit_cache_workers = {}
+        self.panel_appliers = {}
+        self.speculative_message = SpeculativeCommitMessage(lambda: self.current_dir, parent=self)
 
         self.setup_ui()
+        self.update_repository_selector()
+        self.workspace.repositories_changed.connect(self.update_repository_selector)
+        self.workspace.activated.connect(self.show_repository)
+
+        # Show the window with placeholder panels first; load the repository once the event loop runs
+        QTimer.singleShot(0, self.update_git_status)
 
     def setup_ui(self):
         self.setup_menu_bar()
@@ -64,11 +85,17 @@ class GitWhipperUI(QMainWindow):
         project_layout = QVBoxLayout()
         
         dir_layout = QHBoxLayout()
-        self.dir_label = QLabel(f"Current Directory: {self.current_dir}")
-        dir_layout.addWidget(self.dir_label)
-        self.browse_button = QPushButton("Browse")
+        dir_layout.addWidget(QLabel("Repository:"))
+        self.repo_selector = QComboBox()
+        self.repo_selector.setSizeAdjustPolicy(QComboBox.SizeAdjustPolicy.AdjustToContents)
+        self.repo_selector.currentIndexChanged.connect(self.select_repository)
+        dir_layout.addWidget(self.repo_selector, 1)
+        self.browse_button = QPushButton("Open...")
         self.browse_button.clicked.connect(self.browse_directory)
         dir_layout.addWidget(self.browse_button)
+        self.close_repo_button = QPushButton("Close")
+        self.close_repo_button.clicked.connect(self.close_repository)
+        dir_layout.addWidget(self.close_repo_button)
         project_layout.addLayout(dir_layout)
 
         self.readme_button = QPushButton("Generate README")
@@ -131,11 +158,15 @@ class GitWhipperUI(QMainWindow):
         self.file_tree.setAcceptDrops(False)
         self.file_tree.setDropIndicatorShown(True)
         self.file_tree.setDragDropMode(QAbstractItemView.DragDropMode.DragOnly)
-        self.file_model = FileSystemModel(self.current_dir)
+        self.file_model = placeholder_model()
         self.file_tree.setModel(self.file_model)
         self.file_tree.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.file_tree.customContextMenuRequested.connect(self.show_file_context_menu)
         files_layout.addWidget(self.file_tree)
+
+        self.show_ignored_checkbox = QCheckBox("Show Ignored Files")
+        self.show_ignored_checkbox.toggled.connect(self.toggle_show_ignored)
+        files_layout.addWidget(self.show_ignored_checkbox)
         
         self.stage_all_button = QPushButton("Stage All")
         self.stage_all_button.clicked.connect(self.git_add_all)
@@ -221,17 +252,48 @@ class GitWhipperUI(QMainWindow):
         diff_layout = QVBoxLayout()
         self.diff_text = QTextEdit()
         self.diff_text.setReadOnly(True)
+        self.diff_view = DiffView(self.diff_text, parent=self)
         diff_layout.addWidget(self.diff_text)
         diff_group.setLayout(diff_layout)
         commits_layout.addWidget(diff_group)
 
         self.tab_widget.addTab(commits_tab, "Commits")
 
+        self.hotspots_panel = HotspotsPanel(lambda: self.current_dir)
+        self.tab_widget.addTab(self.hotspots_panel, "Hotspots")
+
+        self.metrics_panel = MetricsPanel()
+        self.tab_widget.addTab(self.metrics_panel, "Metrics")
+        self.tab_widget.currentChanged.connect(self.on_tab_changed)
+
         container = QWidget()
         container.setLayout(main_layout)
         self.setCentralWidget(container)
 
-        self.update_git_status()
+        self.status_label = QLabel()
+        status_bar = QStatusBar()
+        status_bar.addWidget(self.status_label, 1)
+        self.setStatusBar(status_bar)
+        self.metrics_version = -1
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.setInterval(1000)
+        self.metrics_timer.timeout.connect(self.update_metrics_display)
+        self.metrics_timer.start()
+
+        # Registration order is load priority: what the user acts on first loads first
+        self.register_panel('staged', lambda snapshot: snapshot.staged_files,
+                                        self.update_staged_files_list)
+        self.register_panel('branches', lambda snapshot: (snapshot.current_branch, snapshot.branches),
+                                        self.update_branching_panel)
+        self.register_panel('commits', lambda snapshot: snapshot.commits,
+                                        self.update_commits_list)
+        self.register_panel('files', lambda snapshot: (FileSystemModel.load(snapshot.repo_path,
+                                                                                        self.show_ignored),
+                                                                   snapshot.modified_files, snapshot.staged_files),
+                                        self.update_file_tree)
+
+        for list_widget in (self.staged_list, self.branch_list, self.commits_list):
+            add_placeholder(list_widget)
 
     def setup_menu_bar(self):
         menu_bar = QMenuBar(self)
@@ -263,13 +325,82 @@ class GitWhipperUI(QMainWindow):
         push_action = git_menu.addAction("&Push")
         push_action.triggered.connect(self.git_push)
 
+        fetch_action = git_menu.addAction("&Fetch")
+        fetch_action.triggered.connect(self.fetch_changes)
+
+        review_action = git_menu.addAction("&Review Range...")
+        review_action.triggered.connect(self.review_range)
+
+        release_notes_action = git_menu.addAction("Release &Notes...")
+        release_notes_action.triggered.connect(self.release_notes)
+
+    @property
+    def current_dir(self):
+        return self.workspace.active.repo_path
+
+    @property
+    def staged_diff_index(self):
+        return self.workspace.active.get_staged_diff_index()
+
+    def register_panel(self, name, load, apply):
+        """Register a panel with the refresh scheduler; its loaded data is also kept per repository."""
+        def store_and_apply(data):
+            self.workspace.store(name, data)
+            apply(data)
+
+        self.panel_appliers[name] = apply
+        self.workspace.register(name, load)
+        self.refresh_scheduler.register(name, load, store_and_apply)
+
     def browse_directory(self):
-        new_dir = QFileDialog.getExistingDirectory(self, "Select Directory")
+        new_dir = QFileDialog.getExistingDirectory(self, "Open Repository")
         if new_dir:
-            self.current_dir = new_dir
-            os.chdir(self.current_dir)
-            self.dir_label.setText(f"Current Directory: {self.current_dir}")
-            self.update_git_status()
+            self.workspace.open(new_dir)
+
+    def close_repository(self):
+        if len(self.workspace.repos) > 1:
+            self.workspace.close(self.current_dir)
+
+    def select_repository(self, index):
+        repo_path = self.repo_selector.itemData(index)
+        if repo_path:
+            self.workspace.activate(repo_path)
+
+    def update_repository_selector(self):
+        self.repo_selector.blockSignals(True)
+        self.repo_selector.clear()
+        for state in self.workspace.repos.values():
+            self.repo_selector.addItem(state.name, state.repo_path)
+            self.repo_selector.setItemData(self.repo_selector.count() - 1, state.repo_path,
+                                           Qt.ItemDataRole.ToolTipRole)
+        self.repo_selector.setCurrentIndex(self.repo_selector.findData(self.current_dir))
+        self.repo_selector.blockSignals(False)
+        self.close_repo_button.setEnabled(len(self.workspace.repos) > 1)
+
+    def show_repository(self, repo_path):
+        """Switch the window to another open repository.
+
+        Panels are redrawn at once from the data last loaded for it (placeholders
+        where there is none), then revalidated by a normal refresh.
+        """
+        self.refresh_scheduler.cancel()
+        self.speculative_message.cancel()
+        self.update_repository_selector()
+        self.clear_commit_details()
+        self.hotspots_panel.clear()
+        if self.tab_widget.currentWidget() is self.hotspots_panel:
+            self.hotspots_panel.load()
+        cached = dict(self.workspace.active.panel_data)
+        for name, apply in self.panel_appliers.items():
+            if name in cached:
+                apply(cached[name])
+            elif name == 'files':
+                self.file_model = placeholder_model()
+                self.file_tree.setModel(self.file_model)
+            else:
+                add_placeholder({'staged': self.staged_list, 'branches': self.branch_list,
+                                 'commits': self.commits_list}[name])
+        self.update_git_status()
 
     def update_git_status(self):
         if is_git_repo(self.current_dir):
@@ -280,10 +411,8 @@ class GitWhipperUI(QMainWindow):
             self.commit_button.setEnabled(True)
             self.push_button.setEnabled(True)
             self.readme_button.setEnabled(True)
-            self.update_commits_list()
-            self.update_staged_files_list()
-            self.update_file_tree()
-            self.update_branching_panel()
+            self.schedule_refresh()
+            self.update_commit_cache()
         else:
             self.git_status_label.setText("Not a Git repository")
             self.git_status_label.setStyleSheet("color: red")
@@ -292,54 +421,70 @@ class GitWhipperUI(QMainWindow):
             self.commit_button.setEnabled(False)
             self.push_button.setEnabled(False)
             self.readme_button.setEnabled(False)
+            self.refresh_scheduler.cancel()
             self.clear_commit_details()
             self.commits_list.clear()
             self.staged_list.clear()
 
-    def update_file_tree(self):
-        self.modified_files = set(get_modified_files(self.current_dir))
-        self.staged_files = set(get_staged_files(self.current_dir))
-        self.file_model = FileSystemModel(self.current_dir)
+    def update_commit_cache(self):
+        """Refresh the persistent commit cache in the background, then redraw the commits list."""
+        repo_path = self.current_dir
+        if repo_path in self.commit_cache_workers:
+            return
+        worker = CommitCacheWorker(repo_path, parent=self)
+
+        def on_finished():
+            del self.commit_cache_workers[repo_path]
+            worker.deleteLater()
+            if repo_path == self.current_dir:
+                self.schedule_refresh('commits')
+
+        worker.finished.connect(on_finished)
+        self.commit_cache_workers[repo_path] = worker
+        worker.start()
+
+    def schedule_refresh(self, *panels):
+        """Mark panels dirty; they are recomputed together on the next refresh tick."""
+        self.refresh_scheduler.mark_dirty(*panels)
+
+    def update_file_tree(self, data):
+        store, modified_files, staged_files = data
+        self.modified_files = set(modified_files)
+        self.staged_files = set(staged_files)
+        # Status colours are answered by the model's data(), so only visible rows are looked up
+        self.file_model = FileSystemModel(self.current_dir, store, self.modified_files, self.staged_files)
         self.file_tree.setModel(self.file_model)
-        self.highlight_files(self.file_model.invisibleRootItem())
-
-    def highlight_files(self, parent_item):
-        for row in range(parent_item.rowCount()):
-            child_item = parent_item.child(row)
-            file_path = child_item.data(Qt.ItemDataRole.UserRole)
-            if file_path in self.modified_files:
-                child_item.setForeground(QColor('red'))
-            if file_path in self.staged_files:
-                child_item.setForeground(QColor('green'))
-            if child_item.hasChildren():
-                self.highlight_files(child_item)
 
+    def toggle_show_ignored(self, checked):
+        self.show_ignored = checked
+        self.schedule_refresh('files')
+
+    @tracked('stage')
     def git_add_file(self, file_path):
         try:
             repo = git.Repo(self.current_dir)
             repo.git.add(file_path)
-            self.update_staged_files_list()
-            self.update_file_tree()
+            self.schedule_refresh('staged', 'files')
             # Removed the confirmation popup
         except git.GitCommandError as e:
             QMessageBox.warning(self, "Error", f"Failed to add {file_path}: {str(e)}")
 
+    @tracked('unstage')
     def git_remove_file(self, file_path):
         try:
             repo = git.Repo(self.current_dir)
             repo.git.reset(file_path)
-            self.update_staged_files_list()
-            self.update_file_tree()
+            self.schedule_refresh('staged', 'files')
             # Removed the confirmation popup
         except git.GitCommandError as e:
             QMessageBox.warning(self, "Error", f"Failed to remove {file_path} from staging: {str(e)}")
 
+    @tracked('stage')
     def git_add_all(self):
         try:
             repo = git.Repo(self.current_dir)
             repo.git.add(A=True)
-            self.update_staged_files_list()
-            self.update_file_tree()
+            self.schedule_refresh('staged', 'files')
         except git.GitCommandError as e:
             QMessageBox.warning(self, "Error", f"Failed to stage all files: {str(e)}")
 
@@ -348,15 +493,23 @@ class GitWhipperUI(QMainWindow):
         if not index.isValid():
             return
 
-        item = self.file_model.itemFromIndex(index)
-        file_path = item.data(Qt.ItemDataRole.UserRole)
+        file_path = index.data(Qt.ItemDataRole.UserRole)
 
         menu = QMenu()
         stage_action = menu.addAction("Git Add")
+        history_action = menu.addAction("History")
+        blame_action = menu.addAction("Blame")
+        # Ignored entries have no history, and only files can be blamed
+        history_action.setEnabled(not index.data(IGNORED_ROLE))
+        blame_action.setEnabled(not index.data(IGNORED_ROLE) and not self.file_tree.model().hasChildren(index))
         action = menu.exec(self.file_tree.viewport().mapToGlobal(position))
 
         if action == stage_action:
             self.git_add_file(file_path)
+        elif action == history_action:
+            FileHistoryDialog(self.current_dir, file_path, self).show()
+        elif action == blame_action:
+            BlameDialog(self.current_dir, file_path, self).show()
 
     def show_staged_file_context_menu(self, position):
         item = self.staged_list.itemAt(position)
@@ -386,6 +539,26 @@ class GitWhipperUI(QMainWindow):
         if action == unstage_action:
             self.git_remove_file(file_path)
 
+    def update_metrics_display(self):
+        """Redraw the status bar (and the Metrics tab, if shown) when the registry has changed."""
+        if registry.version == self.metrics_version:
+            return
+        self.metrics_version = registry.version
+        snapshot = registry.snapshot()
+        self.status_label.setText(format_status(snapshot))
+        if self.tab_widget.currentWidget() is self.metrics_panel:
+            self.metrics_panel.update_metrics(snapshot)
+
+    def on_tab_changed(self, index):
+        if self.tab_widget.widget(index) is self.metrics_panel:
+            self.metrics_panel.update_metrics(registry.snapshot())
+        elif self.tab_widget.widget(index) is self.hotspots_panel:
+            self.hotspots_panel.load()
+
+    def closeEvent(self, event):
+        self.workspace.shutdown()
+        super().closeEvent(event)
+
     def dragEnterEvent(self, event: QDragEnterEvent):
         if event.mimeData().hasText():
             event.acceptProposedAction()
@@ -398,17 +571,11 @@ class GitWhipperUI(QMainWindow):
             self.git_remove_file(file_path)
         event.acceptProposedAction()   
 
-    def update_commits_list(self):
-        self.commits_list.clear()
-        commits = get_commits(self.current_dir)
-        for commit in commits:
-            self.commits_list.addItem(f"{commit['id'][:7]} - {commit['summary']}")
-
-    def update_staged_files_list(self):
+    def update_staged_files_list(self, staged_files):
         self.staged_list.clear()
-        staged_files = get_staged_files(self.current_dir)
         for file in staged_files:
             self.staged_list.addItem(file)
+        self.speculative_message.staging_changed()
 
     def show_commit_details(self, item):
         commit_id = item.text().split(' - ')[0]
@@ -418,64 +585,127 @@ class GitWhipperUI(QMainWindow):
         self.description_text.setPlainText(details['description'])
         self.diff_text.setPlainText(details['diff'])
 
+    @tracked('staged_diff')
     def show_staged_file_diff(self, item):
         file_name = item.text()
-        diff = get_staged_changes(self.current_dir, file_name)
-        self.display_colored_diff(diff) 
+        # Served from one prefetched `git diff --staged`, rebuilt only when the index changes
+        diff = self.staged_diff_index.file_diff(file_name, max_bytes=MAX_FILE_BYTES)
+        self.display_colored_diff(diff)
 
     def clear_commit_details(self):
         self.commit_id_label.setText("Commit ID:")
         self.summary_text.clear()
         self.description_text.clear()
-        self.diff_text.clear()
+        self.diff_view.clear()
 
     def git_add(self):
         success, message = git_add_all(self.current_dir)
         self.show_message(message)
-        self.update_staged_files_list()
+        self.schedule_refresh('staged')
 
+    @tracked('generate_message')
     def generate_commit_message(self):
-        diff = get_staged_changes(self.current_dir)
-        if not diff:
-            QMessageBox.warning(self, "Warning", "No changes staged for commit message generation.")
+        pipeline = CommitPipeline(self.current_dir, message=self.speculative_message.take())
+        ok, ai_commit_message = asyncio.run(pipeline.prepare())
+        if not ok:
+            if pipeline.entries == []:
+                QMessageBox.warning(self, "Warning", "No changes staged for commit message generation.")
+            else:
+                QMessageBox.warning(self, "Error", f"Failed to generate a commit message: {ai_commit_message}")
             return
-
-        ai_commit_message = generate_commit_summary(diff)
         self.summary_text.setPlainText(ai_commit_message.split('\n\n')[0])
         self.description_text.setPlainText('\n\n'.join(ai_commit_message.split('\n\n')[1:]))
 
+    @tracked('commit')
     def commit_changes(self):
-        # First, generate the AI commit message
-        diff = get_staged_changes(self.current_dir)
-        if not diff:
-            QMessageBox.warning(self, "Warning", "No changes staged for commit.")
+        # First, generate the AI commit message; status, diff and the API connection are prepared concurrently
+        pipeline = CommitPipeline(self.current_dir, message=self.speculative_message.take())
+        ok, ai_commit_message = asyncio.run(pipeline.prepare())
+        if not ok:
+            if pipeline.entries == []:
+                QMessageBox.warning(self, "Warning", "No changes staged for commit.")
+            else:
+                QMessageBox.warning(self, "Error", f"Failed to generate a commit message: {ai_commit_message}")
             return
 
-        ai_commit_message = generate_commit_summary(diff)
-
         # Show the generated message to the user and allow them to edit it
         commit_message, ok = QInputDialog.getMultiLineText(
             self, 'Commit Message', 'Edit the commit message:', ai_commit_message)
 
         if ok and commit_message:
-            try:
-                repo = git.Repo(self.current_dir)
-                repo.index.commit(commit_message)
-                self.update_commits_list()
-                self.update_staged_files_list()
-                self.update_file_tree()
+            committed, result = asyncio.run(pipeline.finish(commit_message))
+            if committed:
+                self.schedule_refresh('commits', 'staged', 'files')
                 QMessageBox.information(self, "Success", "Changes committed successfully.")
-            except git.GitCommandError as e:
-                QMessageBox.warning(self, "Error", f"Failed to commit changes: {str(e)}")
+            else:
+                QMessageBox.warning(self, "Error", result)
         else:
             QMessageBox.information(self, "Info", "Commit cancelled.")
 
     def git_push(self):
-        success, message = git_push(self.current_dir)
-        self.show_message(message)
-        if success:
-            self.update_commits_list()
+        self.start_remote_operation("Pushing", git_push, self.current_dir, refresh=('commits',))
+
+    def fetch_changes(self):
+        self.start_remote_operation("Fetching", fetch_changes, self.current_dir, refresh=('branches',))
 
+    def start_remote_operation(self, title, operation, *args, refresh=(), **kwargs):
+        """Run a remote git operation in the background with a cancellable progress dialog."""
+        if self.remote_worker is not None:
+            QMessageBox.warning(self, "Busy", "Another remote operation is still running.")
+            return
+
+        dialog = QProgressDialog(f"{title}...", "Cancel", 0, 0, self)
+        dialog.setWindowTitle(title)
+        dialog.setMinimumDuration(0)
+        dialog.setAutoClose(False)
+        dialog.setAutoReset(False)
+
+        def on_progress(stage, current, total, rate):
+            dialog.setMaximum(total)
+            dialog.setValue(current)
+            dialog.setLabelText(f"{stage}: {current}/{total}" + (f" ({rate})" if rate else ""))
+
+        def on_completed(success, message):
+            dialog.close()
+            self.remote_worker = None
+            if success:
+                QMessageBox.information(self, "Success", message)
+            else:
+                QMessageBox.warning(self, "Error", message)
+            self.schedule_refresh(*refresh)
+
+        worker = RemoteOperationWorker(operation, *args, parent=self, **kwargs)
+        worker.progress.connect(on_progress)
+        worker.completed.connect(on_completed)
+        worker.finished.connect(worker.deleteLater)
+        dialog.canceled.connect(worker.cancel)
+        self.remote_worker = worker
+        worker.start()
+        dialog.show()
+
+    def review_range(self):
+        base, ok = QInputDialog.getText(self, "Review Range", "Base branch or commit:", text="main")
+        if not (ok and base):
+            return
+        head, ok = QInputDialog.getText(self, "Review Range", "Branch or commit to review:", text="HEAD")
+        if ok and head:
+            self.open_review(base, head)
+
+    def open_review(self, base, head):
+        dialog = ReviewDialog(self.current_dir, base, head, self)
+        dialog.show()
+
+    def release_notes(self):
+        default_base = previous_tag(self.current_dir) or ""
+        base, ok = QInputDialog.getText(self, "Release Notes", "Previous release (tag or commit):", text=default_base)
+        if not ok:
+            return
+        head, ok = QInputDialog.getText(self, "Release Notes", "This release (tag or commit):", text="HEAD")
+        if ok and head:
+            dialog = ReleaseNotesDialog(self.current_dir, base or None, head, self)
+            dialog.show()
+
+    @tracked('readme')
     def generate_readme(self):
         if is_git_repo(self.current_dir):
             generate_dynamic_readme(self.current_dir, self)
@@ -485,49 +715,34 @@ class GitWhipperUI(QMainWindow):
     def show_message(self, message):
         QMessageBox.information(self, "GitWhipper", message)
 
-    def update_commits_list(self):
+    def update_commits_list(self, commits):
         self.commits_list.clear()
-        commits = get_commits(self.current_dir)
         for commit in commits:
             commit_date = datetime.datetime.fromtimestamp(commit['timestamp'])
             formatted_date = commit_date.strftime("%Y-%m-%d %H:%M:%S")
             self.commits_list.addItem(f"{formatted_date} - {commit['id'][:7]} - {commit['summary']}")
 
+    @tracked('commit_details')
     def show_commit_details(self, item):
         commit_id = item.text().split(' - ')[1]  # Get the commit ID from the list item
-        details = get_commit_details(self.current_dir, commit_id)
+        details = get_commit_details(self.current_dir, commit_id, include_diff=False)
         self.commit_id_label.setText(f"Commit ID: {commit_id}")
         self.summary_text.setPlainText(details['summary'])
         self.description_text.setPlainText(details['description'])
-        self.display_colored_diff(details['diff'])
+        # `git show` and the highlighting both run in the diff view's worker
+        repo_path = self.current_dir
+        self.diff_view.show_diff(lambda: get_commit_diff(repo_path, commit_id))
 
     def display_colored_diff(self, diff_text):
-        self.diff_text.clear()
-        cursor = self.diff_text.textCursor()
-        lines = diff_text.split('\n')
-        for line in lines:
-            format = QTextCharFormat()
-            if line.startswith('+'):
-                format.setForeground(QBrush(QColor('green')))
-            elif line.startswith('-'):
-                format.setForeground(QBrush(QColor('red')))
-            else:
-                format.setForeground(QBrush(QColor('white')))
-            
-            cursor.insertText(line, format)
-            cursor.insertBlock()  # This inserts a new line
-
-        # Scroll to the top of the diff view
-        self.diff_text.moveCursor(QTextCursor.MoveOperation.Start)
+        self.diff_view.show_diff(diff_text)
 
-    def update_branching_panel(self):
+    def update_branching_panel(self, data):
+        current_branch, branches = data
         # Update current branch display
-        current_branch = get_current_branch(self.current_dir)
         self.current_branch_label.setText(f"Current Branch: {current_branch}")
 
         # Update branch list
         self.branch_list.clear()
-        branches = list_branches(self.current_dir)
         self.branch_list.addItems(branches)
 
     def create_new_branch(self):
@@ -535,7 +750,7 @@ class GitWhipperUI(QMainWindow):
         if ok and branch_name:
             success = create_branch(self.current_dir, branch_name)
             if success:
-                self.update_branching_panel()
+                self.schedule_refresh('branches')
                 QMessageBox.information(self, "Success", f"Branch '{branch_name}' created successfully.")
             else:
                 QMessageBox.warning(self, "Error", f"Failed to create branch '{branch_name}'.")
@@ -552,7 +767,7 @@ class GitWhipperUI(QMainWindow):
         if reply == QMessageBox.StandardButton.Yes:
             success, message = delete_branch(self.current_dir, branch_name)
             if success:
-                self.update_branching_panel()
+                self.schedule_refresh('branches')
                 QMessageBox.information(self, "Success", message)
             else:
                 QMessageBox.warning(self, "Error", message)
@@ -564,12 +779,22 @@ class GitWhipperUI(QMainWindow):
             return
 
         branch_name = selected_items[0].text()
-        reply = QMessageBox.question(self, "Confirm Merge", f"Are you sure you want to merge branch '{branch_name}' into the current branch?",
-                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
-        if reply == QMessageBox.StandardButton.Yes:
+        # The preview merges in memory; the worktree is only touched once the user confirms
+        dialog = MergePreviewDialog(self.current_dir, branch_name, parent=self)
+        if dialog.exec() == QDialog.DialogCode.Accepted:
             success, message = merge_branch(self.current_dir, branch_name)
             if success:
-                self.update_branching_panel()
+                self.schedule_refresh('branches')
+                QMessageBox.information(self, "Success", message)
+            else:
+                QMessageBox.warning(self, "Error", message)
+
+    def rebase_onto_branch(self, branch_name):
+        dialog = MergePreviewDialog(self.current_dir, branch_name, rebase=True, parent=self)
+        if dialog.exec() == QDialog.DialogCode.Accepted:
+            success, message = rebase_branch(self.current_dir, branch_name)
+            if success:
+                self.schedule_refresh('branches', 'files', 'staged')
                 QMessageBox.information(self, "Success", message)
             else:
                 QMessageBox.warning(self, "Error", message)
@@ -580,6 +805,8 @@ class GitWhipperUI(QMainWindow):
         rename_action = menu.addAction("Rename Branch")
         push_action = menu.addAction("Push Branch")
         pull_action = menu.addAction("Pull Changes")
+        review_action = menu.addAction("Review Against Current Branch")
+        rebase_action = menu.addAction("Rebase Current Branch onto This...")
 
         action = menu.exec(self.branch_list.mapToGlobal(position))
         if action:
@@ -597,13 +824,15 @@ class GitWhipperUI(QMainWindow):
                 self.push_branch(branch_name)
             elif action == pull_action:
                 self.pull_changes(branch_name)
+            elif action == review_action:
+                self.open_review(get_current_branch(self.current_dir), branch_name)
+            elif action == rebase_action:
+                self.rebase_onto_branch(branch_name)
 
     def switch_to_branch(self, branch_name):
         success, message = switch_branch(self.current_dir, branch_name)
         if success:
-            self.update_branching_panel()
-            self.update_file_tree()
-            self.update_staged_files_list()
+            self.schedule_refresh('branches', 'files', 'staged')
             QMessageBox.information(self, "Success", message)
         else:
             QMessageBox.warning(self, "Error", message)
@@ -613,31 +842,19 @@ class GitWhipperUI(QMainWindow):
         if ok and new_name:
             success, message = rename_branch(self.current_dir, old_name, new_name)
             if success:
-                self.update_branching_panel()
+                self.schedule_refresh('branches')
                 QMessageBox.information(self, "Success", message)
             else:
                 QMessageBox.warning(self, "Error", message)
 
     def push_branch(self, branch_name):
-        success, message = push_branch(self.current_dir, branch_name)
-        if success:
-            QMessageBox.information(self, "Success", message)
-        else:
-            QMessageBox.warning(self, "Error", message)
-        
         # Always update the UI to reflect current state
-        self.update_git_status()
-        self.update_branching_panel()
+        self.start_remote_operation("Pushing", push_branch, self.current_dir, branch_name,
+                                    refresh=('commits', 'staged', 'files', 'branches'))
 
     def pull_changes(self, branch_name):
-        success, message = pull_changes(self.current_dir, branch=branch_name)
-        if success:
-            self.update_branching_panel()
-            self.update_file_tree()
-            self.update_staged_files_list()
-            QMessageBox.information(self, "Success", message)
-        else:
-            QMessageBox.warning(self, "Error", message)
+        self.start_remote_operation("Pulling", pull_changes, self.current_dir, branch=branch_name,
+                                    refresh=('branches', 'files', 'staged', 'commits'))
 
 def apply_stylesheet(app):
     app.setStyle("Fusion")
@@ -702,9 +919,10 @@ def apply_stylesheet(app):
     """
     app.setStyleSheet(css)
 
-def run_app():
+def run_app(repo_paths=None):
+    count_git_subprocesses()
     app = QApplication(sys.argv)
     apply_stylesheet(app)
-    window = GitWhipperUI()
+    window = GitWhipperUI(repo_paths)
     window.show()
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,156 @@
+# gitwhisper/ui/diff_view.py
+
+import time
+
+from PyQt6.QtCore import QObject, QThread, QTimer, pyqtSignal
+from PyQt6.QtGui import QBrush, QColor, QFont, QFontDatabase, QTextBlockFormat, QTextCharFormat, QTextCursor
+from ..diff_render import render_diff
+from ..metrics import registry
+
+# Time spent inserting lines per event-loop turn, in seconds
+INSERT_BUDGET = 0.015
+
+# Foreground per line kind and per syntax token; line and emphasis backgrounds
+LINE_COLORS = {
+    'meta': '#c8c8c8', 'file': '#e5c07b', 'hunk': '#56b6c2', 'context': '#d0d0d0',
+    'added': '#b5e8b5', 'removed': '#f0b0b0', 'note': '#8a8a8a',
+}
+TOKEN_COLORS = {'keyword': '#c678dd', 'string': '#98c379', 'comment': '#7f848e', 'number': '#d19a66'}
+LINE_BACKGROUNDS = {'file': '#2b2b2b', 'hunk': '#1e2a30', 'added': '#1d3324', 'removed': '#3a1e22'}
+EMPHASIS_BACKGROUNDS = {'added': '#2e6b3c', 'removed': '#7a2f37'}
+
+def line_segments(line):
+    """Split a rendered line into (text, token kind, emphasized) runs."""
+    kind, text, tokens, emphasis = line
+    if not tokens and not emphasis:
+        return [(text, None, False)]
+    bounds = sorted({0, len(text)} | {point for start, end, _ in tokens for point in (start, end)}
+                    | {point for span in emphasis for point in span})
+    segments = []
+    for start, end in zip(bounds, bounds[1:]):
+        token = next((token_kind for s, e, token_kind in tokens if s <= start < e), None)
+        emphasized = any(s <= start < e for s, e in emphasis)
+        if segments and segments[-1][1] == token and segments[-1][2] == emphasized:
+            segments[-1] = (segments[-1][0] + text[start:end], token, emphasized)
+        else:
+            segments.append((text[start:end], token, emphasized))
+    return segments
+
+class DiffRenderWorker(QThread):
+    """Fetch (if given a loader) and render a diff off the GUI thread."""
+
+    done = pyqtSignal(int, object)
+    failed = pyqtSignal(int, str)
+
+    def __init__(self, request, source, parent=None):
+        super().__init__(parent)
+        self.request = request
+        self.source = source
+
+    def run(self):
+        try:
+            text = self.source() if callable(self.source) else self.source
+            with registry.timer('diff.render'):
+                lines = [(line[0], line_segments(line)) for line in render_diff(text)]
+            self.done.emit(self.request, lines)
+        except Exception as e:
+            self.failed.emit(self.request, str(e))
+
+class DiffView(QObject):
+    """Shows diffs in a read-only QTextEdit with syntax, word-diff and header highlighting.
+
+    Rendering runs in a worker thread; the result is inserted a few
+    milliseconds' worth of lines per event-loop turn, so large diffs never block the window. Only
+    the latest request is shown; results of earlier ones are dropped.
+    """
+
+    def __init__(self, text_edit, parent=None):
+        super().__init__(parent)
+        self.text_edit = text_edit
+        self.text_edit.setUndoRedoEnabled(False)
+        self.text_edit.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        self.request = 0
+        self.workers = set()
+        self.pending = None
+        self.first_chunk = False
+        self.char_formats = {}
+        self.block_formats = {}
+        self.insert_timer = QTimer(self)
+        self.insert_timer.setInterval(0)
+        self.insert_timer.timeout.connect(self.insert_chunk)
+
+    def show_diff(self, source):
+        """Render `source`, either diff text or a callable returning it (run in the worker)."""
+        self.clear()
+        worker = DiffRenderWorker(self.request, source, parent=self)
+        worker.done.connect(self.start_insert)
+        worker.failed.connect(self.show_error)
+        worker.finished.connect(lambda: self.workers.discard(worker))
+        worker.finished.connect(worker.deleteLater)
+        self.workers.add(worker)
+        worker.start()
+
+    def clear(self):
+        self.request += 1
+        self.insert_timer.stop()
+        self.pending = None
+        self.text_edit.clear()
+
+    def show_error(self, request, message):
+        if request == self.request:
+            self.text_edit.setPlainText(f"Could not show diff: {message}")
+
+    def start_insert(self, request, lines):
+        if request != self.request:
+            return
+        self.pending = iter(lines)
+        self.first_chunk = True
+        self.insert_chunk()
+        self.text_edit.moveCursor(QTextCursor.MoveOperation.Start)
+        if self.pending is not None:
+            self.insert_timer.start()
+
+    def insert_chunk(self):
+        if self.pending is None:
+            self.insert_timer.stop()
+            return
+        deadline = time.perf_counter() + INSERT_BUDGET
+        cursor = QTextCursor(self.text_edit.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.beginEditBlock()
+        for count, (kind, segments) in enumerate(self.pending):
+            if self.first_chunk:
+                cursor.setBlockFormat(self.block_format(kind))
+                self.first_chunk = False
+            else:
+                cursor.insertBlock(self.block_format(kind))
+            for text, token, emphasized in segments:
+                cursor.insertText(text, self.char_format(kind, token, emphasized))
+            if count % 64 == 63 and time.perf_counter() > deadline:
+                break
+        else:
+            self.pending = None
+            self.insert_timer.stop()
+        cursor.endEditBlock()
+
+    def block_format(self, kind):
+        block_format = self.block_formats.get(kind)
+        if block_format is None:
+            block_format = self.block_formats[kind] = QTextBlockFormat()
+            if kind in LINE_BACKGROUNDS:
+                block_format.setBackground(QBrush(QColor(LINE_BACKGROUNDS[kind])))
+        return block_format
+
+    def char_format(self, kind, token, emphasized):
+        key = (kind, token, emphasized)
+        char_format = self.char_formats.get(key)
+        if char_format is None:
+            char_format = self.char_formats[key] = QTextCharFormat()
+            char_format.setForeground(QBrush(QColor(TOKEN_COLORS.get(token, LINE_COLORS[kind]))))
+            if kind == 'file':
+                char_format.setFontWeight(QFont.Weight.Bold)
+            if token == 'comment' or kind == 'note':
+                char_format.setFontItalic(True)
+            if emphasized:
+                char_format.setBackground(QBrush(QColor(EMPHASIS_BACKGROUNDS[kind])))
+        return char_format
@@ -0,0 +1,235 @@
+# gitwhisper/ui/file_history.py
+
+import datetime
+from array import array
+
+import git
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt, QThread, pyqtSignal
+from PyQt6.QtGui import QColor, QFontDatabase
+from PyQt6.QtWidgets import (QAbstractItemView, QDialog, QHeaderView, QLabel, QSplitter, QTableView, QTextEdit,
+                             QTreeWidget, QTreeWidgetItem, QVBoxLayout)
+from ..file_history import cached_or_stream, file_diff, file_lines, iter_blame, iter_file_history, resolve_head
+from ..metrics import action
+from .diff_view import DiffView
+
+def format_date(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d')
+
+class FileHistoryWorker(QThread):
+    """Stream a file's history or blame off the GUI thread, emitting entries in batches.
+
+    For blame, the file's lines are emitted first, so they can be shown
+    before any line has been attributed.
+    """
+
+    lines = pyqtSignal(object)
+    batch = pyqtSignal(object)
+    done = pyqtSignal(int)
+    failed = pyqtSignal(str)
+
+    def __init__(self, repo_path, path, kind, parent=None):
+        super().__init__(parent)
+        self.repo_path = repo_path
+        self.path = path
+        self.kind = kind
+
+    def run(self):
+        try:
+            with action(f'file_{self.kind}'):
+                head = resolve_head(self.repo_path)
+                if self.kind == 'blame':
+                    self.lines.emit(file_lines(self.repo_path, self.path, head))
+                    stream = iter_blame
+                else:
+                    stream = iter_file_history
+                entries = cached_or_stream(self.repo_path, self.path, self.kind, stream, self.batch.emit, head,
+                                           stop_requested=self.isInterruptionRequested)
+            if not self.isInterruptionRequested():
+                self.done.emit(len(entries))
+        except Exception as e:
+            self.failed.emit(str(e))
+
+def repository_root(repo_path):
+    # File tree paths are relative to the root, and git resolves paths against the working directory
+    return git.Repo(repo_path, search_parent_directories=True).working_tree_dir
+
+class FileHistoryDialog(QDialog):
+    """The commits that changed a file, following renames; selecting one shows its diff of the file."""
+
+    def __init__(self, repo_path, path, parent=None):
+        super().__init__(parent)
+        self.repo_path = repository_root(repo_path)
+        self.setWindowTitle(f"History: {path}")
+        self.setGeometry(150, 150, 900, 700)
+
+        layout = QVBoxLayout()
+        self.status_label = QLabel("Loading history...")
+        layout.addWidget(self.status_label)
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        self.commits_tree = QTreeWidget()
+        self.commits_tree.setHeaderLabels(['Commit', 'Date', 'Author', 'Summary', 'Changes', 'Path'])
+        self.commits_tree.setRootIsDecorated(False)
+        self.commits_tree.setColumnWidth(3, 350)
+        self.commits_tree.currentItemChanged.connect(self.show_commit)
+        splitter.addWidget(self.commits_tree)
+        self.diff_text = QTextEdit()
+        self.diff_text.setReadOnly(True)
+        splitter.addWidget(self.diff_text)
+        layout.addWidget(splitter)
+        self.setLayout(layout)
+        self.diff_view = DiffView(self.diff_text, parent=self)
+
+        self.worker = FileHistoryWorker(self.repo_path, path, 'history', parent=self)
+        self.worker.batch.connect(self.add_commits)
+        self.worker.done.connect(lambda count: self.status_label.setText(f"{count} commits changed {path}."))
+        self.worker.failed.connect(lambda message: self.status_label.setText(f"History failed: {message}"))
+        self.worker.start()
+
+    def done(self, result):
+        # Closing the dialog stops a history that is still streaming
+        self.worker.requestInterruption()
+        super().done(result)
+
+    def add_commits(self, entries):
+        items = []
+        for entry in entries:
+            changes = "bin" if entry['added'] is None else f"+{entry['added']}/-{entry['removed']}"
+            item = QTreeWidgetItem([entry['sha'][:8], format_date(entry['authored_date']), entry['author_name'],
+                                    entry['subject'], changes, entry['path']])
+            item.setData(0, Qt.ItemDataRole.UserRole, entry)
+            items.append(item)
+        self.commits_tree.addTopLevelItems(items)
+        self.status_label.setText(f"Loading history... {self.commits_tree.topLevelItemCount()} commits")
+        if self.commits_tree.currentItem() is None:
+            self.commits_tree.setCurrentItem(items[0])
+
+    def show_commit(self, item, previous=None):
+        if item is None:
+            return
+        entry = item.data(0, Qt.ItemDataRole.UserRole)
+        paths = list(dict.fromkeys([entry['old_path'], entry['path']]))
+        self.diff_view.show_diff(lambda: file_diff(self.repo_path, entry['sha'], paths))
+
+class BlameModel(QAbstractTableModel):
+    """A file's lines with the commit each one was last changed in, filled in as blame runs.
+
+    Each line holds an index into the list of commits seen so far, or -1
+    while it is not attributed yet.
+    """
+
+    HEADERS = ['Commit', 'Author', 'Date', 'Line', 'Code']
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.lines = []
+        self.owners = array('i')
+        self.commits = []
+        self.commit_index = {}
+        self.attributed = 0
+
+    def set_lines(self, lines):
+        self.beginResetModel()
+        self.lines = lines
+        self.owners = array('i', [-1]) * len(lines)
+        self.endResetModel()
+
+    def add_entries(self, entries):
+        first, last = len(self.lines), -1
+        for entry in entries:
+            index = self.commit_index.get(entry['sha'])
+            if index is None:
+                index = self.commit_index[entry['sha']] = len(self.commits)
+                self.commits.append(dict(entry.get('commit', {}), sha=entry['sha']))
+            elif 'commit' in entry:
+                self.commits[index].update(entry['commit'])
+            start = entry['line'] - 1
+            end = min(start + entry['count'], len(self.lines))
+            self.owners[start:end] = array('i', [index]) * (end - start)
+            self.attributed += end - start
+            first, last = min(first, start), max(last, end - 1)
+        if last >= first:
+            self.dataChanged.emit(self.index(first, 0), self.index(last, 2))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.lines)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        owner = self.owners[row]
+        commit = self.commits[owner] if owner >= 0 else None
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 3:
+                return str(row + 1)
+            if column == 4:
+                return self.lines[row]
+            if commit is None:
+                return ''
+            if column == 0:
+                return commit['sha'][:8]
+            if column == 1:
+                return commit.get('author', '')
+            return format_date(commit['author_time']) if 'author_time' in commit else ''
+        if role == Qt.ItemDataRole.ToolTipRole and commit is not None and column < 3:
+            return commit.get('summary')
+        if role == Qt.ItemDataRole.ForegroundRole and column < 4:
+            return QColor('gray')
+        return None
+
+class BlameDialog(QDialog):
+    """The file at HEAD with, per line, the commit that last changed it.
+
+    The text is shown as soon as it is read; attributions appear as
+    `git blame --incremental` settles them, most recent commits first.
+    """
+
+    def __init__(self, repo_path, path, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Blame: {path}")
+        self.setGeometry(150, 150, 1000, 700)
+
+        layout = QVBoxLayout()
+        self.status_label = QLabel("Loading blame...")
+        layout.addWidget(self.status_label)
+        self.model = BlameModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setShowGrid(False)
+        self.table.setWordWrap(False)
+        self.table.verticalHeader().hide()
+        # Fixed sizes, so the view never measures every row
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(self.table.fontMetrics().height() + 2)
+        for column, width in enumerate((80, 140, 90, 55)):
+            self.table.setColumnWidth(column, width)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+        self.setLayout(layout)
+
+        self.worker = FileHistoryWorker(repository_root(repo_path), path, 'blame', parent=self)
+        self.worker.lines.connect(self.model.set_lines)
+        self.worker.batch.connect(self.add_entries)
+        self.worker.done.connect(lambda count: self.status_label.setText(
+            f"{len(self.model.lines)} lines from {len(self.model.commits)} commits."))
+        self.worker.failed.connect(lambda message: self.status_label.setText(f"Blame failed: {message}"))
+        self.worker.start()
+
+    def done(self, result):
+        # Closing the dialog stops a blame that is still running
+        self.worker.requestInterruption()
+        super().done(result)
+
+    def add_entries(self, entries):
+        self.model.add_entries(entries)
+        self.status_label.setText(f"Loading blame... {self.model.attributed} of {len(self.model.lines)} lines")
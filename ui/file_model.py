@@ -0,0 +1,235 @@
+# gitwhisper/ui/file_model.py
+
+import os
+import sys
+from array import array
+
+import git
+from PyQt6.QtCore import QAbstractItemModel, QMimeData, QModelIndex, Qt
+from PyQt6.QtGui import QColor
+from PyQt6.QtWidgets import QApplication, QStyle
+from ..git_utils import build_path_tree, list_ignored_entries, list_worktree_files
+
+# Extra item role used by the Files tree
+IGNORED_ROLE = Qt.ItemDataRole.UserRole + 1
+
+# Node flags
+DIRECTORY = 1
+IGNORED = 2
+UNLISTED = 4
+
+# Stand-ins for the children of ignored entries in a path tree
+_IGNORED_FILE = 'ignored file'
+_IGNORED_DIR = 'ignored directory'
+
+class PathStore:
+    """A path tree flattened into parallel arrays, one slot per node.
+
+    Nodes are numbered breadth first, so the children of a node are
+    consecutive: node `first_child[n] + row` is row `row` of node `n`, and a
+    node's row is its distance from its parent's first child. Names are
+    interned, so repeated segments (`src`, `__init__.py`) are stored once.
+    Node 0 is the repository root. Building the store does not need Qt, so it
+    can run off the GUI thread.
+    """
+
+    __slots__ = ('names', 'parent', 'first_child', 'child_count', 'flags')
+
+    def __init__(self, tree: dict):
+        self.names = ['']
+        self.parent = array('i', [-1])
+        self.first_child = array('i', [0])
+        self.child_count = array('i', [0])
+        self.flags = bytearray([DIRECTORY])
+        pending = [(0, tree)]
+        while pending:
+            next_pending = []
+            for node, children in pending:
+                self.first_child[node] = len(self.names)
+                self.child_count[node] = len(children)
+                # Directories first, then files, each alphabetically
+                for name, value in sorted(children.items(), key=_sort_key):
+                    child = self._append(name, node, _flags(value))
+                    if isinstance(value, dict):
+                        next_pending.append((child, value))
+            pending = next_pending
+
+    def _append(self, name: str, parent: int, flags: int) -> int:
+        self.names.append(sys.intern(name))
+        self.parent.append(parent)
+        self.first_child.append(0)
+        self.child_count.append(0)
+        self.flags.append(flags)
+        return len(self.names) - 1
+
+    def __len__(self):
+        return len(self.names)
+
+    def __sizeof__(self):
+        # Interned names are shared with the rest of the process, so only the columns are counted
+        return object.__sizeof__(self) + sum(sys.getsizeof(column) for column in
+                                             (self.names, self.parent, self.first_child, self.child_count,
+                                              self.flags))
+
+    def path(self, node: int) -> str:
+        parts = []
+        while node > 0:
+            parts.append(self.names[node])
+            node = self.parent[node]
+        return '/'.join(reversed(parts))
+
+    def row(self, node: int) -> int:
+        return node - self.first_child[self.parent[node]]
+
+    def list_unlisted(self, node: int, entries) -> int:
+        """Attach (name, is_dir) entries as the children of an unlisted ignored directory."""
+        self.first_child[node] = len(self.names)
+        for name, is_dir in entries:
+            self._append(name, node, IGNORED | (DIRECTORY | UNLISTED if is_dir else 0))
+        self.child_count[node] = len(self.names) - self.first_child[node]
+        self.flags[node] &= ~UNLISTED
+        return self.child_count[node]
+
+def _sort_key(entry):
+    name, value = entry
+    return (not isinstance(value, dict) and value is not _IGNORED_DIR, name.lower())
+
+def _flags(value) -> int:
+    if value is _IGNORED_DIR:
+        return DIRECTORY | IGNORED | UNLISTED
+    if value is _IGNORED_FILE:
+        return IGNORED
+    return DIRECTORY if isinstance(value, dict) else 0
+
+def add_ignored_entries(tree: dict, entries) -> dict:
+    """Merge `git ls-files --ignored --directory` entries into a path tree from build_path_tree."""
+    for entry in entries:
+        parts = entry.rstrip('/').split('/')
+        node = tree
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node.setdefault(parts[-1], _IGNORED_DIR if entry.endswith('/') else _IGNORED_FILE)
+    return tree
+
+class FileSystemModel(QAbstractItemModel):
+    """The Files tree, built from the git index rather than a directory walk.
+
+    The model reads from a PathStore rather than holding an item per file;
+    names, status colours and icons are worked out in `data()` for the rows
+    the view asks for. UserRole data is the path relative to the repository
+    root, which is also how git reports modified and staged files. Ignored
+    entries are only included on request, and the contents of an ignored
+    directory are listed when it is first expanded.
+    """
+
+    def __init__(self, root_path, store=None, modified_files=(), staged_files=(), parent=None):
+        super().__init__(parent)
+        self.root_path = root_path
+        self.store = FileSystemModel.load(root_path) if store is None else store
+        self.modified_files = set(modified_files)
+        self.staged_files = set(staged_files)
+        style = QApplication.style()
+        self.icons = ({DIRECTORY: style.standardIcon(QStyle.StandardPixmap.SP_DirIcon),
+                       0: style.standardIcon(QStyle.StandardPixmap.SP_FileIcon)} if style is not None else {})
+
+    @staticmethod
+    def load(path, show_ignored=False):
+        """Read the tree (and optionally the ignored entries) from git. Safe to call off the GUI thread."""
+        tree = build_path_tree(list_worktree_files(path))
+        if show_ignored:
+            add_ignored_entries(tree, list_ignored_entries(path))
+        return PathStore(tree)
+
+    def _node(self, index):
+        return index.internalId() if index.isValid() else 0
+
+    def index(self, row, column, parent=QModelIndex()):
+        node = self._node(parent)
+        if column != 0 or not 0 <= row < self.store.child_count[node]:
+            return QModelIndex()
+        # The node number is the index's internal id
+        return self.createIndex(row, 0, self.store.first_child[node] + row)
+
+    def parent(self, index=QModelIndex()):
+        if not index.isValid():
+            return QModelIndex()
+        node = self.store.parent[index.internalId()]
+        if node <= 0:
+            return QModelIndex()
+        return self.createIndex(self.store.row(node), 0, node)
+
+    def rowCount(self, parent=QModelIndex()):
+        return self.store.child_count[self._node(parent)] if parent.column() <= 0 else 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self._node(parent)
+        return self.store.child_count[node] > 0 or bool(self.store.flags[node] & UNLISTED)
+
+    def canFetchMore(self, parent):
+        return bool(self.store.flags[self._node(parent)] & UNLISTED)
+
+    def fetchMore(self, parent):
+        """List an ignored directory's contents from disk the first time it is expanded."""
+        node = self._node(parent)
+        if not self.store.flags[node] & UNLISTED:
+            return
+        root = git.Repo(self.root_path, search_parent_directories=True).working_tree_dir
+        try:
+            entries = sorted(((entry.name, entry.is_dir(follow_symlinks=False))
+                              for entry in os.scandir(os.path.join(root, self.store.path(node)))),
+                             key=lambda entry: (not entry[1], entry[0].lower()))
+        except OSError:
+            entries = []
+        if not entries:
+            self.store.flags[node] &= ~UNLISTED
+            return
+        self.beginInsertRows(parent, 0, len(entries) - 1)
+        self.store.list_unlisted(node, entries)
+        self.endInsertRows()
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return 'Name'
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalId()
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.store.names[node]
+        if role == Qt.ItemDataRole.UserRole:
+            return self.store.path(node)
+        flags = self.store.flags[node]
+        if role == Qt.ItemDataRole.ForegroundRole:
+            if flags & IGNORED:
+                return QColor('gray')
+            path = self.store.path(node)
+            if path in self.staged_files:
+                return QColor('green')
+            if path in self.modified_files:
+                return QColor('red')
+            return None
+        if role == Qt.ItemDataRole.DecorationRole:
+            return self.icons.get(flags & DIRECTORY)
+        if role == IGNORED_ROLE:
+            return bool(flags & IGNORED)
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsDragEnabled
+
+    def mimeTypes(self):
+        return ['text/plain']
+
+    def mimeData(self, indexes):
+        # The window's drop handler stages the dragged path
+        mime_data = QMimeData()
+        if indexes:
+            mime_data.setText(self.data(indexes[0], Qt.ItemDataRole.UserRole))
+        return mime_data
@@ -0,0 +1,134 @@
+# gitwhisper/ui/hotspots.py
+
+import time
+
+import git
+from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtWidgets import (QHBoxLayout, QLabel, QPushButton, QSplitter, QTreeWidget, QTreeWidgetItem,
+                             QVBoxLayout, QWidget)
+from ..analytics import analyze_history, files_at
+from ..metrics import action
+
+# Rows shown in each list
+MAX_ROWS = 200
+
+class HotspotsWorker(QThread):
+    """Run the history analysis for one commit off the GUI thread."""
+
+    done = pyqtSignal(object, object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, repo_path, head, parent=None):
+        super().__init__(parent)
+        self.repo_path = repo_path
+        self.head = head
+
+    def run(self):
+        try:
+            with action('hotspots'):
+                analytics = analyze_history(self.repo_path, self.head)
+                existing = files_at(self.repo_path, self.head)
+                result = {'commits': analytics.commit_count,
+                          'hotspots': analytics.hotspots(MAX_ROWS, existing),
+                          'directories': analytics.directory_churn(2, existing)[:MAX_ROWS],
+                          'pairs': analytics.co_changes(MAX_ROWS, existing)}
+            self.done.emit((self.repo_path, self.head), result)
+        except Exception as e:
+            self.failed.emit(str(e))
+
+def numeric_item(values):
+    item = QTreeWidgetItem([str(value) for value in values])
+    for column in range(1, len(values)):
+        item.setTextAlignment(column, Qt.AlignmentFlag.AlignRight)
+    return item
+
+class HotspotsPanel(QWidget):
+    """Files that change most often and most recently, busy directories and files changed together.
+
+    The analysis runs when the tab is shown and is kept per (repository, HEAD),
+    so switching back and forth costs nothing until a new commit lands.
+    """
+
+    def __init__(self, get_repo_path, parent=None):
+        super().__init__(parent)
+        self.get_repo_path = get_repo_path
+        self.repo_path = None
+        self.results = {}
+        self.worker = None
+
+        layout = QVBoxLayout(self)
+        header = QHBoxLayout()
+        self.status_label = QLabel("")
+        header.addWidget(self.status_label)
+        header.addStretch()
+        refresh_button = QPushButton("Refresh")
+        refresh_button.clicked.connect(lambda: self.load(force=True))
+        header.addWidget(refresh_button)
+        layout.addLayout(header)
+
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        self.files_tree = QTreeWidget()
+        self.files_tree.setHeaderLabels(['Path', 'Score', 'Commits', 'Lines changed', 'Authors', 'Last changed'])
+        self.files_tree.setColumnWidth(0, 380)
+        self.files_tree.setRootIsDecorated(False)
+        splitter.addWidget(self.files_tree)
+        self.directories_tree = QTreeWidget()
+        self.directories_tree.setHeaderLabels(['Directory', 'Lines changed', 'File commits', 'Files'])
+        self.directories_tree.setColumnWidth(0, 380)
+        self.directories_tree.setRootIsDecorated(False)
+        splitter.addWidget(self.directories_tree)
+        self.pairs_tree = QTreeWidget()
+        self.pairs_tree.setHeaderLabels(['File', 'Changed with', 'Commits together'])
+        self.pairs_tree.setColumnWidth(0, 300)
+        self.pairs_tree.setColumnWidth(1, 300)
+        self.pairs_tree.setRootIsDecorated(False)
+        splitter.addWidget(self.pairs_tree)
+        layout.addWidget(splitter)
+
+    def clear(self):
+        for tree in (self.files_tree, self.directories_tree, self.pairs_tree):
+            tree.clear()
+        self.status_label.setText("")
+
+    def load(self, force=False):
+        """Show the analysis for the current HEAD, computing it if needed."""
+        if self.worker is not None and self.worker.isRunning():
+            return
+        self.repo_path = self.get_repo_path()
+        try:
+            head = git.Repo(self.repo_path).head.commit.hexsha
+        except (git.InvalidGitRepositoryError, git.NoSuchPathError, ValueError):
+            self.status_label.setText("No commits to analyse")
+            return
+        key = (self.repo_path, head)
+        if key in self.results and not force:
+            self.show_results(key, self.results[key])
+            return
+        self.status_label.setText("Analysing history...")
+        self.worker = HotspotsWorker(self.repo_path, head, parent=self)
+        self.worker.done.connect(self.store_results)
+        self.worker.failed.connect(lambda message: self.status_label.setText(f"Analysis failed: {message}"))
+        self.worker.start()
+
+    def store_results(self, key, result):
+        self.results[key] = result
+        if key[0] == self.get_repo_path():
+            self.show_results(key, result)
+        elif self.isVisible():
+            # The repository changed while this one was being analysed
+            self.load()
+
+    def show_results(self, key, result):
+        self.status_label.setText(f"{result['commits']} commits analysed at {key[1][:10]}")
+        self.files_tree.clear()
+        for row in result['hotspots']:
+            last_changed = time.strftime('%Y-%m-%d', time.localtime(row['last_changed']))
+            self.files_tree.addTopLevelItem(numeric_item(
+                [row['path'], f"{row['hotspot']:.2f}", row['commits'], row['churn'], row['authors'], last_changed]))
+        self.directories_tree.clear()
+        for row in result['directories']:
+            self.directories_tree.addTopLevelItem(numeric_item(
+                [row['directory'], row['churn'], row['file_commits'], row['files']]))
+        self.pairs_tree.clear()
+        for a, b, together in result['pairs']:
+            self.pairs_tree.addTopLevelItem(numeric_item([a, b, together]))
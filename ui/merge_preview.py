@@ -0,0 +1,129 @@
+# gitwhisper/ui/merge_preview.py
+
+from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtGui import QColor
+from PyQt6.QtWidgets import (QDialog, QHBoxLayout, QLabel, QPushButton, QSplitter, QTextEdit, QTreeWidget,
+                             QTreeWidgetItem, QVBoxLayout)
+from ..merge_preview import preview_merge, preview_rebase, summarize_preview
+from ..metrics import action
+
+class MergePreviewWorker(QThread):
+    """Compute a merge or rebase preview off the GUI thread, then optionally summarize it."""
+
+    done = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, repo_path, branch, rebase=False, preview=None, parent=None):
+        super().__init__(parent)
+        self.repo_path = repo_path
+        self.branch = branch
+        self.rebase = rebase
+        self.preview = preview
+
+    def run(self):
+        try:
+            with action('merge_preview'):
+                if self.preview is not None:
+                    self.done.emit(summarize_preview(self.repo_path, self.preview))
+                elif self.rebase:
+                    self.done.emit(preview_rebase(self.repo_path, self.branch))
+                else:
+                    self.done.emit(preview_merge(self.repo_path, self.branch))
+        except Exception as e:
+            self.failed.emit(str(e))
+
+class MergePreviewDialog(QDialog):
+    """Conflicts and diff stats of merging `branch` into (or rebasing onto it) the current branch.
+
+    Nothing in the worktree or index changes until the Merge or Rebase
+    button is pressed, which accepts the dialog.
+    """
+
+    def __init__(self, repo_path, branch, rebase=False, parent=None):
+        super().__init__(parent)
+        self.repo_path = repo_path
+        self.preview = None
+        verb = "Rebase" if rebase else "Merge"
+        self.setWindowTitle(f"Preview {verb}: {'onto ' if rebase else ''}{branch}")
+        self.setGeometry(150, 150, 800, 650)
+
+        layout = QVBoxLayout()
+        self.status_label = QLabel("Computing merge...")
+        self.status_label.setWordWrap(True)
+        layout.addWidget(self.status_label)
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        self.files_tree = QTreeWidget()
+        self.files_tree.setHeaderLabels(['Path', 'Added', 'Removed', 'Conflict'])
+        self.files_tree.setColumnWidth(0, 400)
+        self.files_tree.setRootIsDecorated(False)
+        splitter.addWidget(self.files_tree)
+        self.summary_edit = QTextEdit()
+        self.summary_edit.setReadOnly(True)
+        self.summary_edit.setPlaceholderText("Summarize the incoming changes to see what this merge brings in.")
+        splitter.addWidget(self.summary_edit)
+        layout.addWidget(splitter)
+
+        buttons = QHBoxLayout()
+        self.summarize_button = QPushButton("Summarize Incoming Changes")
+        self.summarize_button.setEnabled(False)
+        self.summarize_button.clicked.connect(self.summarize)
+        buttons.addWidget(self.summarize_button)
+        buttons.addStretch()
+        self.proceed_button = QPushButton(verb)
+        self.proceed_button.setEnabled(False)
+        self.proceed_button.clicked.connect(self.accept)
+        buttons.addWidget(self.proceed_button)
+        cancel_button = QPushButton("Cancel")
+        cancel_button.clicked.connect(self.reject)
+        buttons.addWidget(cancel_button)
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+
+        self.worker = MergePreviewWorker(repo_path, branch, rebase, parent=self)
+        self.worker.done.connect(self.show_preview)
+        self.worker.failed.connect(lambda message: self.status_label.setText(f"Preview failed: {message}"))
+        self.worker.start()
+
+    def show_preview(self, preview):
+        self.preview = preview
+        metrics = preview.metrics
+        status = (f"{preview.incoming} incoming, {preview.outgoing} local commits; {metrics.file_count} files "
+                  f"changed (+{metrics.total_added}/-{metrics.total_removed}). ")
+        status += f"{len(preview.conflicts)} conflicting files." if preview.conflicts else "Merges cleanly."
+        if preview.approximate:
+            status += " A rebase replays commits one at a time, so its conflicts may differ from this merge."
+        self.status_label.setText(status)
+
+        conflicts = {conflict['path']: conflict for conflict in preview.conflicts}
+        # Conflicted files first, including ones the merged tree leaves as they are in the current branch
+        stats = {file['path']: file for file in metrics.files}
+        for path in list(conflicts) + [path for path in stats if path not in conflicts]:
+            file = stats.get(path)
+            if file is None:
+                added = removed = ""
+            elif file['binary']:
+                added = removed = "bin"
+            else:
+                added, removed = str(file['added']), str(file['removed'])
+            if file is not None and file['old_path'] != path:
+                path_text = f"{file['old_path']} -> {path}"
+            else:
+                path_text = path
+            conflict = conflicts.get(path)
+            item = QTreeWidgetItem([path_text, added, removed, ", ".join(conflict['types']) if conflict else ""])
+            if conflict:
+                item.setToolTip(3, "\n".join(conflict['messages']))
+                for column in range(4):
+                    item.setForeground(column, QColor('red'))
+            self.files_tree.addTopLevelItem(item)
+        self.summarize_button.setEnabled(preview.incoming > 0)
+        self.proceed_button.setEnabled(True)
+
+    def summarize(self):
+        self.summarize_button.setEnabled(False)
+        self.summary_edit.setPlainText("Summarizing incoming changes...")
+        self.summary_worker = MergePreviewWorker(self.repo_path, None, preview=self.preview, parent=self)
+        self.summary_worker.done.connect(self.summary_edit.setPlainText)
+        self.summary_worker.failed.connect(
+            lambda message: self.summary_edit.setPlainText(f"Summary failed: {message}"))
+        self.summary_worker.start()
@@ -0,0 +1,92 @@
+# gitwhisper/ui/metrics_panel.py
+
+from PyQt6.QtWidgets import (QFileDialog, QHBoxLayout, QPushButton, QTreeWidget, QTreeWidgetItem,
+                             QVBoxLayout, QWidget)
+from ..metrics import registry
+
+def format_duration(seconds):
+    return f"{seconds * 1000:.0f} ms" if seconds < 1 else f"{seconds:.1f} s"
+
+def format_count(value):
+    return f"{value / 1000:.1f}k" if value >= 1000 else str(value)
+
+def format_status(snapshot, panels=('staged', 'branches', 'commits', 'files')):
+    """One-line summary of a registry snapshot for the status bar."""
+    counters, timings = snapshot['counters'], snapshot['timings']
+    parts = []
+    refresh = [f"{panel} {format_duration(timings[f'refresh.{panel}']['last'])}"
+               for panel in panels if f'refresh.{panel}' in timings]
+    if refresh:
+        parts.append("Refresh: " + ", ".join(refresh))
+    if 'llm.total' in timings:
+        first_token = timings.get('llm.time_to_first_token', {}).get('last')
+        llm = f"LLM: total {format_duration(timings['llm.total']['last'])}"
+        if first_token is not None:
+            llm += f", first token {format_duration(first_token)}"
+        parts.append(llm)
+    if counters.get('llm.requests'):
+        parts.append(f"Tokens: {format_count(counters.get('llm.input_tokens', 0))} in, "
+                     f"{format_count(counters.get('llm.output_tokens', 0))} out, "
+                     f"{format_count(counters.get('llm.cache_read_input_tokens', 0))} cached")
+    rates = [f"{cache} {rate:.0%}" for cache, rate in snapshot['cache_hit_rates'].items() if rate is not None]
+    if rates:
+        parts.append("Cache hits: " + ", ".join(rates))
+    git_processes = sum(value for name, value in counters.items() if name.startswith('git.subprocess.'))
+    if git_processes:
+        parts.append(f"git processes: {git_processes}")
+    return "  |  ".join(parts)
+
+class MetricsPanel(QWidget):
+    """Every counter, timing and cache hit rate in the metrics registry, with a JSON export."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(['Metric', 'Value', 'Count', 'Average', 'Max'])
+        self.tree.setColumnWidth(0, 320)
+        self.collapsed = set()
+        self.tree.itemCollapsed.connect(lambda item: self.collapsed.add(item.text(0)))
+        self.tree.itemExpanded.connect(lambda item: self.collapsed.discard(item.text(0)))
+        layout.addWidget(self.tree)
+
+        buttons = QHBoxLayout()
+        dump_button = QPushButton("Dump JSON...")
+        dump_button.clicked.connect(self.dump_json)
+        buttons.addWidget(dump_button)
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(registry.reset)
+        buttons.addWidget(reset_button)
+        buttons.addStretch()
+        layout.addLayout(buttons)
+
+    def update_metrics(self, snapshot):
+        self.tree.clear()
+
+        timings = QTreeWidgetItem(['Timings'])
+        for name, timing in sorted(snapshot['timings'].items()):
+            timings.addChild(QTreeWidgetItem([name, format_duration(timing['last']), str(timing['count']),
+                                              format_duration(timing['total'] / timing['count']),
+                                              format_duration(timing['max'])]))
+        git_processes = QTreeWidgetItem(['git processes per action'])
+        counters = QTreeWidgetItem(['Counters'])
+        for name, value in sorted(snapshot['counters'].items()):
+            if name.startswith('git.subprocess.'):
+                git_processes.addChild(QTreeWidgetItem([name[len('git.subprocess.'):], str(value)]))
+            elif not name.startswith('cache.'):
+                counters.addChild(QTreeWidgetItem([name, str(value)]))
+        caches = QTreeWidgetItem(['Cache hit rates'])
+        for cache, rate in snapshot['cache_hit_rates'].items():
+            hits = snapshot['counters'].get(f'cache.{cache}.hit', 0)
+            misses = snapshot['counters'].get(f'cache.{cache}.miss', 0)
+            caches.addChild(QTreeWidgetItem([cache, f"{rate:.0%}" if rate is not None else "-",
+                                             str(hits + misses)]))
+
+        for item in (timings, git_processes, counters, caches):
+            self.tree.addTopLevelItem(item)
+            item.setExpanded(item.text(0) not in self.collapsed)
+
+    def dump_json(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Dump Metrics", "gitwhisper-metrics.json", "JSON (*.json)")
+        if path:
+            registry.dump_json(path)
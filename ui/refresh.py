@@ -0,0 +1,121 @@
+# gitwhisper/ui/refresh.py
+
+import time
+import git
+from PyQt6.QtCore import QObject, QThread, QTimer, pyqtSignal
+from ..commit_cache import CommitCache
+from ..git_utils import RepoSnapshot
+from ..metrics import action, registry
+
+class RefreshWorker(QThread):
+    """Load panel data from one RepoSnapshot off the GUI thread, in priority order."""
+
+    loaded = pyqtSignal(str, object)
+
+    def __init__(self, repo_path, loaders, parent=None):
+        super().__init__(parent)
+        self.repo_path = repo_path
+        self.loaders = loaders
+
+    def run(self):
+        snapshot = RepoSnapshot(self.repo_path)
+        for name, load in self.loaders:
+            try:
+                with action(f'refresh.{name}'):
+                    data = load(snapshot)
+            except Exception as e:
+                print(f"Error refreshing {name}: {str(e)}")
+                continue
+            self.loaded.emit(name, data)
+
+class RefreshScheduler(QObject):
+    """Coalesce panel refresh requests into a single debounced tick.
+
+    Handlers call `mark_dirty` with the panels they invalidated instead of
+    refreshing them directly. When the timer fires, every dirty panel is
+    loaded exactly once from a shared `RepoSnapshot` on a worker thread, in
+    registration (priority) order, and each panel is applied on the GUI
+    thread as soon as its data arrives. `idle` is emitted once nothing is
+    dirty or loading.
+    """
+
+    idle = pyqtSignal()
+
+    def __init__(self, repo_path_getter, delay_ms=30, parent=None):
+        super().__init__(parent)
+        self.repo_path_getter = repo_path_getter
+        self.panels = {}
+        self.dirty = set()
+        self.worker = None
+        self.generation = 0
+        self.flushed_at = 0.0
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay_ms)
+        self.timer.timeout.connect(self.flush)
+
+    def register(self, name, load, apply):
+        """Register a panel.
+
+        `load(snapshot)` runs on the worker thread and returns plain data;
+        `apply(data)` updates the widgets on the GUI thread. Panels load in
+        registration order.
+        """
+        self.panels[name] = (load, apply)
+
+    def mark_dirty(self, *names):
+        """Mark panels (all panels if none given) for the next tick and restart the debounce timer."""
+        self.dirty.update(names or self.panels)
+        self.timer.start()
+
+    def cancel(self):
+        """Drop any pending refresh and ignore results still being loaded."""
+        self.timer.stop()
+        self.dirty.clear()
+        self.generation += 1
+
+    def flush(self):
+        """Start loading all dirty panels now (or as soon as the current load finishes)."""
+        self.timer.stop()
+        if self.worker is not None or not self.dirty:
+            return
+        dirty, self.dirty = self.dirty, set()
+        loaders = [(name, load) for name, (load, _) in self.panels.items() if name in dirty]
+        generation = self.generation
+        self.flushed_at = time.perf_counter()
+        worker = RefreshWorker(self.repo_path_getter(), loaders, parent=self)
+        worker.loaded.connect(lambda name, data: self._apply(generation, name, data))
+        worker.finished.connect(self._finished)
+        self.worker = worker
+        worker.start()
+
+    def _apply(self, generation, name, data):
+        if generation == self.generation:
+            self.panels[name][1](data)
+            # From the start of the tick until the panel shows its data
+            registry.observe(f'refresh.{name}', time.perf_counter() - self.flushed_at)
+
+    def _finished(self):
+        self.worker.deleteLater()
+        self.worker = None
+        if self.dirty:
+            self.flush()
+        else:
+            self.idle.emit()
+
+class CommitCacheWorker(QThread):
+    """Bring the persistent commit cache up to date off the GUI thread."""
+
+    def __init__(self, repo_path, parent=None):
+        super().__init__(parent)
+        self.repo_path = repo_path
+
+    def run(self):
+        with action('commit_cache'):
+            cache = CommitCache(self.repo_path)
+            try:
+                cache.update()
+            except git.GitCommandError as e:
+                print(f"Error updating the commit cache: {str(e)}")
+            finally:
+                cache.close()
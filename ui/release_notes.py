@@ -0,0 +1,62 @@
+# gitwhisper/ui/release_notes.py
+
+from PyQt6.QtCore import QThread, pyqtSignal
+from PyQt6.QtWidgets import QApplication, QDialog, QHBoxLayout, QLabel, QPushButton, QTextEdit, QVBoxLayout
+from ..metrics import action
+from ..release_notes import generate_release_notes
+
+class ReleaseNotesWorker(QThread):
+    """Generate release notes off the GUI thread, reporting progress per commit group."""
+
+    progress = pyqtSignal(int, int)
+    done = pyqtSignal(str)
+    failed = pyqtSignal(str)
+
+    def __init__(self, repo_path, base, head, parent=None):
+        super().__init__(parent)
+        self.repo_path = repo_path
+        self.base = base
+        self.head = head
+
+    def run(self):
+        try:
+            with action('release_notes'):
+                notes = generate_release_notes(self.repo_path, self.base, self.head, on_progress=self.progress.emit)
+            self.done.emit(notes)
+        except Exception as e:
+            self.failed.emit(str(e))
+
+class ReleaseNotesDialog(QDialog):
+    """Shows the release notes for a tag range once they are ready."""
+
+    def __init__(self, repo_path, base, head, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Release Notes: {base or 'previous tag'}..{head}")
+        self.setGeometry(150, 150, 800, 650)
+
+        layout = QVBoxLayout()
+        self.status_label = QLabel("Collecting commits...")
+        layout.addWidget(self.status_label)
+        self.text_edit = QTextEdit()
+        self.text_edit.setReadOnly(True)
+        layout.addWidget(self.text_edit)
+        buttons = QHBoxLayout()
+        copy_button = QPushButton("Copy")
+        copy_button.clicked.connect(lambda: QApplication.clipboard().setText(self.text_edit.toPlainText()))
+        buttons.addWidget(copy_button)
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.close)
+        buttons.addWidget(close_button)
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+
+        self.worker = ReleaseNotesWorker(repo_path, base, head, parent=self)
+        self.worker.progress.connect(
+            lambda done, total: self.status_label.setText(f"Summarizing commit groups... {done}/{total}"))
+        self.worker.done.connect(self.show_notes)
+        self.worker.failed.connect(lambda message: self.status_label.setText(f"Release notes failed: {message}"))
+        self.worker.start()
+
+    def show_notes(self, notes):
+        self.status_label.setText("Release notes ready" if notes else "No commits in this range")
+        self.text_edit.setPlainText(notes)
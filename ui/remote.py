@@ -0,0 +1,27 @@
+# gitwhisper/ui/remote.py
+
+import threading
+from PyQt6.QtCore import QThread, pyqtSignal
+from ..metrics import action
+
+class RemoteOperationWorker(QThread):
+    """Run a push/pull/fetch off the GUI thread and relay its progress."""
+
+    progress = pyqtSignal(str, int, int, str)
+    completed = pyqtSignal(bool, str)
+
+    def __init__(self, operation, *args, parent=None, **kwargs):
+        super().__init__(parent)
+        self.operation = operation
+        self.args = args
+        self.kwargs = kwargs
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        with action(f"remote.{self.operation.__name__}"):
+            success, message = self.operation(*self.args, progress=self.progress.emit,
+                                              cancel_event=self.cancel_event, **self.kwargs)
+        self.completed.emit(success, message)
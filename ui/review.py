@@ -0,0 +1,65 @@
+# gitwhisper/ui/review.py
+
+import html
+
+from PyQt6.QtCore import QThread, pyqtSignal
+from PyQt6.QtWidgets import QDialog, QLabel, QPushButton, QTextEdit, QVBoxLayout
+from ..code_review import review_range
+from ..metrics import action
+
+class ReviewWorker(QThread):
+    """Run a range review off the GUI thread, emitting each file's result as it completes."""
+
+    result = pyqtSignal(dict)
+    failed = pyqtSignal(str)
+
+    def __init__(self, repo_path, base, head, parent=None):
+        super().__init__(parent)
+        self.repo_path = repo_path
+        self.base = base
+        self.head = head
+
+    def run(self):
+        try:
+            with action('review'):
+                review_range(self.repo_path, self.base, self.head, on_result=self.result.emit)
+        except Exception as e:
+            self.failed.emit(str(e))
+
+class ReviewDialog(QDialog):
+    """Shows review findings for a commit range as they stream in."""
+
+    def __init__(self, repo_path, base, head, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Review: {base}...{head}")
+        self.setGeometry(150, 150, 900, 700)
+        self.reviewed = 0
+
+        layout = QVBoxLayout()
+        self.status_label = QLabel("Reviewing...")
+        layout.addWidget(self.status_label)
+        self.text_edit = QTextEdit()
+        self.text_edit.setReadOnly(True)
+        layout.addWidget(self.text_edit)
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.close)
+        layout.addWidget(close_button)
+        self.setLayout(layout)
+
+        self.worker = ReviewWorker(repo_path, base, head, parent=self)
+        self.worker.result.connect(self.add_result)
+        self.worker.failed.connect(lambda message: self.status_label.setText(f"Review failed: {message}"))
+        self.worker.finished.connect(self.review_finished)
+        self.worker.start()
+
+    def add_result(self, result):
+        self.reviewed += 1
+        source = " (cached)" if result['cached'] else ""
+        self.text_edit.append(f"<b>{html.escape(result['path'])}</b> (+{result['added']}/-{result['removed']}){source}")
+        # Reviews quote code (List<String>, <div>), so they are shown as plain text
+        self.text_edit.append(f"<pre style='white-space: pre-wrap'>{html.escape(result['review'])}\n</pre>")
+        self.status_label.setText(f"Reviewing... {self.reviewed} files done")
+
+    def review_finished(self):
+        if not self.status_label.text().startswith("Review failed"):
+            self.status_label.setText(f"Review complete: {self.reviewed} files")
@@ -0,0 +1,139 @@
+# gitwhisper/ui/speculative.py
+
+from PyQt6.QtCore import QEventLoop, QObject, QThread, QTimer
+from ..commit_summary import choose_generation_strategy, generate_staged_commit_summary, summarize_change_metrics
+from ..git_utils import get_change_metrics, get_staged_fingerprint
+from ..metrics import action, registry
+
+class GenerationWorker(QThread):
+    """Generate a commit message for the staged changes off the GUI thread."""
+
+    def __init__(self, repo_path, fingerprint, metrics, parent=None):
+        super().__init__(parent)
+        self.repo_path = repo_path
+        self.fingerprint = fingerprint
+        self.metrics = metrics
+        self.result = None
+        self.handled = False
+
+    def run(self):
+        try:
+            with action('speculative'):
+                self.result = generate_staged_commit_summary(self.repo_path, self.metrics)
+        except Exception as e:
+            print(f"Speculative commit message generation failed: {str(e)}")
+
+class SpeculativeCommitMessage(QObject):
+    """Generate the commit message in the background once staging has settled.
+
+    `staging_changed` restarts a debounce timer; when it fires, a message is
+    generated for the current staged fingerprint. If staging changes again the
+    in-flight result is discarded and a new one is started. Only changes small
+    enough for a single prompt are generated speculatively, and at most
+    `max_runs` speculative LLM calls are made per session.
+    """
+
+    def __init__(self, repo_path_getter, debounce_ms=3000, max_runs=20, parent=None):
+        super().__init__(parent)
+        self.repo_path_getter = repo_path_getter
+        self.max_runs = max_runs
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(debounce_ms)
+        self.timer.timeout.connect(self.start)
+        self.worker = None
+        self.wait_loop = None
+        self.stale_workers = []
+        self.fingerprint = None
+        self.result = None
+        self.stats = {'started': 0, 'completed': 0, 'discarded': 0, 'used': 0, 'missed': 0, 'over_budget': 0}
+
+    @property
+    def hit_rate(self):
+        """Fraction of commits that used a speculative result."""
+        attempts = self.stats['used'] + self.stats['missed']
+        return self.stats['used'] / attempts if attempts else 0.0
+
+    def staging_changed(self):
+        self.timer.start()
+
+    def cancel(self):
+        """Forget any pending or in-flight generation (e.g. when switching repositories)."""
+        self.timer.stop()
+        self._discard()
+        self.fingerprint = None
+        self.result = None
+
+    def _discard(self):
+        if self.worker is not None:
+            # Threads can't be interrupted mid-request; keep it alive until it finishes and ignore it
+            self.stats['discarded'] += 1
+            self.stale_workers.append(self.worker)
+            self.worker.finished.connect(lambda worker=self.worker: self.stale_workers.remove(worker))
+            self.worker = None
+
+    def start(self):
+        repo_path = self.repo_path_getter()
+        fingerprint = get_staged_fingerprint(repo_path)
+        if fingerprint == self.fingerprint and (self.result is not None or self.worker is not None):
+            return
+        self._discard()
+        self.fingerprint = fingerprint
+        self.result = None
+
+        metrics = get_change_metrics(repo_path)
+        strategy = choose_generation_strategy(metrics)
+        if not metrics.file_count or strategy == 'chunked':
+            return
+        if strategy == 'skip':
+            self.result = summarize_change_metrics(metrics)
+            return
+        if self.stats['started'] >= self.max_runs:
+            self.stats['over_budget'] += 1
+            return
+
+        worker = GenerationWorker(repo_path, fingerprint, metrics, parent=self)
+        worker.finished.connect(lambda: self._finished(worker))
+        self.worker = worker
+        self.stats['started'] += 1
+        worker.start()
+
+    def _finished(self, worker):
+        # `take` may handle a worker before its queued `finished` call arrives
+        if worker.handled:
+            return
+        worker.handled = True
+        if worker is self.worker:
+            self.worker = None
+            self.result = worker.result
+            if worker.result is not None:
+                self.stats['completed'] += 1
+            if self.wait_loop is not None:
+                self.wait_loop.quit()
+        worker.deleteLater()
+
+    def take(self, wait_ms=60000):
+        """Return the message for the current staged state, waiting for an in-flight run if needed.
+
+        Returns None (a miss) when nothing was generated for exactly what is staged now.
+        """
+        self.timer.stop()
+        fingerprint = get_staged_fingerprint(self.repo_path_getter())
+        if fingerprint == self.fingerprint and self.worker is not None and self.worker.isFinished():
+            # The thread has ended, but its queued `finished` call may not have run yet
+            self._finished(self.worker)
+        if fingerprint == self.fingerprint and self.worker is not None:
+            # `_finished` quits the loop; `finished` itself may already have been emitted
+            self.wait_loop = QEventLoop()
+            QTimer.singleShot(wait_ms, self.wait_loop.quit)
+            try:
+                self.wait_loop.exec()
+            finally:
+                self.wait_loop = None
+        if fingerprint == self.fingerprint and self.result is not None:
+            self.stats['used'] += 1
+            registry.increment('cache.speculative.hit')
+            return self.result
+        self.stats['missed'] += 1
+        registry.increment('cache.speculative.miss')
+        return None
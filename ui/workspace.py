@@ -0,0 +1,195 @@
+# gitwhisper/ui/workspace.py
+
+import os
+import sys
+import threading
+import time
+import git
+from concurrent.futures import ThreadPoolExecutor
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from ..commit_cache import CommitCache
+from ..diff_reader import StagedDiffIndex
+from ..git_utils import RepoSnapshot, is_git_repo
+from ..metrics import action
+
+# Threads shared by every inactive repository's background refresh
+WORKSPACE_WORKERS = 2
+# How often inactive repositories are refreshed
+BACKGROUND_REFRESH_MS = 60 * 1000
+# Panel data plus staged diffs kept for one repository while it is not shown
+MAX_REPO_BYTES = 64 * 1024 * 1024
+
+def estimate_size(obj, limit=None) -> int:
+    """Approximate memory held by plain panel data (lists, tuples, dicts, strings).
+
+    Stops counting once `limit` is exceeded, so sizing a huge file tree
+    costs no more than the limit it is compared against.
+    """
+    total = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        total += sys.getsizeof(item)
+        if limit is not None and total > limit:
+            break
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+    return total
+
+class RepoState:
+    """Everything kept for one open repository: the last loaded data of each panel and its handles."""
+
+    def __init__(self, repo_path):
+        self.repo_path = repo_path
+        self.panel_data = {}
+        self.staged_diff_index = None
+        self.last_active = time.monotonic()
+        self.refreshing = False
+        # Held while trimming on a worker thread, and by the GUI thread while it changes the data of an inactive
+        # repository or makes one active
+        self.lock = threading.Lock()
+
+    @property
+    def name(self):
+        return os.path.basename(os.path.normpath(self.repo_path))
+
+    def get_staged_diff_index(self):
+        if self.staged_diff_index is None and is_git_repo(self.repo_path):
+            self.staged_diff_index = StagedDiffIndex(self.repo_path)
+        return self.staged_diff_index
+
+    def trim(self, panel_order, max_bytes=MAX_REPO_BYTES):
+        """Drop cached data, lowest priority panel first, until the repository fits in `max_bytes`.
+
+        Dropped panels are simply reloaded the next time the repository is shown.
+        """
+        if self.staged_diff_index is not None and self.staged_diff_index.size > max_bytes // 2:
+            self.staged_diff_index = None
+        used = self.staged_diff_index.size if self.staged_diff_index is not None else 0
+        sizes = {name: estimate_size(data, max_bytes) for name, data in list(self.panel_data.items())}
+        used += sum(sizes.values())
+        for name in reversed(panel_order):
+            if used <= max_bytes:
+                break
+            if self.panel_data.pop(name, None) is not None:
+                used -= sizes.get(name, 0)
+
+class Workspace(QObject):
+    """Several open repositories, one of them active, sharing a bounded background worker pool.
+
+    Panel data loaded for the active repository is remembered per
+    repository, so switching back shows the last known state at once while a
+    normal refresh revalidates it. Inactive repositories are refreshed on a
+    timer by `WORKSPACE_WORKERS` threads shared across the whole workspace,
+    and trimmed to `MAX_REPO_BYTES` each time they go inactive or refresh.
+    """
+
+    activated = pyqtSignal(str)
+    repositories_changed = pyqtSignal()
+    background_loaded = pyqtSignal(object, object)
+
+    def __init__(self, max_workers=WORKSPACE_WORKERS, max_repo_bytes=MAX_REPO_BYTES,
+                 refresh_interval_ms=BACKGROUND_REFRESH_MS, parent=None):
+        super().__init__(parent)
+        self.repos = {}
+        self.active = None
+        self.loaders = []
+        self.max_repo_bytes = max_repo_bytes
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='workspace')
+        self.background_loaded.connect(self._store_background)
+        self.timer = QTimer(self)
+        self.timer.setInterval(refresh_interval_ms)
+        self.timer.timeout.connect(self.refresh_inactive)
+        self.timer.start()
+
+    def register(self, name, load):
+        """Register a panel loader, in priority order; the same loaders are used for background refreshes."""
+        self.loaders.append((name, load))
+
+    def store(self, name, data):
+        """Remember data just loaded for the active repository."""
+        if self.active is not None:
+            self.active.panel_data[name] = data
+
+    def open(self, repo_path):
+        """Add a repository (if it isn't open yet) and make it the active one."""
+        repo_path = os.path.abspath(repo_path)
+        if repo_path not in self.repos:
+            self.repos[repo_path] = RepoState(repo_path)
+            self.repositories_changed.emit()
+        self.activate(repo_path)
+        return self.repos[repo_path]
+
+    def close(self, repo_path):
+        state = self.repos.pop(repo_path, None)
+        if state is None:
+            return
+        self.repositories_changed.emit()
+        if state is self.active:
+            self.active = None
+            if self.repos:
+                self.activate(max(self.repos.values(), key=lambda s: s.last_active).repo_path)
+
+    def activate(self, repo_path):
+        state = self.repos[repo_path]
+        if state is self.active:
+            return
+        with state.lock:
+            # A trim still running for this repository finishes first; queued ones then leave it alone
+            previous, self.active = self.active, state
+        state.last_active = time.monotonic()
+        if previous is not None:
+            previous.last_active = time.monotonic()
+            panel_order = [name for name, _ in self.loaders]
+            self.executor.submit(self._trim_inactive, previous, panel_order)
+        self.activated.emit(repo_path)
+
+    def refresh_inactive(self):
+        """Queue a background reload of every inactive repository not already being refreshed."""
+        for state in self.repos.values():
+            if state is not self.active and not state.refreshing:
+                state.refreshing = True
+                self.executor.submit(self._load_in_background, state)
+
+    def _load_in_background(self, state):
+        data = {}
+        try:
+            if is_git_repo(state.repo_path):
+                cache = CommitCache(state.repo_path)
+                try:
+                    cache.update(blocking=False)
+                except git.GitCommandError as e:
+                    print(f"Error updating the commit cache of {state.repo_path}: {str(e)}")
+                finally:
+                    cache.close()
+                snapshot = RepoSnapshot(state.repo_path)
+                for name, load in self.loaders:
+                    try:
+                        with action('background_refresh'):
+                            data[name] = load(snapshot)
+                    except Exception as e:
+                        print(f"Error refreshing {name} in {state.repo_path}: {str(e)}")
+        finally:
+            self.background_loaded.emit(state, data)
+
+    def _store_background(self, state, data):
+        state.refreshing = False
+        if state is self.active or self.repos.get(state.repo_path) is not state:
+            return  # The active repository is kept fresh by the UI's own refreshes
+        with state.lock:
+            state.panel_data.update(data)
+        panel_order = [name for name, _ in self.loaders]
+        self.executor.submit(self._trim_inactive, state, panel_order)
+
+    def _trim_inactive(self, state, panel_order):
+        with state.lock:
+            # The user may have switched back to it since the trim was queued
+            if state is not self.active:
+                state.trim(panel_order, self.max_repo_bytes)
+
+    def shutdown(self):
+        self.timer.stop()
+        self.executor.shutdown(wait=False, cancel_futures=True)